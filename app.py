@@ -4,11 +4,14 @@ Main application module for the Budget Tracker app.
 
 # pylint: disable=not-callable
 
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 
 import csv
-from io import StringIO
+import heapq
+import os
+import time
+from io import TextIOWrapper
 import pymysql
 
 from flask import (
@@ -19,46 +22,105 @@ from flask import (
     redirect,
     url_for,
     flash,
-    make_response,
     abort,
+    make_response,
+    Response,
+    stream_with_context,
 )
 from flask_migrate import Migrate
 from flask_login import login_user, login_required, logout_user, current_user
 from werkzeug.urls import url_parse
-from sqlalchemy import func, extract
+from sqlalchemy import func, literal, select
 from config import Config
-from extensions import db, login_manager
-from forms import BudgetLimitForm, LoginForm, RegistrationForm, IncomeForm, ExpenseForm
-from models.budget import BudgetLimit, User, Income, Expense, Category
+from extensions import (
+    db,
+    login_manager,
+    cache,
+    alert_broker,
+    categories,
+    login_throttle,
+    password_hasher,
+    pool_metrics,
+    replica_router,
+    request_metrics,
+    user_cache,
+)
+from forms import (
+    BudgetLimitForm,
+    LoginForm,
+    RegistrationForm,
+    IncomeForm,
+    ExpenseForm,
+    ImportForm,
+)
+from analytics import SpendingAnalytics
+from columnar import ExportReport, arrow_stream, record_batches
+from importer import CSV_FIELDS, import_csv
+from money import MoneyJSONProvider, from_cents, to_cents
+from passwords import PasswordHasherBusy
+from recurring import materialize_recurring, parse_schedule
+from reporting import BUCKET_UNITS, date_bucket
+from transactions import (
+    decode_cursor,
+    encode_cursor,
+    transaction_page,
+    transactions_query,
+)
+from models.budget import (
+    BudgetLimit,
+    DailyBalance,
+    User,
+    Income,
+    Expense,
+    Category,
+    MonthlyCategorySpend,
+    RecurringRule,
+    month_key,
+)
 
 pymysql.install_as_MySQLdb()
 
 app = Flask(__name__)
 app.config.from_object(Config)
+app.json = MoneyJSONProvider(app)
 db.init_app(app)
+replica_router.init_app(app)
+pool_metrics.init_app(app)
+request_metrics.init_app(app)
 login_manager.init_app(app)
-migrate = Migrate(app, db)
+cache.init_app(app)
+user_cache.init_app(app)
+password_hasher.init_app(app)
+login_throttle.init_app(app)
+alert_broker.init_app(app)
+categories.init_app(app)
+spending_analytics = SpendingAnalytics(app)
+# Found next to the app rather than in the working directory, so `flask db`
+# and manage.py work from anywhere.
+migrate = Migrate(app, db, directory=os.path.join(app.root_path, "migrations"))
 
 login_manager.login_view = "login"
 
 
 @login_manager.user_loader
 def load_user(user_id):
-    """Load user by ID for Flask-Login."""
-    return User.query.get(int(user_id))
+    """Load user by ID for Flask-Login, from the per-process cache if possible."""
+    return user_cache.load(db.session, User, int(user_id))
 
 
 @app.route("/")
 @login_required
 def index():
-    """Render the index page with income and expense lists."""
-    incomes = (
-        Income.query.filter_by(user=current_user).order_by(Income.date.desc()).all()
-    )
-    expenses = (
-        Expense.query.filter_by(user=current_user).order_by(Expense.date.desc()).all()
-    )
-    return render_template("index.html", incomes=incomes, expenses=expenses)
+    """Render the index page; income and expense lists are loaded page by page."""
+    return render_template("index.html")
+
+
+@app.errorhandler(PasswordHasherBusy)
+def password_hasher_busy(_error):
+    """Ask the client to retry when the password pool is saturated."""
+    response = make_response("Too many sign-ins in progress, try again shortly.", 503)
+    response.headers["Retry-After"] = "1"
+    return response
 
 
 @app.route("/register", methods=["GET", "POST"])
@@ -84,11 +146,25 @@ def login():
         return redirect(url_for("index"))
     form = LoginForm()
     if form.validate_on_submit():
+        # Floods against one username are turned away before any hashing.
+        retry_after = login_throttle.hit(form.username.data)
+        if retry_after:
+            flash("Too many login attempts, please try again later.")
+            response = make_response(
+                render_template("login.html", title="Sign In", form=form), 429
+            )
+            response.headers["Retry-After"] = str(retry_after)
+            return response
         user = User.query.filter_by(username=form.username.data).first()
         if user is None or not user.check_password(form.password.data):
             flash("Invalid username or password")
             return redirect(url_for("login"))
+        login_throttle.reset(form.username.data)
+        if password_hasher.needs_rehash(user.password_hash):
+            user.set_password(form.password.data)
+            db.session.commit()
         login_user(user, remember=form.remember_me.data)
+        user_cache.store(user)
         next_page = request.args.get("next")
         if not next_page or url_parse(next_page).netloc != "":
             next_page = url_for("index")
@@ -109,6 +185,7 @@ def add_income():
     """Handle adding new income."""
     form = IncomeForm()
     if form.validate_on_submit():
+        User.lock([current_user.id])
         income = Income(
             amount=form.amount.data,
             source=form.source.data,
@@ -116,7 +193,10 @@ def add_income():
             user=current_user,
         )
         db.session.add(income)
-        db.session.commit()
+        DailyBalance.record(
+            current_user.id, income.date, income_cents=income.amount_cents
+        )
+        commit_user_data(current_user.id)
         flash("Income added successfully!")
         return redirect(url_for("index"))
     return render_template("income.html", title="Add Income", form=form)
@@ -130,21 +210,11 @@ def check_budget_limit(user, category_id, amount):
     if not budget_limit:
         return True, None  # No limit set, allow expense
 
-    current_month = datetime.now().replace(
-        day=1, hour=0, minute=0, second=0, microsecond=0
-    )
-    total_expenses = (
-        db.session.query(func.sum(Expense.amount))
-        .filter(
-            Expense.user_id == user.id,
-            Expense.category_id == category_id,
-            Expense.date >= current_month,
-        )
-        .scalar()
-        or 0
+    total_expenses = MonthlyCategorySpend.spent(
+        user.id, category_id, datetime.now().date()
     )
 
-    if total_expenses + amount > budget_limit.amount:
+    if total_expenses + to_cents(amount) > budget_limit.amount_cents:
         return False, budget_limit.amount
     return True, None
 
@@ -154,7 +224,7 @@ def check_budget_limit(user, category_id, amount):
 def add_expense():
     """Handle adding new expense."""
     form = ExpenseForm()
-    form.category.choices = [(c.id, c.name) for c in Category.query.order_by("name")]
+    form.category.choices = categories.choices()
     if form.validate_on_submit():
         within_limit, limit = check_budget_limit(
             current_user, form.category.data, form.amount.data
@@ -174,8 +244,15 @@ def add_expense():
             category_id=form.category.data,
             user_id=current_user.id,
         )
+        User.lock([current_user.id])
         db.session.add(expense)
-        db.session.commit()
+        MonthlyCategorySpend.record(
+            current_user.id, expense.category_id, expense.date, expense.amount_cents
+        )
+        DailyBalance.record(
+            current_user.id, expense.date, expense_cents=expense.amount_cents
+        )
+        commit_user_data(current_user.id)
         flash("Expense added successfully!")
         return redirect(url_for("index"))
     return render_template("expenses.html", title="Add Expense", form=form)
@@ -188,186 +265,310 @@ def reports():
     return render_template("reports.html", title="Financial Reports")
 
 
+def summary_data(user_id):
+    """Return a user's all-time totals and expense totals by category."""
+
+    def total(model):
+        return (
+            select(func.sum(model.amount_cents))
+            .where(model.user_id == user_id)
+            .scalar_subquery()
+        )
+
+    total_income, total_expenses = db.session.execute(
+        select(total(Income), total(Expense))
+    ).one()
+
+    expense_categories = (
+        db.session.query(Expense.category_id, func.sum(Expense.amount_cents))
+        .filter(Expense.user_id == user_id)
+        .group_by(Expense.category_id)
+        .all()
+    )
+
+    return {
+        "total_income": from_cents(total_income),
+        "total_expenses": from_cents(total_expenses),
+        "expense_categories": {
+            categories.name(category_id): from_cents(cents)
+            for category_id, cents in expense_categories
+        },
+    }
+
+
 @app.route("/api/summary")
 @login_required
+@cache.cached("summary")
 def api_summary():
     """Retrieve summary data for the current user."""
-    total_income = (
-        db.session.query(func.sum(Income.amount))
-        .filter(Income.user_id == current_user.id)
-        .scalar()
-        or 0
-    )
-    total_expenses = (
-        db.session.query(func.sum(Expense.amount))
-        .filter(Expense.user_id == current_user.id)
-        .scalar()
-        or 0
-    )
+    return jsonify(summary_data(current_user.id))
 
-    expense_categories = (
-        db.session.query(Category.name, func.sum(Expense.amount))
-        .join(Expense)
-        .filter(Expense.user_id == current_user.id)
-        .group_by(Category.name)
-        .all()
-    )
 
-    expense_category_data = {cat: float(amount) for cat, amount in expense_categories}
+TRANSACTIONS_PAGE_SIZE = 20
+MAX_TRANSACTIONS_PAGE_SIZE = 100
+
+
+def parse_date_arg(name):
+    """Return the YYYY-MM-DD query parameter ``name`` as a date, or None."""
+    value = request.args.get(name)
+    return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+
+def serialize_transaction(row):
+    """Convert a transactions_query row into a JSON-ready dictionary."""
+    endpoint = row.type.lower()
+    return {
+        "id": row.id,
+        "date": row.date.strftime("%Y-%m-%d"),
+        "type": row.type,
+        "amount": from_cents(row.amount_cents),
+        "description": row.description,
+        "category": categories.name(row.category_id) or "",
+        "edit_url": url_for(f"edit_{endpoint}", **{f"{endpoint}_id": row.id}),
+        "delete_url": url_for(f"delete_{endpoint}", **{f"{endpoint}_id": row.id}),
+    }
+
+
+@app.route("/api/transactions")
+@login_required
+def api_transactions():
+    """
+    List the current user's incomes and expenses newest first, one page at a time.
+
+    Query parameters: ``type`` (income or expense), ``category_id``,
+    ``start_date`` and ``end_date`` (YYYY-MM-DD), ``limit`` and ``cursor``
+    (the ``next_cursor`` of the previous page).
+    """
+    kind = request.args.get("type", "").capitalize() or None
+    category_id = request.args.get("category_id", type=int)
+    limit = request.args.get("limit", TRANSACTIONS_PAGE_SIZE, type=int)
+    try:
+        if kind not in (None, "Income", "Expense"):
+            raise ValueError(f"invalid type {request.args['type']!r}")
+        if kind == "Income" and category_id is not None:
+            raise ValueError("incomes have no category")
+        cursor = request.args.get("cursor")
+        rows, next_cursor = transaction_page(
+            current_user.id,
+            max(1, min(limit, MAX_TRANSACTIONS_PAGE_SIZE)),
+            kind=kind,
+            category_id=category_id,
+            start_date=parse_date_arg("start_date"),
+            end_date=parse_date_arg("end_date"),
+            before=decode_cursor(cursor) if cursor else None,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     return jsonify(
         {
-            "total_income": float(total_income),
-            "total_expenses": float(total_expenses),
-            "expense_categories": expense_category_data,
+            "transactions": [serialize_transaction(row) for row in rows],
+            "next_cursor": next_cursor,
         }
     )
 
 
+RECENT_TRANSACTIONS = 10
+MAX_RECENT_TRANSACTIONS = 50
+
+
+def recent_transactions(user_id, limit=RECENT_TRANSACTIONS, since=None):
+    """
+    Return a user's most recent incomes and expenses and the newest cursor.
+
+    Both tables are merged by one UNION ALL statement ordered by date and id.
+    With ``since``, only rows newer than that cursor are returned, so a client
+    can prepend them to the list it already shows. When there are more than
+    ``limit`` of them, the ones nearest the cursor are returned and
+    ``has_more`` is set; the client then asks again with the new cursor.
+    Entries dated before the cursor, such as backdated ones, are not newer
+    and only show up when the list is loaded without ``since``.
+
+    :param user_id: The ID of the user whose transactions are listed.
+    :param limit: Maximum number of transactions to return.
+    :param since: A cursor returned by an earlier call.
+    :return: A dict with the ``transactions``, the ``latest_cursor`` to pass
+        as ``since`` next time and whether newer rows than it remain.
+    :raises ValueError: If the cursor is malformed.
+    """
+    has_more = False
+    if since:
+        rows = db.session.execute(
+            transactions_query(
+                user_id, after=decode_cursor(since), limit=limit + 1, oldest_first=True
+            )
+        ).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit][::-1]
+    else:
+        rows = db.session.execute(transactions_query(user_id, limit=limit)).all()
+    return {
+        "transactions": [serialize_transaction(row) for row in rows],
+        "latest_cursor": encode_cursor(rows[0]) if rows else since,
+        "has_more": has_more,
+    }
+
+
 @app.route("/api/recent_transactions")
 @login_required
 def api_recent_transactions():
-    """Retrieve recent transactions for the current user."""
-    recent_incomes = (
-        Income.query.filter_by(user_id=current_user.id)
-        .order_by(Income.date.desc())
-        .limit(5)
-        .all()
-    )
-    recent_expenses = (
-        Expense.query.filter_by(user_id=current_user.id)
-        .order_by(Expense.date.desc())
-        .limit(5)
-        .all()
-    )
+    """
+    Retrieve the current user's most recent transactions, newest first.
 
-    transactions = [
-        {
-            "date": income.date.strftime("%Y-%m-%d"),
-            "type": "Income",
-            "amount": float(income.amount),
-            "description": income.source,
-        }
-        for income in recent_incomes
-    ] + [
-        {
-            "date": expense.date.strftime("%Y-%m-%d"),
-            "type": "Expense",
-            "amount": float(expense.amount),
-            "description": expense.description,
-        }
-        for expense in recent_expenses
-    ]
+    Query parameters: ``limit`` (default 10, at most 50) and ``since`` (the
+    ``latest_cursor`` of an earlier response) to fetch only newer entries;
+    ``has_more`` is set when newer ones remain past those returned.
+    """
+    limit = request.args.get("limit", RECENT_TRANSACTIONS, type=int)
+    try:
+        data = recent_transactions(
+            current_user.id,
+            max(1, min(limit, MAX_RECENT_TRANSACTIONS)),
+            since=request.args.get("since"),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(data)
 
-    transactions.sort(
-        key=lambda x: datetime.strptime(x["date"], "%Y-%m-%d"), reverse=True
-    )
-    return jsonify(transactions[:10])
 
+def report_range():
+    """
+    Return the (start, end) dates of a report request.
 
-@app.route("/api/report_data")
-@login_required
-def get_report_data():
-    """Retrieve report data for a specified date range."""
-    start_date = request.args.get("start_date")
-    end_date = request.args.get("end_date")
-
-    # If dates are not provided, use the last 30 days as default
-    if not start_date:
-        start_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
-    if not end_date:
-        end_date = datetime.now().strftime("%Y-%m-%d")
-
-    start_date = datetime.strptime(start_date, "%Y-%m-%d")
-    end_date = datetime.strptime(end_date, "%Y-%m-%d")
-
-    incomes = Income.query.filter(
-        Income.user == current_user, Income.date >= start_date, Income.date <= end_date
-    ).all()
-    expenses = Expense.query.filter(
-        Expense.user == current_user,
-        Expense.date >= start_date,
-        Expense.date <= end_date,
-    ).all()
-
-    total_income = sum(income.amount for income in incomes)
-    total_expenses = sum(expense.amount for expense in expenses)
-    net_income = total_income - total_expenses
-
-    transactions = []
-    for income in incomes:
-        transactions.append(
-            {
-                "date": income.date.strftime("%Y-%m-%d"),
-                "type": "Income",
-                "amount": float(income.amount),
-                "description": income.source,
-                "category": "",
-            }
-        )
-    for expense in expenses:
-        transactions.append(
-            {
-                "date": expense.date.strftime("%Y-%m-%d"),
-                "type": "Expense",
-                "amount": float(expense.amount),
-                "description": expense.description,
-                "category": expense.category.name if expense.category else "",
-            }
-        )
+    Both default to the last 30 days.
 
-    # Generate expense categories data
-    expense_categories = (
-        db.session.query(Category.name, func.sum(Expense.amount))
-        .join(Expense)
+    :raises ValueError: If a date is not in YYYY-MM-DD format.
+    """
+    today = datetime.now().date()
+    start_date = parse_date_arg("start_date") or today - timedelta(days=30)
+    end_date = parse_date_arg("end_date") or today
+    return start_date, end_date
+
+
+def expense_category_totals(user_id, start_date, end_date):
+    """Return {category name: Decimal total} of a user's expenses in a range."""
+    totals = (
+        db.session.query(Expense.category_id, func.sum(Expense.amount_cents))
         .filter(
-            Expense.user == current_user,
+            Expense.user_id == user_id,
             Expense.date >= start_date,
             Expense.date <= end_date,
         )
-        .group_by(Category.name)
+        .group_by(Expense.category_id)
         .all()
     )
-
-    expense_categories_dict = {
-        category: float(amount) for category, amount in expense_categories
+    return {
+        categories.name(category_id): from_cents(cents)
+        for category_id, cents in totals
     }
 
+
+@app.route("/api/report_data")
+@login_required
+@cache.cached("report_data")
+@replica_router.reads
+def get_report_data():
+    """
+    Retrieve report data for a specified date range.
+
+    Totals and the category breakdown are aggregated in SQL. Transactions are
+    only listed when ``transactions=1`` is passed, one page at a time using
+    ``limit`` and ``cursor`` as in /api/transactions.
+    """
+    try:
+        start_date, end_date = report_range()
+        cursor = request.args.get("cursor")
+        before = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def total(model):
+        return (
+            select(func.sum(model.amount_cents))
+            .where(
+                model.user_id == current_user.id,
+                model.date >= start_date,
+                model.date <= end_date,
+            )
+            .scalar_subquery()
+        )
+
+    total_income, total_expenses = db.session.execute(
+        select(total(Income), total(Expense))
+    ).one()
+    total_income, total_expenses = from_cents(total_income), from_cents(
+        total_expenses
+    )
+
     report_data = {
-        "total_income": float(total_income),
-        "total_expenses": float(total_expenses),
-        "net_income": float(net_income),
-        "transactions": transactions,
-        "expense_categories": expense_categories_dict,
+        "total_income": total_income,
+        "total_expenses": total_expenses,
+        "net_income": total_income - total_expenses,
+        "expense_categories": expense_category_totals(
+            current_user.id, start_date, end_date
+        ),
     }
 
+    if request.args.get("transactions") == "1":
+        limit = request.args.get("limit", TRANSACTIONS_PAGE_SIZE, type=int)
+        rows, next_cursor = transaction_page(
+            current_user.id,
+            max(1, min(limit, MAX_TRANSACTIONS_PAGE_SIZE)),
+            start_date=start_date,
+            end_date=end_date,
+            before=before,
+        )
+        report_data["transactions"] = [serialize_transaction(row) for row in rows]
+        report_data["next_cursor"] = next_cursor
+
     return jsonify(report_data)
 
 
 @app.route("/api/chart-data")
 @login_required
+@replica_router.reads
 def chart_data():
-    """Retrieve chart data for a specified date range."""
-    start_date = request.args.get("start_date")
-    end_date = request.args.get("end_date")
+    """Retrieve expense totals per category for a specified date range."""
+    try:
+        start_date, end_date = report_range()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(expense_category_totals(current_user.id, start_date, end_date))
+
+
+MAX_BALANCE_SERIES_DAYS = 3660
 
-    # If dates are not provided, use the last 30 days as default
-    if not start_date:
-        start_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
-    if not end_date:
-        end_date = datetime.now().strftime("%Y-%m-%d")
 
-    expenses = Expense.query.filter(
-        Expense.user == current_user,
-        Expense.date >= start_date,
-        Expense.date <= end_date,
-    ).all()
-    data = {}
-    for expense in expenses:
-        category_name = expense.category.name if expense.category else "Uncategorized"
-        data[category_name] = data.get(category_name, 0) + expense.amount
+@app.route("/api/daily_balance")
+@login_required
+@cache.cached("daily_balance")
+@replica_router.reads
+def daily_balance():
+    """
+    Retrieve the current user's daily income, expenses and running balance.
 
-    return jsonify({k: float(v) for k, v in data.items()})
+    Reads the DailyBalance series for ``start_date`` to ``end_date`` (the
+    last 30 days by default) and returns parallel arrays with one item per
+    day, ready for cash-flow charts and moving averages.
+    """
+    try:
+        start_date, end_date = report_range()
+        if start_date > end_date:
+            raise ValueError("start_date is after end_date")
+        if (end_date - start_date).days >= MAX_BALANCE_SERIES_DAYS:
+            raise ValueError(f"ranges are limited to {MAX_BALANCE_SERIES_DAYS} days")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    series = DailyBalance.series(current_user.id, start_date, end_date)
+    return jsonify(
+        {
+            "dates": [day.isoformat() for day in series["dates"]],
+            "income": [from_cents(cents) for cents in series["income"]],
+            "expenses": [from_cents(cents) for cents in series["expenses"]],
+            "balance": [from_cents(cents) for cents in series["balance"]],
+        }
+    )
 
 
 @app.route("/edit_income/<int:income_id>", methods=["GET", "POST"])
@@ -386,8 +587,14 @@ def edit_income(income_id):
     form = IncomeForm(obj=income)
 
     if form.validate_on_submit():
+        DailyBalance.record(
+            current_user.id, income.date, income_cents=-income.amount_cents
+        )
         form.populate_obj(income)
-        db.session.commit()
+        DailyBalance.record(
+            current_user.id, income.date, income_cents=income.amount_cents
+        )
+        commit_user_data(current_user.id)
         flash("Income updated successfully!", "success")
         return redirect(url_for("index"))
 
@@ -409,8 +616,11 @@ def delete_income(income_id):
     if income.user != current_user:
         abort(403)
 
+    DailyBalance.record(
+        current_user.id, income.date, income_cents=-income.amount_cents
+    )
     db.session.delete(income)
-    db.session.commit()
+    commit_user_data(current_user.id)
     flash("Income deleted successfully!", "success")
     return redirect(url_for("index"))
 
@@ -429,16 +639,33 @@ def edit_expense(expense_id):
         abort(403)
 
     form = ExpenseForm(obj=expense)
-    form.category.choices = [(c.id, c.name) for c in Category.query.order_by("name")]
+    form.category.choices = categories.choices()
 
     if form.validate_on_submit():
+        User.lock([current_user.id])
+        MonthlyCategorySpend.record(
+            current_user.id,
+            expense.category_id,
+            expense.date,
+            -expense.amount_cents,
+            -1,
+        )
+        DailyBalance.record(
+            current_user.id, expense.date, expense_cents=-expense.amount_cents
+        )
         expense.amount = form.amount.data
         expense.description = form.description.data
         expense.date = form.date.data
         expense.category_id = (
             form.category.data
         )  # Assign category_id, not category object
-        db.session.commit()
+        MonthlyCategorySpend.record(
+            current_user.id, expense.category_id, expense.date, expense.amount_cents
+        )
+        DailyBalance.record(
+            current_user.id, expense.date, expense_cents=expense.amount_cents
+        )
+        commit_user_data(current_user.id)
         flash("Expense updated successfully!", "success")
         return redirect(url_for("index"))
 
@@ -464,36 +691,57 @@ def delete_expense(expense_id):
     if expense.user != current_user:
         abort(403)
 
+    User.lock([current_user.id])
+    MonthlyCategorySpend.record(
+        current_user.id,
+        expense.category_id,
+        expense.date,
+        -expense.amount_cents,
+        -1,
+    )
+    DailyBalance.record(
+        current_user.id, expense.date, expense_cents=-expense.amount_cents
+    )
     db.session.delete(expense)
-    db.session.commit()
+    commit_user_data(current_user.id)
     flash("Expense deleted successfully!", "success")
     return redirect(url_for("index"))
 
 
 @app.route("/api/spending_patterns")
 @login_required
+@replica_router.reads
 def spending_patterns():
-    """Retrieve spending pattern data for the current user over the last 6 months."""
+    """
+    Retrieve the current user's spending per category over the last 6 months.
+
+    Totals are grouped by month, or by the ``interval`` query parameter: one
+    of "day", "week", "month" or "quarter". Monthly totals cover whole
+    calendar months and use the indexed ``year_month`` column.
+    """
+    interval = request.args.get("interval", "month")
+    if interval not in BUCKET_UNITS:
+        units = ", ".join(BUCKET_UNITS)
+        return jsonify({"error": f"interval must be one of {units}"}), 400
     try:
-        end_date = datetime.now()
+        end_date = datetime.now().date()
         start_date = end_date - timedelta(days=180)
+        if interval == "month":
+            in_window = Expense.year_month.between(
+                month_key(start_date), month_key(end_date)
+            )
+        else:
+            in_window = Expense.date.between(start_date, end_date)
 
+        bucket = date_bucket(Expense, interval).label("month")
         spending_data = (
             db.session.query(
-                func.concat(
-                    extract("year", Expense.date),
-                    "-",
-                    func.lpad(extract("month", Expense.date), 2, "0"),
-                ).label("month"),
-                Category.name.label("category"),
-                func.sum(Expense.amount).label("total"),
+                bucket,
+                Expense.category_id,
+                func.sum(Expense.amount_cents).label("total"),
             )
-            .join(Category)
-            .filter(
-                Expense.user_id == current_user.id,
-                Expense.date.between(start_date, end_date),
-            )
-            .group_by("month", "category")
+            .filter(Expense.user_id == current_user.id, in_window)
+            .group_by(bucket, Expense.category_id)
             .all()
         )
 
@@ -502,7 +750,7 @@ def spending_patterns():
             month = item.month
             if month not in data:
                 data[month] = {}
-            data[month][item.category] = float(item.total)
+            data[month][categories.name(item.category_id)] = from_cents(item.total)
 
         return jsonify(data)
     except Exception as e:
@@ -517,6 +765,136 @@ def spending_patterns():
         )
 
 
+@app.route("/api/spending_analytics")
+@login_required
+def api_spending_analytics():
+    """
+    Retrieve forecasts and anomalies computed from the user's expense history.
+
+    Returns per-category monthly totals with rolling means and seasonal
+    indices, the projected month-end spend of each budget limit and unusually
+    large recent expenses. Results are memoised until the user's data changes.
+    """
+    return jsonify(
+        spending_analytics.get(
+            current_user.id,
+            user_data_version(current_user.id),
+            datetime.now().date(),
+        )
+    )
+
+
+def serialize_recurring_rule(rule):
+    """Convert a RecurringRule into a JSON-ready dictionary."""
+    return {
+        "id": rule.id,
+        "type": rule.type,
+        "amount": rule.amount,
+        "description": rule.description,
+        "category": categories.name(rule.category_id) if rule.category_id else None,
+        "rrule": rule.rrule,
+        "start": rule.dtstart.isoformat(),
+        "next_date": rule.next_date.isoformat() if rule.next_date else None,
+    }
+
+
+# Oldest start accepted for a new rule, whose due occurrences are entered
+# within the request.
+MAX_RECURRING_BACKFILL_DAYS = 366
+
+
+def parse_recurring_rule(data):
+    """
+    Validate a JSON recurring rule and return the RecurringRule columns.
+
+    :raises ValueError: With a message for the client if the rule is invalid.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("the rule must be a JSON object")
+    for field in ("type", "description", "rrule", "start"):
+        if data.get(field) is not None and not isinstance(data[field], str):
+            raise ValueError(f"{field} must be a string")
+    kind = data.get("type")
+    if kind not in ("Income", "Expense"):
+        raise ValueError("type must be Income or Expense")
+    try:
+        amount_cents = to_cents(data.get("amount"))
+    except ArithmeticError:
+        raise ValueError("Invalid amount") from None
+    if amount_cents <= 0:
+        raise ValueError("amount must be positive")
+    description = (data.get("description") or "").strip()
+    if not description or len(description) > (100 if kind == "Income" else 200):
+        raise ValueError("description is missing or too long")
+    category_id = None
+    if kind == "Expense":
+        category_id = data.get("category_id")
+        if type(category_id) is not int or category_id not in categories.names():
+            raise ValueError("unknown category_id")
+    try:
+        start = date.fromisoformat(data.get("start") or date.today().isoformat())
+    except (TypeError, ValueError):
+        raise ValueError("start must be a YYYY-MM-DD date") from None
+    if start < date.today() - timedelta(days=MAX_RECURRING_BACKFILL_DAYS):
+        raise ValueError(
+            f"start must be within the last {MAX_RECURRING_BACKFILL_DAYS} days"
+        )
+    rrule = data.get("rrule") or ""
+    schedule = parse_schedule(rrule)
+    return {
+        "type": kind,
+        "amount_cents": amount_cents,
+        "description": description,
+        "category_id": category_id,
+        "rrule": rrule.upper(),
+        "dtstart": start,
+        "next_date": next(schedule.occurrences(start, start, date.max), None),
+    }
+
+
+@app.route("/api/recurring_rules", methods=["GET", "POST"])
+@login_required
+def api_recurring_rules():
+    """
+    List the user's recurring rules, or create one from a JSON body.
+
+    A new rule takes ``type``, ``amount``, ``description``, ``category_id``
+    (expenses only), ``rrule`` and an optional ``start`` date, at most
+    MAX_RECURRING_BACKFILL_DAYS ago. Occurrences already due are entered
+    straight away; later ones are entered by the scheduled
+    ``manage.py materialize_recurring``.
+    """
+    if request.method == "GET":
+        rules = RecurringRule.query.filter_by(user_id=current_user.id).order_by(
+            RecurringRule.id
+        )
+        return jsonify([serialize_recurring_rule(rule) for rule in rules])
+
+    try:
+        values = parse_recurring_rule(request.get_json(silent=True) or {})
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+    rule = RecurringRule(user_id=current_user.id, **values)
+    db.session.add(rule)
+    db.session.commit()
+    report = materialize_recurring(date.today(), user_id=current_user.id)
+    if report.user_ids:
+        user_data_changed(current_user.id)
+    return jsonify(serialize_recurring_rule(rule)), 201
+
+
+@app.route("/api/recurring_rules/<int:rule_id>", methods=["DELETE"])
+@login_required
+def api_delete_recurring_rule(rule_id):
+    """Stop a recurring rule; entries it already made are kept."""
+    rule = db.session.get(RecurringRule, rule_id)
+    if rule is None or rule.user_id != current_user.id:
+        abort(404)
+    db.session.delete(rule)
+    db.session.commit()
+    return "", 204
+
+
 @app.route("/delete_budget_limit/<int:limit_id>", methods=["POST"])
 @login_required
 def delete_budget_limit(limit_id):
@@ -525,7 +903,7 @@ def delete_budget_limit(limit_id):
     if limit.user != current_user:
         abort(403)
     db.session.delete(limit)
-    db.session.commit()
+    commit_user_data(current_user.id)
     flash("Budget limit deleted successfully!")
     return redirect(url_for("set_budget_limit"))
 
@@ -536,7 +914,7 @@ def delete_budget_limit(limit_id):
 def set_budget_limit():
     """Handle setting of budget limits."""
     form = BudgetLimitForm()
-    form.category.choices = [(c.id, c.name) for c in Category.query.order_by("name")]
+    form.category.choices = categories.choices()
 
     if form.validate_on_submit():
         limit = BudgetLimit.query.filter_by(
@@ -551,7 +929,7 @@ def set_budget_limit():
                 amount=form.amount.data,
             )
             db.session.add(limit)
-        db.session.commit()
+        commit_user_data(current_user.id)
         flash("Budget limit set successfully!")
         return redirect(url_for("set_budget_limit"))
 
@@ -563,38 +941,163 @@ def set_budget_limit():
     )
 
 
+def budget_alerts(user_id):
+    """Return the user's budget limits exceeded this month, in one query."""
+    spent = func.coalesce(MonthlyCategorySpend.total_cents, 0)
+    exceeded = (
+        db.session.query(
+            Category.name, BudgetLimit.amount_cents.label("limit"), spent.label("spent")
+        )
+        .select_from(BudgetLimit)
+        .join(Category, Category.id == BudgetLimit.category_id)
+        .outerjoin(
+            MonthlyCategorySpend,
+            (MonthlyCategorySpend.user_id == BudgetLimit.user_id)
+            & (MonthlyCategorySpend.category_id == BudgetLimit.category_id)
+            & (MonthlyCategorySpend.year_month == month_key(datetime.now())),
+        )
+        .filter(BudgetLimit.user_id == user_id, spent > BudgetLimit.amount_cents)
+        .order_by(Category.name)
+        .all()
+    )
+
+    return [
+        {
+            "category": name,
+            "limit": from_cents(limit),
+            "spent": from_cents(total_expenses),
+            "percentage": total_expenses * 100 / limit,
+        }
+        for name, limit, total_expenses in exceeded
+    ]
+
+
+@cache.version_loader
+def user_data_version(user_id):
+    """Return a user's data version, which changes with every write."""
+    # Read from the database: the user cache may hold an old value.
+    return db.session.execute(
+        select(User.data_version).where(User.id == user_id)
+    ).scalar_one()
+
+
+def commit_user_data(user_id):
+    """
+    Commit a change to a user's incomes, expenses or limits and propagate it.
+
+    The user's data version, which dashboard ETags are built from, is bumped
+    in the same transaction.
+    """
+    User.bump_data_version(user_id)
+    db.session.commit()
+    user_data_changed(user_id)
+
+
+def user_data_changed(user_id):
+    """
+    Propagate a committed change to a user's incomes, expenses or limits.
+
+    Drops the user's cached API responses and pushes the current budget
+    alerts to any open alert streams.
+    """
+    cache.invalidate_user(user_id)
+    if alert_broker.has_subscribers(user_id):
+        alert_broker.publish(user_id, budget_alerts(user_id))
+
+
 @app.route("/api/check_budget_alerts")
 @login_required
 def check_budget_alerts():
     """Check for budget limit alerts."""
-    current_month = datetime.now().replace(
-        day=1, hour=0, minute=0, second=0, microsecond=0
-    )
-    alerts = []
-
-    for limit in current_user.budget_limits:
-        total_expenses = (
-            db.session.query(func.sum(Expense.amount))
-            .filter(
-                Expense.user == current_user,
-                Expense.category == limit.category,
-                Expense.date >= current_month,
-            )
-            .scalar()
-            or 0
+    return jsonify(budget_alerts(current_user.id))
+
+
+@app.route("/api/dashboard")
+@login_required
+def api_dashboard():
+    """
+    Return the summary, recent transactions and budget alerts in one response.
+
+    The ETag combines the user's data version with the current month, which
+    budget alerts depend on, so a client sending it back in If-None-Match
+    gets a 304 after a single primary-key lookup while nothing has changed.
+    """
+    data_version = user_data_version(current_user.id)
+    etag = f"{current_user.id}-{data_version}-{month_key(datetime.now())}"
+    headers = {"Cache-Control": "private, no-cache"}
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304, headers=headers)
+    else:
+        response = jsonify(
+            {
+                "summary": summary_data(current_user.id),
+                "recent_transactions": recent_transactions(current_user.id),
+                "budget_alerts": budget_alerts(current_user.id),
+            }
         )
+        response.headers.update(headers)
+    response.set_etag(etag)
+    return response
 
-        if total_expenses > limit.amount:
-            alerts.append(
-                {
-                    "category": limit.category.name,
-                    "limit": limit.amount,
-                    "spent": total_expenses,
-                    "percentage": (total_expenses / limit.amount) * 100,
-                }
-            )
 
-    return jsonify(alerts)
+@app.route("/api/budget_alerts/stream")
+@login_required
+def budget_alerts_stream():
+    """
+    Push the user's budget alerts as Server-Sent Events.
+
+    The current alerts are sent on connect and again whenever an expense or
+    limit change alters them; comment lines keep idle connections open.
+
+    Changes published in this process arrive at once. Changes made by other
+    workers, the CLI or imports are not published here, so every heartbeat
+    without a message also compares the user's data version and the month
+    with the last ones seen, one primary-key lookup, and reloads the alerts
+    when either moved.
+    """
+    user_id = current_user.id
+    heartbeat = app.config["ALERT_STREAM_HEARTBEAT"]
+    subscription = alert_broker.subscribe(user_id)
+    state = (user_data_version(user_id), month_key(datetime.now()))
+    alerts = budget_alerts(user_id)
+    # Release the pooled connection; the stream may stay open for hours.
+    db.session.remove()
+
+    def refresh(state):
+        # The stream runs outside the request; its context releases the
+        # connection again when it ends.
+        with app.app_context():
+            latest = (user_data_version(user_id), month_key(datetime.now()))
+            return latest, (budget_alerts(user_id) if latest != state else None)
+
+    def events():
+        nonlocal state
+        sent = None
+        try:
+            yield f"retry: {heartbeat * 1000}\n\n"
+            current = alerts
+            while True:
+                if current != sent:
+                    yield f"event: alerts\ndata: {app.json.dumps(current)}\n\n"
+                    sent = current
+                message = alert_broker.listen(subscription, heartbeat)
+                if message is not None:
+                    current = message
+                    continue
+                state, reloaded = refresh(state)
+                if reloaded is not None:
+                    current = reloaded
+                if current == sent:
+                    yield ": keepalive\n\n"
+        finally:
+            alert_broker.unsubscribe(user_id, subscription)
+
+    return Response(
+        events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # Add this new route to app.py
@@ -609,48 +1112,196 @@ def api_check_budget_limit():
     if not category_id or not amount:
         return jsonify({"error": "Missing category_id or amount"}), 400
 
-    within_limit, limit = check_budget_limit(current_user, category_id, float(amount))
-    return jsonify(
-        {"within_limit": within_limit, "limit": float(limit) if limit else None}
+    try:
+        amount = from_cents(to_cents(amount))
+    except ArithmeticError:
+        return jsonify({"error": "Invalid amount"}), 400
+
+    within_limit, limit = check_budget_limit(current_user, category_id, amount)
+    return jsonify({"within_limit": within_limit, "limit": limit})
+
+
+EXPORT_BATCH_SIZE = 1000
+
+
+def _stream_rows(statement):
+    """
+    Yield the rows of a statement from a server-side cursor in fixed-size batches.
+
+    Each stream gets its own connection because MySQL cannot interleave two
+    unbuffered result sets on one connection.
+    """
+    with db.session.get_bind().connect() as connection:
+        result = connection.execution_options(yield_per=EXPORT_BATCH_SIZE).execute(
+            statement
+        )
+        yield from result
+
+
+def export_rows(user_id):
+    """Yield a user's incomes and expenses as export rows, merged by date."""
+    incomes = (
+        select(
+            Income.date,
+            literal("Income"),
+            Income.amount_cents,
+            Income.source,
+            literal(None, db.Integer),
+        )
+        .where(Income.user_id == user_id)
+        .order_by(Income.date, Income.id)
+    )
+    expenses = (
+        select(
+            Expense.date,
+            literal("Expense"),
+            Expense.amount_cents,
+            Expense.description,
+            Expense.category_id,
+        )
+        .where(Expense.user_id == user_id)
+        .order_by(Expense.date, Expense.id)
     )
+    rows = heapq.merge(
+        _stream_rows(incomes), _stream_rows(expenses), key=lambda row: row[0]
+    )
+    names = categories.names()
+    for day, kind, amount_cents, description, category_id in rows:
+        category = names.get(category_id) or categories.name(category_id) or ""
+        yield day, kind, from_cents(amount_cents), description, category
+
+
+class _EchoBuffer:
+    """File-like object whose write returns the value, for streaming csv.writer."""
+
+    def write(self, value):
+        """Return the written value instead of storing it."""
+        return value
+
+
+def _csv_lines(rows):
+    """Render export rows as CSV text, batching lines into larger chunks."""
+    writer = csv.writer(_EchoBuffer())
+    chunk = [writer.writerow(CSV_FIELDS)]
+    for row in rows:
+        chunk.append(writer.writerow(row))
+        if len(chunk) >= EXPORT_BATCH_SIZE:
+            yield "".join(chunk)
+            chunk = []
+    yield "".join(chunk)
+
+
+def _ndjson_lines(rows):
+    """Render export rows as newline-delimited JSON, one object per row."""
+    keys = [field.lower() for field in CSV_FIELDS]
+    chunk = []
+    for row in rows:
+        record = dict(zip(keys, row))
+        record["date"] = record["date"].isoformat()
+        chunk.append(app.json.dumps(record) + "\n")
+        if len(chunk) >= EXPORT_BATCH_SIZE:
+            yield "".join(chunk)
+            chunk = []
+    yield "".join(chunk)
 
 
 @app.route("/export_data")
 @login_required
+@replica_router.reads
 def export_data():
-    """Export user's financial data as a CSV file."""
-    output = StringIO()
-    writer = csv.writer(output)
-
-    # Write the header row
-    writer.writerow(["Date", "Type", "Amount", "Description", "Category"])
-
-    # Write income data
-    incomes = Income.query.filter_by(user=current_user).order_by(Income.date).all()
-    for income in incomes:
-        writer.writerow([income.date, "Income", income.amount, income.source, ""])
-
-    # Write expense data
-    expenses = Expense.query.filter_by(user=current_user).order_by(Expense.date).all()
-    for expense in expenses:
-        writer.writerow(
-            [
-                expense.date,
-                "Expense",
-                expense.amount,
-                expense.description,
-                expense.category.name,
-            ]
-        )
+    """Stream the user's financial data as a CSV or NDJSON file."""
+    rows = export_rows(current_user.id)
+    if request.args.get("format") == "ndjson":
+        body = _ndjson_lines(rows)
+        mimetype, extension = "application/x-ndjson", "ndjson"
+    else:
+        body = _csv_lines(rows)
+        mimetype, extension = "text/csv", "csv"
+
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers[
+        "Content-Disposition"
+    ] = f"attachment; filename=budget_data.{extension}"
+    return response
+
 
-    # Create the HTTP response with the CSV data
-    output.seek(0)
-    response = make_response(output.getvalue())
-    response.headers["Content-Disposition"] = "attachment; filename=budget_data.csv"
-    response.headers["Content-type"] = "text/csv"
+@app.route("/export_columnar")
+@login_required
+@replica_router.reads
+def export_columnar():
+    """
+    Stream the user's incomes and expenses as an Arrow IPC stream.
 
+    Each record batch holds at most COLUMNAR_BATCH_SIZE rows of one table and
+    month, with category names joined in, and is sent as soon as it is read.
+    The export's throughput is logged when the stream ends.
+    """
+    user_id = current_user.id
+    report = ExportReport()
+
+    def counted(batches):
+        for key, batch in batches:
+            report.rows += batch.num_rows
+            yield key, batch
+
+    def body():
+        started = time.perf_counter()
+        for chunk in arrow_stream(counted(record_batches(user_id))):
+            report.bytes += len(chunk)
+            yield chunk
+        report.elapsed = time.perf_counter() - started
+        app.logger.info("Columnar export for user %s: %s", user_id, report.summary())
+
+    response = Response(
+        stream_with_context(body()), mimetype="application/vnd.apache.arrow.stream"
+    )
+    response.headers["Content-Disposition"] = "attachment; filename=budget_data.arrows"
     return response
 
 
+# The operational endpoints describe the whole process, not the user, so
+# they are only served where STATS_ENDPOINTS_ENABLED is set.
+@app.route("/api/cache_stats")
+def cache_stats():
+    """Report the summary cache's hit and miss counters for this process."""
+    if not app.config["STATS_ENDPOINTS_ENABLED"]:
+        abort(404)
+    return jsonify(cache.stats())
+
+
+@app.route("/api/pool_stats")
+def pool_stats():
+    """Report the database connection pool state and counters for this process."""
+    if not app.config["STATS_ENDPOINTS_ENABLED"]:
+        abort(404)
+    return jsonify(pool_metrics.stats())
+
+
+@app.route("/metrics")
+def metrics():
+    """Expose per-endpoint request and SQL histograms in Prometheus format."""
+    if not request_metrics.enabled:
+        abort(404)
+    return Response(request_metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/import_data", methods=["GET", "POST"])
+@login_required
+def import_data():
+    """Bulk import incomes and expenses from a CSV file in the export format."""
+    form = ImportForm()
+    report = None
+    if form.validate_on_submit():
+        stream = TextIOWrapper(form.file.data.stream, encoding="utf-8-sig")
+        report = import_csv(stream, current_user.id, dry_run=form.dry_run.data)
+        flash(report.summary())
+        if report.imported:
+            user_data_changed(current_user.id)
+            return redirect(url_for("index"))
+    return render_template(
+        "import_data.html", title="Import Data", form=form, report=report
+    )
+
+
 if __name__ == "__main__":
     app.run(debug=True)
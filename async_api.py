@@ -0,0 +1,191 @@
+"""
+Optional ASGI server for the read-only JSON API, backed by an async engine.
+
+The synchronous views hold a worker thread for as long as they wait on the
+database. This module serves the same read endpoints from an event loop
+instead: each request runs the unchanged Flask view inside SQLAlchemy's
+greenlet bridge with ``db.session`` bound to an AsyncSession, so every query
+suspends the request rather than blocking a thread, and thousands of slow
+reads can be in flight in one process.
+
+Because the Flask view runs as usual, the session cookie, Flask-Login's
+remember cookie, the response cache, the category registry and error
+handling all behave exactly as in the WSGI app. Only GET requests for
+READ_ENDPOINTS are served; route everything else to the WSGI app, e.g. by
+sending ``GET /api/summary`` and friends to this server in the reverse proxy:
+
+    uvicorn async_api:asgi_app --workers 4
+
+Views served here must only do database I/O: any other blocking call would
+stall every request on the event loop.
+"""
+
+import io
+import sys
+
+from flask import request
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.exceptions import NotFound
+
+from app import app as flask_app
+from config import engine_options
+from extensions import db, request_metrics
+
+READ_ENDPOINTS = (
+    "api_summary",
+    "api_recent_transactions",
+    "get_report_data",
+    "chart_data",
+    "spending_patterns",
+    "check_budget_alerts",
+)
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(database_url):
+    """
+    Return the async driver's URL for a synchronous database URL.
+
+    :raises ValueError: If there is no async driver for the database.
+    """
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver for {backend!r} databases")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+def wsgi_environ(scope, body):
+    """Build the WSGI environ of an ASGI HTTP request."""
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin-1"),
+        "PATH_INFO": scope["path"].encode().decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": False,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+    for name, value in scope["headers"]:
+        name, value = name.decode("latin-1"), value.decode("latin-1")
+        if name in ("content-type", "content-length"):
+            key = name.upper().replace("-", "_")
+        else:
+            key = f"HTTP_{name.upper().replace('-', '_')}"
+        if key in environ:
+            separator = "; " if key == "HTTP_COOKIE" else ","
+            value = f"{environ[key]}{separator}{value}"
+        environ[key] = value
+    return environ
+
+
+class AsyncAPI:
+    """
+    ASGI application serving a Flask app's read endpoints on an async engine.
+
+    The engine URL is ``ASYNC_DATABASE_URL``, or SQLALCHEMY_DATABASE_URI
+    with its driver swapped for an async one (aiomysql for MySQL). Pool
+    settings come from the same DB_POOL_* variables as the WSGI app's.
+
+    :param app: The Flask application whose views are served.
+    :param database_url: Overrides the configured async database URL.
+    """
+
+    def __init__(self, app, database_url=None):
+        self.app = app
+        sync_url = app.config["SQLALCHEMY_DATABASE_URI"]
+        url = (
+            database_url
+            or app.config.get("ASYNC_DATABASE_URL")
+            or async_database_url(sync_url)
+        )
+        options = engine_options(str(url))
+        # Async engines need an asyncio-aware pool.
+        options.pop("poolclass", None)
+        self.engine = create_async_engine(url, **options)
+        self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+        if request_metrics.enabled:
+            request_metrics.listen(self.engine.sync_engine)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise ValueError(f"Unsupported ASGI scope {scope['type']!r}")
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        async with self.sessionmaker() as session:
+            response = await session.run_sync(
+                self._dispatch, wsgi_environ(scope, body)
+            )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": [
+                    (name.lower().encode("latin-1"), value.encode("latin-1"))
+                    for name, value in response.headers.to_wsgi_list()
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": response.get_data()})
+
+    def _dispatch(self, session, environ):
+        """
+        Run a request through the Flask app with db.session bound to ``session``.
+
+        This runs in SQLAlchemy's greenlet, so database calls made by the
+        view, the user loader or the category registry wait asynchronously.
+        """
+        # A fresh app context gives the request a db.session scope of its own.
+        with self.app.app_context():
+            db.session.registry.set(session)
+            ctx = self.app.request_context(environ)
+            error = None
+            try:
+                ctx.push()
+                rule = request.url_rule
+                if rule is not None and rule.endpoint not in READ_ENDPOINTS:
+                    request.routing_exception = NotFound()
+                try:
+                    return self.app.full_dispatch_request()
+                except Exception as e:  # pylint: disable=broad-except
+                    error = e
+                    return self.app.handle_exception(e)
+            finally:
+                ctx.pop(error)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+asgi_app = AsyncAPI(flask_app)
@@ -0,0 +1,6 @@
+"""Benchmark scripts for the Budget Tracker application.
+
+Run each module from the project root, e.g. ``python -m benchmarks.index_benchmark``.
+The scripts create and drop their own data, so point ``DATABASE_URL`` at a
+scratch database before running them.
+"""
@@ -0,0 +1,191 @@
+"""
+Benchmark the NumPy spending analytics against an equivalent pure-Python loop.
+
+Generates an expense history in memory, two years long, across a dozen
+categories with a few injected outliers. Runs analytics.analyse over it and
+runs a straightforward loop implementation of the same figures. Checks that
+both produce identical results and prints the median time of each, with
+building the arrays counted against the NumPy version.
+
+Usage:
+    python -m benchmarks.analytics_benchmark --rows 100000
+"""
+
+import argparse
+import calendar
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from analytics import (
+    ANOMALY_DAYS,
+    ANOMALY_Z_SCORE,
+    HISTORY_MONTHS,
+    MAX_ANOMALIES,
+    MIN_ANOMALY_SAMPLES,
+    ROLLING_MONTHS,
+    ExpenseHistory,
+    analyse,
+    history_start,
+)
+from models.budget import month_key
+
+
+def generate(rows, today, categories=12, seed=42):
+    """Return (id, day, category_id, cents) tuples spread over the history."""
+    rng = random.Random(seed)
+    start = history_start(today)
+    span = (today - start).days
+    expenses = []
+    for expense_id in range(1, rows + 1):
+        category_id = rng.randrange(1, categories + 1)
+        cents = rng.randrange(100, 1000 * category_id * 100)
+        if rng.random() < 0.001:
+            cents *= 20
+        day = start + timedelta(days=rng.randrange(span + 1))
+        expenses.append((expense_id, day, category_id, cents))
+    return expenses
+
+
+def loop_analyse(expenses, limits, today):
+    """Compute the figures of analytics.analyse with plain Python loops."""
+    start = history_start(today)
+    first = start.year * 12 + start.month - 1
+    current = HISTORY_MONTHS - 1
+
+    monthly = {}
+    for _, day, category_id, cents in expenses:
+        totals = monthly.setdefault(category_id, [0] * HISTORY_MONTHS)
+        totals[day.year * 12 + day.month - 1 - first] += cents
+    first_active = min(
+        (day.year * 12 + day.month - 1 - first for _, day, _, _ in expenses),
+        default=current,
+    )
+    complete = range(first_active, current)
+
+    result_categories = {}
+    for category_id in sorted(monthly):
+        totals = monthly[category_id]
+        rolling = []
+        for month in range(HISTORY_MONTHS):
+            if month < ROLLING_MONTHS - 1:
+                rolling.append(None)
+            else:
+                window = totals[max(0, month - ROLLING_MONTHS + 1) : month + 1]
+                rolling.append(round(sum(window) / ROLLING_MONTHS))
+
+        per_calendar = [0.0] * 12
+        observed = [0] * 12
+        for month in complete:
+            per_calendar[(first + month) % 12] += totals[month]
+            observed[(first + month) % 12] += 1
+        overall = sum(per_calendar) / len(complete) if complete else 0.0
+        seasonality = [
+            round(total / count / overall, 3) if count and overall else None
+            for total, count in zip(per_calendar, observed)
+        ]
+
+        result_categories[category_id] = {
+            "monthly": totals,
+            "rolling_mean": rolling,
+            "seasonality": seasonality,
+        }
+
+    window = min(ROLLING_MONTHS, current - first_active)
+    remaining = {}
+    for _, day, category_id, cents in expenses:
+        month = day.year * 12 + day.month - 1 - first
+        if current - window <= month < current and day.day > today.day:
+            remaining[category_id] = remaining.get(category_id, 0) + cents
+    days_in_month = calendar.monthrange(today.year, today.month)[1]
+    projections = []
+    for category_id, limit_cents in limits:
+        spent = monthly.get(category_id, [0] * HISTORY_MONTHS)[current]
+        if category_id not in monthly:
+            rest = 0
+        elif window:
+            rest = remaining.get(category_id, 0) / window
+        else:
+            rest = spent / today.day * (days_in_month - today.day)
+        projections.append((category_id, limit_cents, spent, spent + round(rest)))
+
+    by_category = {}
+    for _, _, category_id, cents in expenses:
+        by_category.setdefault(category_id, []).append(cents)
+    stats = {}
+    for category_id, amounts in by_category.items():
+        mean = sum(amounts) / len(amounts)
+        squares = 0.0
+        for cents in amounts:
+            squares += (cents - mean) ** 2
+        stats[category_id] = (len(amounts), mean, squares)
+    recent = today - timedelta(days=ANOMALY_DAYS)
+    anomalies = []
+    for expense_id, day, category_id, cents in expenses:
+        count, mean, squares = stats[category_id]
+        if count < MIN_ANOMALY_SAMPLES or day < recent:
+            continue
+        # Score against the category's other expenses only.
+        others_mean = (mean * count - cents) / (count - 1)
+        others_squares = squares - (cents - mean) ** 2 * count / (count - 1)
+        others_std = max((max(others_squares, 0) / (count - 1)) ** 0.5, 1)
+        z_score = (cents - others_mean) / others_std
+        if abs(z_score) >= ANOMALY_Z_SCORE:
+            anomalies.append((expense_id, day, category_id, cents, z_score))
+    anomalies.sort(key=lambda anomaly: -abs(anomaly[4]))
+
+    return {
+        "months": [
+            month_key(date((first + month) // 12, (first + month) % 12 + 1, 1))
+            for month in range(HISTORY_MONTHS)
+        ],
+        "categories": result_categories,
+        "projections": projections,
+        "anomalies": [
+            (*anomaly[:4], round(anomaly[4], 2))
+            for anomaly in anomalies[:MAX_ANOMALIES]
+        ],
+    }
+
+
+def median_ms(function, repeat):
+    """Return the median wall time of calling function, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    """Time both implementations and check that they agree."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    today = date.today()
+    expenses = generate(args.rows, today)
+    limits = [(category_id, 500000) for category_id in range(1, 13, 2)]
+
+    def vectorised():
+        return analyse(ExpenseHistory.from_rows(expenses), limits, today)
+
+    def loop():
+        return loop_analyse(expenses, limits, today)
+
+    if vectorised() != loop():
+        raise SystemExit("The NumPy and loop implementations disagree.")
+
+    numpy_ms = median_ms(vectorised, args.repeat)
+    loop_ms = median_ms(loop, args.repeat)
+    print(f"{args.rows} expenses, median of {args.repeat} runs")
+    print(f"{'NumPy (incl. array build)':28} {numpy_ms:9.1f} ms")
+    print(f"{'pure-Python loop':28} {loop_ms:9.1f} ms")
+    print(f"{'speed-up':28} {loop_ms / numpy_ms:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
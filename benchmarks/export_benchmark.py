@@ -0,0 +1,95 @@
+"""
+Compare the CSV, NDJSON and Arrow exports and time the Parquet dataset export.
+
+Seeds synthetic users, streams one user's export in each format through the
+Flask test client, then writes every user's data as a Parquet dataset
+partitioned by user and month. Prints rows per second, output size and the
+peak Python memory of each, plus the peak of Arrow's own memory pool, to show
+that memory stays bounded by the batch size rather than the export.
+
+Usage:
+    DATABASE_URL=sqlite:////tmp/export_bench.db \\
+        python -m benchmarks.export_benchmark --users 20 --rows-per-user 50000
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import pyarrow as pa
+
+from app import app, db
+from columnar import export_dataset
+from models.budget import Expense, Income
+from synthetic import SYNTHETIC_PASSWORD, seed_synthetic
+
+
+def measure(function):
+    """Return (result, seconds, peak traced MiB) of one call."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    """Seed data, then time each export format."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--rows-per-user", type=int, default=50000)
+    args = parser.parse_args()
+
+    app.config.update(WTF_CSRF_ENABLED=False)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed_synthetic(args.users, args.rows_per_user)
+        total_rows = Income.query.count() + Expense.query.count()
+        user_rows = total_rows // args.users
+
+        client = app.test_client()
+        client.post(
+            "/login", data={"username": "synthetic0", "password": SYNTHETIC_PASSWORD}
+        )
+
+        def download(url):
+            response = client.get(url)
+            size = sum(len(chunk) for chunk in response.response)
+            response.close()
+            return size
+
+        print(f"\n{'export':28} {'rows/s':>10} {'MB':>8} {'peak MiB':>9}")
+        cases = {
+            "CSV (one user)": "/export_data",
+            "NDJSON (one user)": "/export_data?format=ndjson",
+            "Arrow stream (one user)": "/export_columnar",
+        }
+        for name, url in cases.items():
+            size, elapsed, peak = measure(lambda url=url: download(url))
+            print(
+                f"{name:28} {user_rows / elapsed:10,.0f} {size / 1e6:8.1f} "
+                f"{peak:9.1f}"
+            )
+
+        directory = tempfile.mkdtemp(prefix="export_bench_")
+        try:
+            report, elapsed, peak = measure(lambda: export_dataset(directory))
+            print(
+                f"{'Parquet dataset (all users)':28} {report.rows / elapsed:10,.0f} "
+                f"{report.bytes / 1e6:8.1f} {peak:9.1f}"
+            )
+            print(report.summary())
+        finally:
+            shutil.rmtree(directory)
+        pool_peak = pa.default_memory_pool().max_memory() / 1024 / 1024
+        print(f"Arrow memory pool peak: {pool_peak:.1f} MiB")
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
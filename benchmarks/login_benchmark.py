@@ -0,0 +1,150 @@
+"""
+Login throughput under concurrency, with hashing inline and in the pool.
+
+Starts the app in a threaded server within this process and creates one user
+per client. Each client thread then logs in repeatedly while a probe thread
+keeps requesting the login page, which needs no hashing. Both runs use
+PASSWORD_HASH_WORKERS=0 (hashing in the request threads) and the configured
+pool size. Reports login throughput, login latency and the probe's latency,
+which shows how much the hashing slows requests that do not hash.
+
+Usage:
+    DATABASE_URL=sqlite:////tmp/login_bench.db python -m benchmarks.login_benchmark \\
+        --clients 16 --logins 10
+"""
+
+import argparse
+import logging
+import statistics
+import threading
+import time
+from http.client import HTTPConnection
+from urllib.parse import urlencode
+
+from werkzeug.serving import make_server
+
+from app import app, db
+from extensions import password_hasher
+from models.budget import User
+
+
+def setup_users(clients):
+    """Create one user per client, all with the same password."""
+    db.drop_all()
+    db.create_all()
+    password_hash = password_hasher.hash("password123")
+    db.session.add_all(
+        User(
+            username=f"login_bench_{client}",
+            email=f"login_bench_{client}@example.com",
+            password_hash=password_hash,
+        )
+        for client in range(clients)
+    )
+    db.session.commit()
+
+
+def timed_request(port, method, path, body=None):
+    """Send one request and return its latency in milliseconds."""
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    started = time.perf_counter()
+    connection = HTTPConnection("127.0.0.1", port)
+    connection.request(method, path, body, headers)
+    response = connection.getresponse()
+    response.read()
+    connection.close()
+    if response.status not in (200, 302):
+        raise RuntimeError(f"{method} {path} returned {response.status}")
+    return (time.perf_counter() - started) * 1000
+
+
+def run(port, clients, logins):
+    """Run the concurrent logins and the probe; return the measurements."""
+    login_times = []
+    probe_times = []
+    done = threading.Event()
+
+    def client(number):
+        body = urlencode(
+            {"username": f"login_bench_{number}", "password": "password123"}
+        )
+        for _ in range(logins):
+            login_times.append(timed_request(port, "POST", "/login", body))
+
+    def probe():
+        while not done.is_set():
+            probe_times.append(timed_request(port, "GET", "/login"))
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    probe_thread = threading.Thread(target=probe)
+    started = time.perf_counter()
+    probe_thread.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    probe_thread.join()
+    return len(login_times) / elapsed, login_times, probe_times
+
+
+def percentile(values, fraction):
+    """Return the value below which the given fraction of values fall."""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    """Compare login throughput and probe latency with and without the pool."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=10)
+    args = parser.parse_args()
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    pool_workers = app.config["PASSWORD_HASH_WORKERS"] or 1
+    app.config.update(
+        WTF_CSRF_ENABLED=False,
+        LOGIN_RATE_LIMIT=0,
+        PASSWORD_HASH_QUEUE=max(args.clients, app.config["PASSWORD_HASH_QUEUE"]),
+    )
+    with app.app_context():
+        setup_users(args.clients)
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        print(
+            f"{args.clients} clients x {args.logins} logins, "
+            f"{app.config['PASSWORD_HASH_METHOD']}"
+        )
+        print(
+            f"{'hashing':18} {'logins/s':>9} {'login p50':>10} {'login p95':>10} "
+            f"{'probe p50':>10} {'probe p95':>10}"
+        )
+        modes = [("inline", 0), (f"pool of {pool_workers}", pool_workers)]
+        for label, workers in modes:
+            app.config["PASSWORD_HASH_WORKERS"] = workers
+            password_hasher.init_app(app)
+            # Warm the pool up so process start-up is not counted.
+            password_hasher.hash("warm-up")
+            throughput, login_times, probe_times = run(
+                server.server_port, args.clients, args.logins
+            )
+            print(
+                f"{label:18} {throughput:9.1f} "
+                f"{statistics.median(login_times):8.0f}ms "
+                f"{percentile(login_times, 0.95):8.0f}ms "
+                f"{statistics.median(probe_times):8.1f}ms "
+                f"{percentile(probe_times, 0.95):8.1f}ms"
+            )
+
+        password_hasher.shutdown()
+        server.shutdown()
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Time materialising one month of recurring rules for many users.
+
+Creates the users with a monthly salary, a monthly rent and a weekly grocery
+rule each, then runs the materialiser through the end of the month and once
+more to show that a rerun enters nothing. Reports rows entered per second and
+the time per batch, which stays flat however many users there are.
+
+Usage:
+    DATABASE_URL=sqlite:////tmp/recurring_bench.db \\
+        python -m benchmarks.recurring_benchmark --users 100000
+"""
+
+import argparse
+import time
+from datetime import date
+
+from app import app, db
+from models.budget import Category, DailyBalance, RecurringRule, User
+from recurring import DEFAULT_BATCH_SIZE, materialize_recurring
+
+MONTH = date(2024, 3, 1)
+RULES = (
+    ("Income", 250000, "Salary", None, "FREQ=MONTHLY;BYMONTHDAY=-1"),
+    ("Expense", 80000, "Rent", "Rent", "FREQ=MONTHLY;BYMONTHDAY=1"),
+    ("Expense", 6000, "Groceries", "Food", "FREQ=WEEKLY;BYDAY=SA"),
+)
+
+
+def setup_data(users, batch_size=10000):
+    """Create the users and their recurring rules with bulk inserts."""
+    db.drop_all()
+    db.create_all()
+    category_ids = {}
+    for name in ("Rent", "Food"):
+        category = Category(name=name)
+        db.session.add(category)
+        db.session.flush()
+        category_ids[name] = category.id
+    for first in range(1, users + 1, batch_size):
+        ids = range(first, min(first + batch_size, users + 1))
+        db.session.execute(
+            db.insert(User),
+            [
+                {
+                    "id": user_id,
+                    "username": f"recurring_{user_id}",
+                    "email": f"recurring_{user_id}@example.com",
+                    "password_hash": "unused",
+                }
+                for user_id in ids
+            ],
+        )
+        db.session.execute(
+            db.insert(RecurringRule),
+            [
+                {
+                    "user_id": user_id,
+                    "type": kind,
+                    "amount_cents": cents,
+                    "description": description,
+                    "category_id": category_ids.get(category),
+                    "rrule": rrule,
+                    "dtstart": MONTH,
+                    "next_date": MONTH,
+                }
+                for user_id in ids
+                for kind, cents, description, category, rrule in RULES
+            ],
+        )
+    db.session.commit()
+
+
+def main():
+    """Materialise a month for every user, twice, and report the timings."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument(
+        "--check", action="store_true", help="Verify the daily balances after."
+    )
+    args = parser.parse_args()
+
+    with app.app_context():
+        started = time.perf_counter()
+        setup_data(args.users)
+        print(f"Created {args.users} users in {time.perf_counter() - started:.1f}s")
+
+        through = date(2024, 3, 31)
+        report = materialize_recurring(through, batch_size=args.batch_size)
+        rows = report.incomes + report.expenses
+        batches = -(-report.rules // args.batch_size)
+        print(report.summary())
+        print(
+            f"{rows / report.elapsed:,.0f} rows/s, "
+            f"{report.elapsed / batches * 1000:.0f} ms per batch of "
+            f"{args.batch_size} rules"
+        )
+
+        rerun = materialize_recurring(through, batch_size=args.batch_size)
+        print(f"Rerun: {rerun.summary()}")
+        if args.check:
+            print(f"Inconsistent balance days: {len(DailyBalance.check())}")
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
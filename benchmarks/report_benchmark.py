@@ -0,0 +1,172 @@
+"""
+Benchmark the report endpoints over a one-year range.
+
+Seeds one user with many expenses spread over the last year, then compares
+the previous implementation of /api/report_data and /api/chart-data, which
+loaded every row through the ORM and summed in Python, against the current
+routes that aggregate in SQL. Prints the median latency and peak Python
+memory of each.
+
+Usage:
+    DATABASE_URL=sqlite:////tmp/report_bench.db \\
+        python -m benchmarks.report_benchmark --rows 100000
+"""
+
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+
+from app import app, cache, db
+from models.budget import Category, Expense, Income, User
+
+
+def seed(rows, batch_size=10000):
+    """Insert one user with a year of expenses and monthly incomes."""
+    user = User(username="report_bench", email="report_bench@example.com")
+    user.set_password("password123")
+    db.session.add(user)
+    db.session.execute(
+        insert(Category), [{"name": f"Bench category {i}"} for i in range(12)]
+    )
+    db.session.commit()
+
+    category_ids = [c.id for c in Category.query.filter(Category.name.like("Bench%"))]
+    today = date.today()
+    rng = random.Random(42)
+    for start in range(0, rows, batch_size):
+        db.session.execute(
+            insert(Expense),
+            [
+                {
+                    "amount_cents": rng.randrange(100, 50000),
+                    "description": "Benchmark expense",
+                    "date": today - timedelta(days=rng.randrange(365)),
+                    "user_id": user.id,
+                    "category_id": rng.choice(category_ids),
+                }
+                for _ in range(min(batch_size, rows - start))
+            ],
+        )
+        db.session.commit()
+    db.session.execute(
+        insert(Income),
+        [
+            {
+                "amount_cents": 25000000,
+                "source": "Benchmark income",
+                "date": today - timedelta(days=30 * month),
+                "user_id": user.id,
+            }
+            for month in range(12)
+        ],
+    )
+    db.session.commit()
+    return user
+
+
+def legacy_report(user, start_date, end_date):
+    """The report as previously built: every row loaded, summed in Python."""
+    incomes = Income.query.filter(
+        Income.user_id == user.id, Income.date.between(start_date, end_date)
+    ).all()
+    expenses = Expense.query.filter(
+        Expense.user_id == user.id, Expense.date.between(start_date, end_date)
+    ).all()
+    expense_categories = {}
+    for expense in expenses:
+        name = expense.category.name
+        expense_categories[name] = expense_categories.get(name, 0) + expense.amount
+    transactions = [
+        {
+            "date": t.date.strftime("%Y-%m-%d"),
+            "type": "Income" if isinstance(t, Income) else "Expense",
+            "amount": t.amount,
+        }
+        for t in sorted(incomes + expenses, key=lambda t: t.date, reverse=True)
+    ]
+    return {
+        "total_income": sum(i.amount for i in incomes),
+        "total_expenses": sum(e.amount for e in expenses),
+        "expense_categories": expense_categories,
+        "transactions": transactions,
+    }
+
+
+def legacy_chart(user, start_date, end_date):
+    """The chart data as previously built from every expense row."""
+    totals = {}
+    for expense in Expense.query.filter(
+        Expense.user_id == user.id, Expense.date.between(start_date, end_date)
+    ):
+        name = expense.category.name
+        totals[name] = totals.get(name, 0) + expense.amount
+    return totals
+
+
+def measure(function, repeat):
+    """Return the median wall time in ms and peak traced memory in MiB."""
+    timings = []
+    peak = 0
+    for _ in range(repeat):
+        db.session.expunge_all()
+        tracemalloc.start()
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return statistics.median(timings), peak / 1024 / 1024
+
+
+def main():
+    """Seed data, then time the legacy and SQL-aggregated report paths."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app.config.update(WTF_CSRF_ENABLED=False, CACHE_BACKEND="null")
+    cache.init_app(app)
+    today = date.today()
+    start_date = today - timedelta(days=365)
+    params = f"start_date={start_date.isoformat()}&end_date={today.isoformat()}"
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        print(f"Seeding {args.rows} expense rows...")
+        user = seed(args.rows)
+
+        client = app.test_client()
+        client.post(
+            "/login", data={"username": user.username, "password": "password123"}
+        )
+
+        def get(url):
+            response = client.get(url)
+            assert response.status_code == 200, response.status_code
+            return response.get_data()
+
+        cases = {
+            "report_data (legacy)": lambda: legacy_report(user, start_date, today),
+            "report_data": lambda: get(f"/api/report_data?{params}"),
+            "report_data + page": lambda: get(
+                f"/api/report_data?{params}&transactions=1"
+            ),
+            "chart_data (legacy)": lambda: legacy_chart(user, start_date, today),
+            "chart_data": lambda: get(f"/api/chart-data?{params}"),
+        }
+        print(f"\n{'case':24} {'median ms':>10} {'peak MiB':>10}")
+        for name, function in cases.items():
+            latency, peak = measure(function, args.repeat)
+            print(f"{name:24} {latency:10.2f} {peak:10.2f}")
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
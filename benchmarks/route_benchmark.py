@@ -0,0 +1,330 @@
+"""
+Benchmark every page and API route against a JSON baseline.
+
+Seeds synthetic users with manage.py's generator, logs in as one of them and
+drives each route through the Flask test client. Records the p50/p95/p99
+latency and the SQL statement count of every route. With --update-baseline
+the results are written to the baseline file; otherwise they are compared
+with it and the run exits with status 1 if any route's p95 latency grew by
+more than the threshold or it issues more SQL statements than before.
+
+Usage:
+    DATABASE_URL=sqlite:////tmp/route_bench.db \\
+        python -m benchmarks.route_benchmark --update-baseline
+    DATABASE_URL=sqlite:////tmp/route_bench.db python -m benchmarks.route_benchmark
+"""
+
+import argparse
+import io
+import json
+import math
+import sys
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import event, func
+
+from app import app, cache, db
+from importer import CSV_FIELDS
+from models.budget import BudgetLimit, Category, Expense, Income, User
+from synthetic import SYNTHETIC_PASSWORD, seed_synthetic
+
+DEFAULT_BASELINE = "benchmarks/route_baseline.json"
+
+
+def percentile(values, percent):
+    """Return the nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def setup_data(users, rows_per_user):
+    """Seed synthetic data; return the benchmarked username and record ids."""
+    db.drop_all()
+    db.create_all()
+    seed_synthetic(users, rows_per_user)
+    user = User.query.filter_by(username="synthetic0").one()
+    food = Category.query.filter_by(name="Food").one()
+    rent = Category.query.filter_by(name="Rent").one()
+    db.session.add(BudgetLimit(user_id=user.id, category_id=rent.id, amount=1))
+    db.session.commit()
+    expense_id = (
+        db.session.query(func.max(Expense.id)).filter_by(user_id=user.id).scalar()
+    )
+    income_id = (
+        db.session.query(func.max(Income.id)).filter_by(user_id=user.id).scalar()
+    )
+    return user.username, food.id, rent.id, expense_id, income_id
+
+
+def newest(model):
+    """Return the highest id of a model's table."""
+    with app.app_context():
+        return db.session.query(func.max(model.id)).scalar()
+
+
+def scenarios(username, food_id, rent_id, expense_id, income_id):
+    """
+    Return (name, request, cleanup) triples covering every route.
+
+    ``request`` takes the test client and returns a response; the optional
+    ``cleanup`` undoes a write outside the timed section.
+    """
+    today = date.today().isoformat()
+    year_ago = (date.today() - timedelta(days=365)).isoformat()
+    expense = {
+        "amount": "12.50",
+        "description": "Benchmark",
+        "category": food_id,
+        "date": today,
+    }
+
+    def get(url):
+        return lambda client: client.get(url)
+
+    def post(url, **kwargs):
+        return lambda client: client.post(url, **kwargs)
+
+    def delete_newest_expense(client):
+        client.post(f"/delete_expense/{newest(Expense)}")
+
+    def delete_newest_income(client):
+        client.post(f"/delete_income/{newest(Income)}")
+
+    def add_then_delete_expense(client):
+        client.post("/add_expense", data=expense)
+        return client.post(f"/delete_expense/{newest(Expense)}")
+
+    etags = []
+
+    def dashboard_not_modified(client):
+        # Warmup runs fetch the ETag; nothing is written after this scenario.
+        if not etags:
+            etags.append(client.get("/api/dashboard").headers["ETag"])
+        return client.get("/api/dashboard", headers={"If-None-Match": etags[0]})
+
+    def import_dry_run(client):
+        header = ",".join(CSV_FIELDS).encode() + b"\r\n"
+        return client.post(
+            "/import_data",
+            data={"file": (io.BytesIO(header), "empty.csv"), "dry_run": "y"},
+            content_type="multipart/form-data",
+        )
+
+    return [
+        ("index", get("/"), None),
+        ("login GET", get("/login"), None),
+        (
+            "login POST",
+            post(
+                "/login",
+                data={"username": username, "password": SYNTHETIC_PASSWORD},
+            ),
+            None,
+        ),
+        ("reports", get("/reports"), None),
+        ("add_income GET", get("/add_income"), None),
+        (
+            "add_income POST",
+            post("/add_income", data={"amount": "100", "source": "B", "date": today}),
+            delete_newest_income,
+        ),
+        ("add_expense GET", get("/add_expense"), None),
+        ("add_expense POST", post("/add_expense", data=expense), delete_newest_expense),
+        ("edit_income GET", get(f"/edit_income/{income_id}"), None),
+        ("edit_expense GET", get(f"/edit_expense/{expense_id}"), None),
+        ("delete_expense POST", add_then_delete_expense, None),
+        ("set_budget_limit GET", get("/set_budget_limit"), None),
+        (
+            "set_budget_limit POST",
+            post("/set_budget_limit", data={"category": rent_id, "amount": "1"}),
+            None,
+        ),
+        ("api_summary", get("/api/summary"), None),
+        ("api_recent_transactions", get("/api/recent_transactions"), None),
+        ("api_dashboard", get("/api/dashboard"), None),
+        ("api_dashboard not modified", dashboard_not_modified, None),
+        ("api_transactions", get("/api/transactions"), None),
+        ("api_transactions expenses", get("/api/transactions?type=Expense"), None),
+        ("api_report_data", get("/api/report_data"), None),
+        (
+            "api_report_data transactions",
+            get("/api/report_data?transactions=1"),
+            None,
+        ),
+        ("api_chart_data", get("/api/chart-data"), None),
+        (
+            "api_daily_balance year",
+            get(f"/api/daily_balance?start_date={year_ago}&end_date={today}"),
+            None,
+        ),
+        ("api_spending_patterns", get("/api/spending_patterns"), None),
+        (
+            "api_spending_patterns week",
+            get("/api/spending_patterns?interval=week"),
+            None,
+        ),
+        ("api_check_budget_alerts", get("/api/check_budget_alerts"), None),
+        (
+            "api_check_budget_limit",
+            post(
+                "/api/check_budget_limit",
+                json={"category_id": food_id, "amount": "10"},
+            ),
+            None,
+        ),
+        ("export_data csv", get("/export_data"), None),
+        ("export_data ndjson", get("/export_data?format=ndjson"), None),
+        ("import_data GET", get("/import_data"), None),
+        ("import_data dry run", import_dry_run, None),
+    ]
+
+
+def measure(client, engine, request, cleanup, repeat, warmup):
+    """
+    Return latencies in ms and the largest SQL statement count of a route.
+
+    The first ``warmup`` calls are not timed, so template compilation and
+    cold caches do not skew the percentiles.
+    """
+    latencies = []
+    statements = [0]
+
+    def count(*args):
+        statements[0] += 1
+
+    worst = 0
+    for _ in range(warmup):
+        request(client)
+        if cleanup is not None:
+            cleanup(client)
+    for _ in range(repeat):
+        statements[0] = 0
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            started = time.perf_counter()
+            response = request(client)
+            response.get_data()
+            latencies.append((time.perf_counter() - started) * 1000)
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        if response.status_code >= 400:
+            raise RuntimeError(f"status {response.status_code}")
+        worst = max(worst, statements[0])
+        if cleanup is not None:
+            cleanup(client)
+    return latencies, worst
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Print current results against the baseline; return the regressions."""
+    regressions = []
+    print(f"\n{'route':32} {'p95 base':>9} {'p95 now':>9} {'ratio':>6} {'queries':>9}")
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:32} {'-':>9} {current['p95_ms']:9.2f} {'new':>6}")
+            continue
+        ratio = current["p95_ms"] / base["p95_ms"] if base["p95_ms"] else 1.0
+        slower = (
+            ratio > 1 + threshold
+            and current["p95_ms"] - base["p95_ms"] > min_delta_ms
+        )
+        more_queries = current["queries"] > base["queries"]
+        flag = " <-- regression" if slower or more_queries else ""
+        print(
+            f"{name:32} {base['p95_ms']:9.2f} {current['p95_ms']:9.2f} "
+            f"{ratio:6.2f} {base['queries']:>4}->{current['queries']:<4}{flag}"
+        )
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    """Seed data, time every route and record or check the baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--rows-per-user", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed relative growth of p95 latency (default 0.25).",
+    )
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=2.0,
+        help="Ignore p95 growth smaller than this, to absorb timer noise.",
+    )
+    args = parser.parse_args()
+
+    app.config.update(WTF_CSRF_ENABLED=False, CACHE_BACKEND="null")
+    cache.init_app(app)
+    with app.app_context():
+        print(f"Seeding {args.users} users x {args.rows_per_user} expenses...")
+        username, *fixtures = setup_data(args.users, args.rows_per_user)
+        engine = db.engine
+
+    # Requests run without an outer app context, so each gets a fresh session
+    # and loads the logged-in user as it would in production.
+    client = app.test_client()
+    client.post("/login", data={"username": username, "password": SYNTHETIC_PASSWORD})
+    results = {}
+    for name, request, cleanup in scenarios(username, *fixtures):
+        latencies, queries = measure(
+            client, engine, request, cleanup, args.repeat, args.warmup
+        )
+        results[name] = {
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+            "queries": queries,
+        }
+        print(
+            f"{name:32} p50 {results[name]['p50_ms']:8.2f}  "
+            f"p95 {results[name]['p95_ms']:8.2f}  "
+            f"p99 {results[name]['p99_ms']:8.2f} ms  "
+            f"{queries} queries"
+        )
+
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        db.drop_all()
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(
+                {
+                    "database": dialect,
+                    "users": args.users,
+                    "rows_per_user": args.rows_per_user,
+                    "repeat": args.repeat,
+                    "warmup": args.warmup,
+                    "routes": results,
+                },
+                baseline_file,
+                indent=2,
+                sort_keys=True,
+            )
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = compare(
+        results, baseline["routes"], args.threshold, args.min_delta_ms
+    )
+    if regressions:
+        print(f"\n{len(regressions)} route(s) regressed: {', '.join(regressions)}")
+        sys.exit(1)
+    print("\nNo regressions.")
+
+
+if __name__ == "__main__":
+    main()
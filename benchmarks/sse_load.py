@@ -0,0 +1,154 @@
+"""
+Load test for the budget alert Server-Sent Events stream.
+
+Starts the app in a threaded server within this process, opens many idle
+alert streams for one user, then lowers a budget limit below the month's
+spending and measures how long the push takes to reach every stream. Reports the
+number of connections held, threads and peak memory of the single worker.
+
+Usage:
+    DATABASE_URL=sqlite:////tmp/sse_bench.db python -m benchmarks.sse_load \\
+        --connections 1000
+"""
+
+import argparse
+import logging
+import resource
+import socket
+import threading
+import time
+from datetime import date
+from http.client import HTTPConnection
+from urllib.parse import urlencode
+
+from werkzeug.serving import make_server
+
+from app import app, db
+from models.budget import BudgetLimit, Category, Expense, MonthlyCategorySpend, User
+
+
+def setup_data():
+    """Create a user who has spent 50 this month against a limit of 100."""
+    db.drop_all()
+    db.create_all()
+    user = User(username="sse_bench", email="sse_bench@example.com")
+    user.set_password("password123")
+    category = Category(name="Bench")
+    db.session.add_all([user, category])
+    db.session.commit()
+    db.session.add(BudgetLimit(user_id=user.id, category_id=category.id, amount=100))
+    db.session.add(
+        Expense(
+            amount=50,
+            description="Bench expense",
+            date=date.today(),
+            user_id=user.id,
+            category_id=category.id,
+        )
+    )
+    MonthlyCategorySpend.record(user.id, category.id, date.today(), 5000)
+    db.session.commit()
+    return category.id
+
+
+def login(port):
+    """Log in over HTTP and return the session cookie."""
+    connection = HTTPConnection("127.0.0.1", port)
+    connection.request(
+        "POST",
+        "/login",
+        urlencode({"username": "sse_bench", "password": "password123"}),
+        {"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    response = connection.getresponse()
+    response.read()
+    return response.getheader("Set-Cookie").split(";")[0]
+
+
+def open_stream(port, cookie):
+    """Open an alert stream and wait for its initial event."""
+    sock = socket.create_connection(("127.0.0.1", port))
+    sock.sendall(
+        (
+            "GET /api/budget_alerts/stream HTTP/1.1\r\n"
+            f"Host: 127.0.0.1\r\nCookie: {cookie}\r\n\r\n"
+        ).encode()
+    )
+    read_until(sock, b"event: alerts")
+    return sock
+
+
+def read_until(sock, marker, timeout=30):
+    """Read from a socket until the marker has been received."""
+    sock.settimeout(timeout)
+    received = b""
+    while marker not in received:
+        chunk = sock.recv(4096)
+        if not chunk:
+            raise ConnectionError("stream closed")
+        received += chunk
+    return received
+
+
+def lower_limit(port, cookie, category_id):
+    """Lower the budget limit below this month's spending."""
+    connection = HTTPConnection("127.0.0.1", port)
+    connection.request(
+        "POST",
+        "/set_budget_limit",
+        urlencode({"category": category_id, "amount": "10"}),
+        {"Content-Type": "application/x-www-form-urlencoded", "Cookie": cookie},
+    )
+    connection.getresponse().read()
+
+
+def main():
+    """Hold many idle streams, then time one alert fan-out to all of them."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", type=int, default=1000)
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = min(hard, max(soft, args.connections * 2 + 100))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    app.config.update(WTF_CSRF_ENABLED=False, ALERT_STREAM_HEARTBEAT=60)
+    with app.app_context():
+        category_id = setup_data()
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_port
+        cookie = login(port)
+
+        started = time.perf_counter()
+        streams = []
+        try:
+            for _ in range(args.connections):
+                streams.append(open_stream(port, cookie))
+        except OSError as error:
+            print(f"Stopped opening streams after {len(streams)}: {error}")
+        opened = time.perf_counter() - started
+        idle_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        started = time.perf_counter()
+        lower_limit(port, cookie, category_id)
+        for sock in streams:
+            read_until(sock, b"event: alerts")
+        fan_out = time.perf_counter() - started
+
+        print(f"Idle streams held:   {len(streams)}")
+        print(f"Time to open:        {opened:.2f}s")
+        print(f"Threads:             {threading.active_count()}")
+        print(f"Peak RSS:            {idle_rss:.0f} MiB")
+        print(f"Alert fan-out:       {fan_out * 1000:.1f} ms to reach every stream")
+
+        for sock in streams:
+            sock.close()
+        server.shutdown()
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
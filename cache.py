@@ -0,0 +1,299 @@
+"""Per-user caches: expensive JSON API responses and the logged-in user."""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, request
+from flask_login import current_user
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+
+class LRUBackend:
+    """In-process cache that evicts the least recently used entry when full."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for a key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user_id, expires, value = entry
+            if expires < time.monotonic():
+                self._remove(key, user_id)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, user_id, value, ttl):
+        """Store a value for a user until the TTL elapses."""
+        with self._lock:
+            self._entries[key] = (user_id, time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest, (oldest_user, _, _) = next(iter(self._entries.items()))
+                self._remove(oldest, oldest_user)
+
+    def delete_user(self, user_id):
+        """Drop every entry belonging to a user."""
+        with self._lock:
+            for key in self._keys_by_user.pop(user_id, ()):
+                self._entries.pop(key, None)
+
+    def _remove(self, key, user_id):
+        self._entries.pop(key, None)
+        keys = self._keys_by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user_id]
+
+
+class SQLiteBackend:
+    """Cache stored in a local SQLite file, shared by every worker on a host."""
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, user_id INTEGER, expires REAL, value TEXT)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS ix_cache_user_id ON cache (user_id)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def get(self, key):
+        """Return the cached value for a key, or None if missing or expired."""
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires >= ?",
+                (key, time.time()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, user_id, value, ttl):
+        """Store a value for a user until the TTL elapses."""
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO cache (key, user_id, expires, value) "
+                "VALUES (?, ?, ?, ?)",
+                (key, user_id, time.time() + ttl, value),
+            )
+
+    def delete_user(self, user_id):
+        """Drop every entry belonging to a user."""
+        with self._connect() as connection:
+            connection.execute("DELETE FROM cache WHERE user_id = ?", (user_id,))
+
+
+class NullBackend:
+    """Backend that never stores anything, for disabling the cache."""
+
+    def get(self, key):
+        """Always report a miss."""
+        return None
+
+    def set(self, key, user_id, value, ttl):
+        """Discard the value."""
+
+    def delete_user(self, user_id):
+        """Nothing to drop."""
+
+
+class SummaryCache:
+    """
+    Flask extension caching JSON API responses per user and query parameters.
+
+    Keys include the user's data version from the ``version_loader``, so a
+    change committed by any process, including the CLI, makes every cached
+    response of that user unreachable at once. ``invalidate_user`` frees the
+    superseded entries early where the backend can see them.
+
+    Configuration:
+        CACHE_BACKEND: "lru" (default), "sqlite" or "null".
+        CACHE_DEFAULT_TTL: Seconds an entry stays valid (default 300).
+        CACHE_MAX_ENTRIES: Size limit of the "lru" backend (default 1024).
+        CACHE_SQLITE_PATH: Database file of the "sqlite" backend.
+    """
+
+    def __init__(self, app=None):
+        self.backend = NullBackend()
+        self.default_ttl = 300
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._version_loader = None
+        self._stats_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Create the configured backend for an application."""
+        backend = app.config.get("CACHE_BACKEND", "lru")
+        self.default_ttl = app.config.get("CACHE_DEFAULT_TTL", 300)
+        if backend == "lru":
+            self.backend = LRUBackend(app.config.get("CACHE_MAX_ENTRIES", 1024))
+        elif backend == "sqlite":
+            self.backend = SQLiteBackend(app.config["CACHE_SQLITE_PATH"])
+        elif backend == "null":
+            self.backend = NullBackend()
+        else:
+            raise ValueError(f"Unknown CACHE_BACKEND {backend!r}")
+        app.extensions["summary_cache"] = self
+
+    def version_loader(self, loader):
+        """
+        Register the function returning a user's current data version.
+
+        :param loader: Called with a user ID; returns a value that changes
+            whenever the user's cached responses become stale.
+        """
+        self._version_loader = loader
+        return loader
+
+    def _count(self, counter):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def cached(self, name, ttl=None):
+        """
+        Decorate a view so its JSON response is cached for the current user.
+
+        The key combines the user, their data version, the given name and the
+        sorted query string; only successful JSON responses are stored.
+        """
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                params = "&".join(
+                    f"{key}={value}" for key, value in sorted(request.args.items())
+                )
+                version = (
+                    self._version_loader(current_user.id)
+                    if self._version_loader
+                    else ""
+                )
+                key = f"{current_user.id}:{version}:{name}:{params}"
+                value = self.backend.get(key)
+                if value is not None:
+                    self._count("hits")
+                    return Response(value, mimetype="application/json")
+
+                self._count("misses")
+                response = view(*args, **kwargs)
+                if getattr(response, "status_code", None) == 200 and response.is_json:
+                    self.backend.set(
+                        key,
+                        current_user.id,
+                        response.get_data(as_text=True),
+                        ttl or self.default_ttl,
+                    )
+                return response
+
+            return wrapper
+
+        return decorator
+
+    def invalidate_user(self, user_id):
+        """Drop every cached response for a user after their data changes."""
+        self._count("invalidations")
+        self.backend.delete_user(user_id)
+
+    def stats(self):
+        """Return the hit, miss and invalidation counters of this process."""
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class UserCache:
+    """
+    Per-process cache of the users loaded by Flask-Login on every request.
+
+    Keeps a detached copy of each user for ``USER_CACHE_TTL`` seconds
+    (default 30, 0 disables the cache) and merges it into the request's
+    session without a SELECT. Flushing a change to, or the deletion of, a
+    User through the ORM drops its entry; other processes pick up changes
+    once the TTL has elapsed.
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 30
+        self.max_entries = 4096
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        event.listen(Session, "after_flush", self._after_flush)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configure the cache for an application and drop every entry."""
+        self.ttl = app.config.get("USER_CACHE_TTL", 30)
+        self.max_entries = app.config.get("USER_CACHE_MAX_ENTRIES", 4096)
+        with self._lock:
+            self._entries.clear()
+        app.extensions["user_cache"] = self
+
+    def load(self, session, model, user_id):
+        """
+        Return the user with the given id attached to a session, or None.
+
+        :param session: The session the user is used with, usually db.session.
+        :param model: The mapped user class.
+        :param user_id: The user's primary key.
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] >= time.monotonic():
+                self._entries.move_to_end(user_id)
+                return session.merge(entry[1], load=False)
+
+        user = session.get(model, user_id)
+        if user is not None:
+            self.store(user)
+        return user
+
+    def store(self, user):
+        """Cache a detached copy of a freshly loaded user."""
+        if not self.ttl:
+            return
+        mapper = inspect(user).mapper
+        copy = mapper.class_(
+            **{attr.key: getattr(user, attr.key) for attr in mapper.column_attrs}
+        )
+        make_transient_to_detached(copy)
+        with self._lock:
+            self._entries[copy.id] = (time.monotonic() + self.ttl, copy)
+            self._entries.move_to_end(copy.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        """Drop the cached copy of a user."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def _after_flush(self, session, flush_context):
+        for instance in (*session.dirty, *session.deleted):
+            if getattr(instance, "__tablename__", None) == "user":
+                self.invalidate(instance.id)
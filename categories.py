@@ -0,0 +1,127 @@
+"""Process-wide registry of expense categories."""
+
+import threading
+import time
+from types import MappingProxyType
+
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+
+class _Snapshot:
+    """Categories as loaded at one registry version."""
+
+    def __init__(self, version, expires, rows):
+        self.version = version
+        self.expires = expires
+        # Whether this snapshot was loaded to look for a missing id.
+        self.reloaded = False
+        self.choices = rows
+        self.names = MappingProxyType(dict(rows))
+        self.ids = MappingProxyType({name: category_id for category_id, name in rows})
+
+
+class CategoryRegistry:
+    """
+    Flask extension serving category choices and names from memory.
+
+    Categories change rarely, so form choice lists and id/name lookups read a
+    snapshot of the whole table instead of querying on every request or row.
+    Committing a change to a Category through the ORM bumps the registry's
+    version, and the next lookup reloads the table. Changes made by other
+    processes are picked up once the snapshot is older than
+    ``CATEGORY_REGISTRY_TTL`` seconds (default 300).
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 300
+        self.version = 0
+        self._snapshot = None
+        self._lock = threading.Lock()
+        event.listen(Session, "after_flush", self._after_flush)
+        event.listen(Session, "after_commit", self._after_commit)
+        event.listen(Session, "after_rollback", self._after_rollback)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configure the registry for an application and drop any snapshot."""
+        self.ttl = app.config.get("CATEGORY_REGISTRY_TTL", 300)
+        self.invalidate()
+        app.extensions["category_registry"] = self
+        app.add_template_global(self.name, "category_name")
+
+    def invalidate(self):
+        """Discard the snapshot so the next lookup reloads the categories."""
+        with self._lock:
+            self.version += 1
+            self._snapshot = None
+
+    def _current(self):
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.expires >= time.monotonic():
+            return snapshot
+
+        extension = current_app.extensions["sqlalchemy"]
+        category = extension.metadata.tables["category"]
+        version = self.version
+        rows = extension.session.execute(
+            select(category.c.id, category.c.name).order_by(category.c.name)
+        ).all()
+        snapshot = _Snapshot(
+            version,
+            time.monotonic() + self.ttl,
+            [(category_id, name) for category_id, name in rows],
+        )
+        with self._lock:
+            if self.version == version:
+                self._snapshot = snapshot
+        return snapshot
+
+    def choices(self):
+        """Return (id, name) pairs of every category, sorted by name."""
+        return list(self._current().choices)
+
+    def name(self, category_id):
+        """
+        Return the name of a category, or None if there is no such category.
+
+        An id missing from the snapshot was probably added by another process,
+        so the categories are reloaded before giving up, once per snapshot:
+        rows pointing at a deleted category then cost one reload, not one per
+        row.
+        """
+        snapshot = self._current()
+        if (
+            category_id is not None
+            and category_id not in snapshot.names
+            and not snapshot.reloaded
+        ):
+            self.invalidate()
+            snapshot = self._current()
+            snapshot.reloaded = True
+        return snapshot.names.get(category_id)
+
+    def names(self):
+        """Return a read-only view mapping every category id to its name."""
+        return self._current().names
+
+    def ids_by_name(self):
+        """Return a read-only view mapping every category name to its id."""
+        return self._current().ids
+
+    def _after_flush(self, session, flush_context):
+        if any(
+            getattr(instance, "__tablename__", None) == "category"
+            for instance in (*session.new, *session.dirty, *session.deleted)
+        ):
+            session.info["categories_changed"] = True
+
+    def _after_commit(self, session):
+        if session.info.pop("categories_changed", False):
+            self.invalidate()
+
+    @staticmethod
+    def _after_rollback(session):
+        session.info.pop("categories_changed", None)
@@ -2,15 +2,102 @@
 
 import os
 from dotenv import load_dotenv
+from dbpool import TimedQueuePool
+from passwords import DEFAULT_WORKERS
+from routing import REPLICA_BIND
 
 # Load environment variables from .env file
 load_dotenv()
 
 
+def env_flag(name, default):
+    """Read a boolean environment variable such as "true", "1" or "no"."""
+    value = os.environ.get(name)
+    if not value:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def engine_options(database_url):
+    """
+    Return the SQLAlchemy engine options for a database URL.
+
+    Server databases get a TimedQueuePool sized from the DB_POOL_* variables.
+    Connections are pinged before use and recycled before the server's idle
+    timeout can drop them. SQLite, used for local runs and tests, keeps
+    SQLAlchemy's defaults.
+    """
+    if not database_url or database_url.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": int(os.environ.get("DB_POOL_SIZE") or 10),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW") or 20),
+        "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT") or 30),
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE") or 1800),
+        "pool_pre_ping": env_flag("DB_POOL_PRE_PING", True),
+        "connect_args": {
+            "connect_timeout": int(os.environ.get("DB_CONNECT_TIMEOUT") or 10)
+        },
+    }
+
+
 class Config:
     """Configuration class for the application."""
 
     SECRET_KEY = os.environ.get("SECRET_KEY") or "you-will-never-guess"
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Optional read replica serving report views; see routing.ReplicaRouter
+    SQLALCHEMY_REPLICA_URI = os.environ.get("REPLICA_DATABASE_URL")
+    SQLALCHEMY_BINDS = (
+        {
+            REPLICA_BIND: {
+                "url": SQLALCHEMY_REPLICA_URI,
+                **engine_options(SQLALCHEMY_REPLICA_URI),
+            }
+        }
+        if SQLALCHEMY_REPLICA_URI
+        else {}
+    )
+    # Seconds a user's reads stay on the primary after they write
+    REPLICA_PIN_SECONDS = int(os.environ.get("REPLICA_PIN_SECONDS") or 5)
+    # Async driver URL of the ASGI read API; derived from DATABASE_URL if unset
+    ASYNC_DATABASE_URL = os.environ.get("ASYNC_DATABASE_URL")
     FLASK_ENV = os.environ.get("FLASK_ENV") or "production"
+
+    # Per-user cache of summary and report API responses
+    CACHE_BACKEND = os.environ.get("CACHE_BACKEND") or "lru"
+    CACHE_DEFAULT_TTL = int(os.environ.get("CACHE_DEFAULT_TTL") or 300)
+    CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES") or 1024)
+    CACHE_SQLITE_PATH = os.environ.get("CACHE_SQLITE_PATH") or "budget_cache.sqlite3"
+
+    # Server-Sent Events push of budget alerts
+    ALERT_BROKER = os.environ.get("ALERT_BROKER") or "pubsub.LocalBroker"
+    ALERT_STREAM_HEARTBEAT = int(os.environ.get("ALERT_STREAM_HEARTBEAT") or 15)
+
+    # Per-request SQL instrumentation, exported at /metrics
+    REQUEST_METRICS_ENABLED = env_flag("REQUEST_METRICS_ENABLED", False)
+    SLOW_REQUEST_MS = int(os.environ.get("SLOW_REQUEST_MS") or 500)
+    # Cache and connection pool counters at /api/cache_stats and /api/pool_stats
+    STATS_ENDPOINTS_ENABLED = env_flag("STATS_ENDPOINTS_ENABLED", False)
+
+    # Per-process cache of the logged-in user; 0 disables it
+    USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL") or 30)
+
+    # Password hashing in a process pool; 0 workers hashes in the request thread
+    PASSWORD_HASH_METHOD = (
+        os.environ.get("PASSWORD_HASH_METHOD") or "pbkdf2:sha256:600000"
+    )
+    PASSWORD_HASH_WORKERS = int(
+        os.environ.get("PASSWORD_HASH_WORKERS") or DEFAULT_WORKERS
+    )
+    PASSWORD_HASH_QUEUE = int(os.environ.get("PASSWORD_HASH_QUEUE") or 64)
+
+    # Login attempts allowed per username and window (seconds); 0 disables it
+    LOGIN_RATE_LIMIT = int(os.environ.get("LOGIN_RATE_LIMIT") or 10)
+    LOGIN_RATE_WINDOW = int(os.environ.get("LOGIN_RATE_WINDOW") or 60)
+
+    # In-memory category registry; reloads after this many seconds at most
+    CATEGORY_REGISTRY_TTL = int(os.environ.get("CATEGORY_REGISTRY_TTL") or 300)
@@ -0,0 +1,67 @@
+"""Shared pytest fixtures for the Budget Tracker application."""
+
+import os
+
+# The application reads its configuration at import time, so point it at an
+# in-memory database before app.py is imported by any test module.
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest  # pylint: disable=wrong-import-position
+
+from app import app as flask_app  # pylint: disable=wrong-import-position
+from app import spending_analytics  # pylint: disable=wrong-import-position
+from extensions import (  # pylint: disable=wrong-import-position
+    cache,
+    db,
+    login_throttle,
+    password_hasher,
+    user_cache,
+)
+from models.budget import Category, User  # pylint: disable=wrong-import-position
+
+
+@pytest.fixture
+def app():
+    """Provide the application with freshly created tables."""
+    flask_app.config.update(
+        TESTING=True,
+        WTF_CSRF_ENABLED=False,
+        # Cheap hashes in the test thread keep the suite fast.
+        PASSWORD_HASH_METHOD="pbkdf2:sha256:1000",
+        PASSWORD_HASH_WORKERS=0,
+        PASSWORD_HASH_QUEUE=64,
+        LOGIN_RATE_LIMIT=10,
+    )
+    # Start every test with an empty response cache; user IDs are reused.
+    cache.init_app(flask_app)
+    user_cache.init_app(flask_app)
+    password_hasher.init_app(flask_app)
+    login_throttle.init_app(flask_app)
+    spending_analytics.init_app(flask_app)
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def user(app):
+    """Create a user and a handful of expense categories."""
+    test_user = User(username="tester", email="tester@example.com")
+    test_user.set_password("password123")
+    db.session.add(test_user)
+    for name in ["Food", "Transportation", "Entertainment", "Utilities", "Rent"]:
+        db.session.add(Category(name=name))
+    db.session.commit()
+    return test_user
+
+
+@pytest.fixture
+def client(app, user):
+    """Provide a test client logged in as the test user."""
+    test_client = app.test_client()
+    test_client.post(
+        "/login", data={"username": user.username, "password": "password123"}
+    )
+    return test_client
@@ -0,0 +1,141 @@
+"""Database connection pool with checkout timing, and pool metrics from events."""
+
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that also records how long each checkout waited for a connection.
+
+    The wait covers queueing for a free connection as well as opening a new
+    one when the pool may still grow into its overflow.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+        self._wait_lock = threading.Lock()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._wait_lock:
+                self.waits += 1
+                self.wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+                self.timeouts += timed_out
+
+
+class _PoolCounters:
+    """Event counters of one engine's pool."""
+
+    def __init__(self):
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.soft_invalidations = 0
+        self.peak_overflow = 0
+
+
+class PoolMetrics:
+    """
+    Flask extension counting connection pool events of every database engine.
+
+    Counts new connections, checkouts, checkins and invalidations per engine
+    from SQLAlchemy pool events, alongside the pool's current size, checked
+    out connections and overflow. Engines using TimedQueuePool also report
+    the time spent waiting for checkouts and the number of checkout timeouts.
+    """
+
+    def __init__(self, app=None):
+        self.engines = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Listen to the pool events of the application's engines."""
+        with app.app_context():
+            engines = app.extensions["sqlalchemy"].engines
+        for bind_key, engine in engines.items():
+            name = bind_key or "default"
+            if name in self.engines:
+                continue
+            self.engines[name] = engine
+            self._counters[name] = counters = _PoolCounters()
+            self._listen(engine, counters)
+        app.extensions["pool_metrics"] = self
+
+    def _listen(self, engine, counters):
+        def count(counter):
+            with self._lock:
+                setattr(counters, counter, getattr(counters, counter) + 1)
+
+        @event.listens_for(engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            count("connects")
+
+        @event.listens_for(engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            count("checkouts")
+            pool = engine.pool
+            if isinstance(pool, QueuePool):
+                with self._lock:
+                    counters.peak_overflow = max(
+                        counters.peak_overflow, pool.overflow()
+                    )
+
+        @event.listens_for(engine, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            count("checkins")
+
+        @event.listens_for(engine, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            count("invalidations")
+
+        @event.listens_for(engine, "soft_invalidate")
+        def on_soft_invalidate(dbapi_connection, connection_record, exception):
+            count("soft_invalidations")
+
+    def stats(self):
+        """Return the pool state and event counters of each engine."""
+        report = {}
+        for name, engine in self.engines.items():
+            pool = engine.pool
+            with self._lock:
+                entry = {"pool": type(pool).__name__, **vars(self._counters[name])}
+            if isinstance(pool, QueuePool):
+                entry.update(
+                    size=pool.size(),
+                    checked_in=pool.checkedin(),
+                    checked_out=pool.checkedout(),
+                    overflow=max(pool.overflow(), 0),
+                )
+            if isinstance(pool, TimedQueuePool):
+                entry.update(
+                    waits=pool.waits,
+                    wait_seconds=pool.wait_seconds,
+                    mean_wait_seconds=pool.wait_seconds / pool.waits
+                    if pool.waits
+                    else 0.0,
+                    max_wait_seconds=pool.max_wait_seconds,
+                    timeouts=pool.timeouts,
+                )
+            report[name] = entry
+        return report
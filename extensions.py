@@ -2,6 +2,22 @@
 
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
+from cache import SummaryCache, UserCache
+from categories import CategoryRegistry
+from dbpool import PoolMetrics
+from metrics import RequestMetrics
+from passwords import LoginThrottle, PasswordHasher
+from pubsub import AlertBroker
+from routing import ReplicaRouter, RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 login_manager = LoginManager()
+cache = SummaryCache()
+user_cache = UserCache()
+alert_broker = AlertBroker()
+categories = CategoryRegistry()
+pool_metrics = PoolMetrics()
+request_metrics = RequestMetrics()
+password_hasher = PasswordHasher()
+login_throttle = LoginThrottle()
+replica_router = ReplicaRouter()
@@ -1,12 +1,13 @@
 """Form classes for the Budget Tracker application."""
 
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileAllowed, FileField, FileRequired
 from wtforms import (
     StringField,
     PasswordField,
     BooleanField,
     SubmitField,
-    FloatField,
+    DecimalField,
     DateField,
     SelectField,
 )
@@ -51,7 +52,7 @@ class RegistrationForm(FlaskForm):
 class IncomeForm(FlaskForm):
     """Form for setting budget limits."""
 
-    amount = FloatField("Amount", validators=[DataRequired()])
+    amount = DecimalField("Amount", places=2, validators=[DataRequired()])
     source = StringField("Source", validators=[DataRequired()])
     date = DateField("Date", validators=[DataRequired()])
     submit = SubmitField("Save Income")
@@ -60,7 +61,7 @@ class IncomeForm(FlaskForm):
 class ExpenseForm(FlaskForm):
     """Form for adding,editing and deleting expenses."""
 
-    amount = FloatField("Amount", validators=[DataRequired()])
+    amount = DecimalField("Amount", places=2, validators=[DataRequired()])
     description = StringField("Description", validators=[DataRequired()])
     category = SelectField("Category", coerce=int, validators=[DataRequired()])
     date = DateField("Date", validators=[DataRequired()])
@@ -71,5 +72,17 @@ class BudgetLimitForm(FlaskForm):
     """Form for adding, editing and deleting budget limits."""
 
     category = SelectField("Category", coerce=int, validators=[DataRequired()])
-    amount = FloatField("Limit Amount", validators=[DataRequired(), NumberRange(min=0)])
+    amount = DecimalField(
+        "Limit Amount", places=2, validators=[DataRequired(), NumberRange(min=0)]
+    )
     submit = SubmitField("Set Limit")
+
+
+class ImportForm(FlaskForm):
+    """Form for bulk importing incomes and expenses from a CSV file."""
+
+    file = FileField(
+        "CSV File", validators=[FileRequired(), FileAllowed(["csv"], "CSV files only")]
+    )
+    dry_run = BooleanField("Validate only (dry run)")
+    submit = SubmitField("Import")
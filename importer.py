@@ -0,0 +1,172 @@
+"""Bulk import of income and expense data in the format produced by export_data."""
+
+import csv
+import time
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from extensions import categories, db
+from models.budget import (
+    DailyBalance,
+    Expense,
+    Income,
+    MonthlyCategorySpend,
+    User,
+)
+from money import to_cents
+
+CSV_FIELDS = ["Date", "Type", "Amount", "Description", "Category"]
+DEFAULT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+
+
+class ImportReport:
+    """Outcome of a bulk import: row counts, validation errors and throughput."""
+
+    def __init__(self, dry_run):
+        self.dry_run = dry_run
+        self.incomes = 0
+        self.expenses = 0
+        self.error_count = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    @property
+    def rows(self):
+        """Number of valid rows read from the file."""
+        return self.incomes + self.expenses
+
+    @property
+    def rows_per_second(self):
+        """Import throughput over the whole run."""
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def imported(self):
+        """Whether rows were written to the database."""
+        return not self.dry_run and not self.error_count
+
+    def add_error(self, line, message):
+        """Record a validation error, keeping only the first few messages."""
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"Line {line}: {message}")
+
+    def summary(self):
+        """Return a one-line human-readable description of the import."""
+        action = "Validated" if self.dry_run or self.error_count else "Imported"
+        text = (
+            f"{action} {self.rows} rows ({self.incomes} incomes, "
+            f"{self.expenses} expenses) in {self.elapsed:.2f}s "
+            f"({self.rows_per_second:,.0f} rows/s)."
+        )
+        if self.error_count:
+            text += f" {self.error_count} invalid rows; nothing was imported."
+        return text
+
+
+def _parse_row(row, category_ids):
+    """Validate one CSV row and return (type, values) or raise ValueError."""
+    kind = (row.get("Type") or "").strip()
+    if kind not in ("Income", "Expense"):
+        raise ValueError(f"unknown type {kind!r}")
+    try:
+        day = date.fromisoformat((row.get("Date") or "").strip())
+    except ValueError:
+        raise ValueError(f"invalid date {row.get('Date')!r}") from None
+    try:
+        amount_cents = to_cents(Decimal((row.get("Amount") or "").strip()))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"invalid amount {row.get('Amount')!r}") from None
+    if amount_cents <= 0:
+        raise ValueError("amount must be positive")
+    description = (row.get("Description") or "").strip()
+    if not description:
+        raise ValueError("description is required")
+
+    if kind == "Income":
+        if len(description) > 100:
+            raise ValueError("source is longer than 100 characters")
+        return kind, {"amount_cents": amount_cents, "source": description, "date": day}
+
+    category = (row.get("Category") or "").strip()
+    if category not in category_ids:
+        raise ValueError(f"unknown category {category!r}")
+    if len(description) > 200:
+        raise ValueError("description is longer than 200 characters")
+    return kind, {
+        "amount_cents": amount_cents,
+        "description": description,
+        "date": day,
+        "category_id": category_ids[category],
+    }
+
+
+def import_csv(stream, user_id, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """
+    Import incomes and expenses for a user from an export_data CSV stream.
+
+    Rows are inserted with one executemany per batch and committed together,
+    so a file with any invalid row imports nothing. With ``dry_run`` the file
+    is only validated.
+
+    :param stream: A text file object positioned at the CSV header.
+    :param user_id: The ID of the user who will own the imported rows.
+    :param batch_size: Number of rows sent to the database per INSERT.
+    :param dry_run: Validate the file without writing anything.
+    :return: An ImportReport describing the run.
+    """
+    report = ImportReport(dry_run)
+    started = time.perf_counter()
+
+    reader = csv.DictReader(stream)
+    if reader.fieldnames != CSV_FIELDS:
+        report.add_error(1, f"expected header {','.join(CSV_FIELDS)}")
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    category_ids = categories.ids_by_name()
+    batches = {"Income": [], "Expense": []}
+    monthly_spend = {}
+
+    def flush(kind):
+        if not dry_run and not report.error_count and batches[kind]:
+            model = Income if kind == "Income" else Expense
+            db.session.execute(db.insert(model), batches[kind])
+        batches[kind] = []
+
+    for line, row in enumerate(reader, start=2):
+        try:
+            kind, values = _parse_row(row, category_ids)
+        except ValueError as error:
+            report.add_error(line, str(error))
+            continue
+
+        values["user_id"] = user_id
+        batches[kind].append(values)
+        if kind == "Income":
+            report.incomes += 1
+        else:
+            report.expenses += 1
+            key = (values["category_id"], values["date"].replace(day=1))
+            total, count = monthly_spend.get(key, (0, 0))
+            monthly_spend[key] = (total + values["amount_cents"], count + 1)
+        if len(batches[kind]) >= batch_size:
+            flush(kind)
+
+    flush("Income")
+    flush("Expense")
+
+    if report.imported:
+        for (category_id, month), (total, count) in monthly_spend.items():
+            MonthlyCategorySpend.record(user_id, category_id, month, total, count)
+        # One pass over the user's entries beats shifting later balances
+        # once for every imported day.
+        DailyBalance.rebuild(user_id)
+        User.bump_data_version(user_id)
+        db.session.commit()
+    else:
+        db.session.rollback()
+
+    report.elapsed = time.perf_counter() - started
+    return report
@@ -1,16 +1,35 @@
 """Script to manage database migrations and other command-line tasks."""
 
+import time
+from datetime import date
+
+import click
 from flask.cli import FlaskGroup
-from app import app, db
-from models.budget import User, Income, Expense, Category
+from flask_migrate import stamp
+from app import app, db, cache
+from columnar import COLUMNAR_BATCH_SIZE, COLUMNAR_FORMATS, export_dataset
+from importer import DEFAULT_BATCH_SIZE, import_csv
+from models.budget import (
+    User,
+    Income,
+    Expense,
+    Category,
+    DailyBalance,
+    MonthlyCategorySpend,
+)
+from recurring import DEFAULT_BATCH_SIZE as RECURRING_BATCH_SIZE, materialize_recurring
+from synthetic import SYNTHETIC_PASSWORD, seed_synthetic
 
 cli = FlaskGroup(app)
 
 
 @cli.command("create_db")
 def create_db():
-    """Create the database tables."""
+    """Create the database tables and mark them as fully migrated."""
     db.create_all()
+    # The tables match the latest migration; without a stamp, the next
+    # `flask db upgrade` would try to create them again.
+    stamp()
     print("Database tables created.")
 
 
@@ -39,5 +58,152 @@ def seed_db():
     print("Database seeded with initial data.")
 
 
+@cli.command("seed_synthetic")
+@click.option("--users", default=10, show_default=True, help="Users to create.")
+@click.option(
+    "--rows-per-user", default=1000, show_default=True, help="Expenses per user."
+)
+@click.option("--months", default=12, show_default=True, help="Months of history.")
+@click.option("--seed", default=42, show_default=True, help="Random seed.")
+def seed_synthetic_command(users, rows_per_user, months, seed):
+    """Generate users with a synthetic, seasonal income and expense history."""
+    started = time.perf_counter()
+    counts = seed_synthetic(users, rows_per_user, months=months, seed=seed)
+    elapsed = time.perf_counter() - started
+    rows = counts["incomes"] + counts["expenses"]
+    print(
+        f"Created {counts['users']} users with {counts['incomes']} incomes and "
+        f"{counts['expenses']} expenses in {elapsed:.1f}s "
+        f"({rows / elapsed:,.0f} rows/s). Password: {SYNTHETIC_PASSWORD}"
+    )
+
+
+def commit_rebuild(user_id):
+    """
+    Commit a rebuild of derived data and make its users' caches see it.
+
+    New data versions change the users' dashboard ETags and make every
+    worker's cached responses unreachable; this process's entries are
+    dropped as well.
+
+    :param user_id: The rebuilt user, or None if every user was rebuilt.
+    """
+    if user_id is None:
+        user_ids = db.session.scalars(db.select(User.id)).all()
+        db.session.execute(db.update(User).values(data_version=User.data_version + 1))
+    else:
+        user_ids = [user_id]
+        User.bump_data_versions(user_ids)
+    db.session.commit()
+    for rebuilt_id in user_ids:
+        cache.invalidate_user(rebuilt_id)
+
+
+@cli.command("rebuild_rollups")
+@click.option("--username", help="Only rebuild this user's rollup.")
+def rebuild_rollups(username):
+    """Rebuild the monthly per-category spend rollup from the expense table."""
+    user_id = None
+    if username is not None:
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise click.ClickException(f"No user named {username!r}.")
+        user_id = user.id
+    rows = MonthlyCategorySpend.rebuild(user_id)
+    commit_rebuild(user_id)
+    print(f"Monthly category spend rebuilt: {rows} rows.")
+
+
+@cli.command("rebuild_balances")
+@click.option("--username", help="Only rebuild this user's series.")
+def rebuild_balances(username):
+    """Rebuild the daily balance series from the income and expense tables."""
+    user_id = None
+    if username is not None:
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise click.ClickException(f"No user named {username!r}.")
+        user_id = user.id
+    rows = DailyBalance.rebuild(user_id)
+    commit_rebuild(user_id)
+    print(f"Daily balances rebuilt: {rows} rows.")
+
+
+@cli.command("check_balances")
+def check_balances():
+    """Compare the daily balance series with the income and expense tables."""
+    mismatches = DailyBalance.check()
+    for user_id, day, stored, expected in mismatches[:20]:
+        print(
+            f"user {user_id} {day}: stored {stored}, expected {expected} "
+            "(income, expense, balance cents)"
+        )
+    if mismatches:
+        raise click.ClickException(
+            f"{len(mismatches)} inconsistent days; run rebuild_balances."
+        )
+    print("Daily balances are consistent.")
+
+
+@cli.command("materialize_recurring")
+@click.option(
+    "--through",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    help="Last date to enter occurrences for (default: today).",
+)
+@click.option("--batch-size", default=RECURRING_BATCH_SIZE, show_default=True)
+def materialize_recurring_command(through, batch_size):
+    """Enter the due incomes and expenses of every user's recurring rules."""
+    through = through.date() if through is not None else date.today()
+    report = materialize_recurring(through, batch_size=batch_size)
+    for user_id in report.user_ids:
+        cache.invalidate_user(user_id)
+    print(report.summary())
+
+
+@cli.command("export_columnar")
+@click.argument("directory", type=click.Path(file_okay=False))
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(COLUMNAR_FORMATS),
+    default="parquet",
+    show_default=True,
+)
+@click.option("--username", help="Only export this user's data.")
+@click.option("--batch-size", default=COLUMNAR_BATCH_SIZE, show_default=True)
+def export_columnar(directory, file_format, username, batch_size):
+    """Export incomes and expenses as a dataset partitioned by user and month."""
+    user_id = None
+    if username is not None:
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise click.ClickException(f"No user named {username!r}.")
+        user_id = user.id
+    report = export_dataset(
+        directory, file_format, user_id=user_id, batch_size=batch_size
+    )
+    print(report.summary())
+
+
+@cli.command("import_csv")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--username", required=True, help="User who will own the rows.")
+@click.option("--batch-size", default=DEFAULT_BATCH_SIZE, show_default=True)
+@click.option("--dry-run", is_flag=True, help="Validate the file only.")
+def import_csv_command(path, username, batch_size, dry_run):
+    """Bulk import a CSV file in the export_data format for a user."""
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise click.ClickException(f"No user named {username!r}.")
+    with open(path, newline="", encoding="utf-8-sig") as stream:
+        report = import_csv(stream, user.id, batch_size=batch_size, dry_run=dry_run)
+    if report.imported:
+        cache.invalidate_user(user.id)
+    for error in report.errors:
+        print(error)
+    print(report.summary())
+
+
 if __name__ == "__main__":
     cli()
@@ -0,0 +1,199 @@
+"""Per-request SQL statement counts and timings, exported in Prometheus format."""
+
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+MAX_LOGGED_STATEMENT = 200
+
+
+class Histogram:
+    """Cumulative histogram of observations, as exposed by Prometheus."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        """Record one observation."""
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        """Return the Prometheus text lines of this histogram."""
+        lines = [
+            f'{name}_bucket{{{labels},le="{bound}"}} {count}'
+            for bound, count in zip(self.buckets, self.counts)
+        ]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class _EndpointStats:
+    """Histograms of one endpoint's requests."""
+
+    def __init__(self):
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.sql_duration = Histogram(DURATION_BUCKETS)
+        self.slow = 0
+
+
+class RequestMetrics:
+    """
+    Flask extension measuring the SQL issued by each request, when enabled.
+
+    Every request records its endpoint, wall time, number of SQL statements,
+    total SQL time and slowest statement, using the engines'
+    ``before_cursor_execute`` and ``after_cursor_execute`` events. Requests
+    slower than the threshold are logged, and per-endpoint histograms are
+    rendered in Prometheus text format. Figures cover the current process.
+
+    Configuration:
+        REQUEST_METRICS_ENABLED: Turn the instrumentation on (default False).
+        SLOW_REQUEST_MS: Log requests slower than this (default 500).
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.slow_request_ms = 500
+        self._endpoints = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Hook the request and SQL events of an application, if enabled."""
+        self.enabled = app.config.get("REQUEST_METRICS_ENABLED", False)
+        self.slow_request_ms = app.config.get("SLOW_REQUEST_MS", 500)
+        app.extensions["request_metrics"] = self
+        if not self.enabled:
+            return
+
+        with app.app_context():
+            engines = app.extensions["sqlalchemy"].engines
+        for engine in engines.values():
+            self.listen(engine)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def listen(self, engine):
+        """Count the statements of another engine, such as the async API's."""
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+        event.listen(engine, "handle_error", self._on_error)
+
+    @staticmethod
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @staticmethod
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        if not has_request_context() or "sql_metrics" not in g:
+            return
+        metrics = g.sql_metrics
+        metrics["queries"] += 1
+        metrics["sql_seconds"] += elapsed
+        if elapsed > metrics["slowest_seconds"]:
+            metrics["slowest_seconds"] = elapsed
+            metrics["slowest"] = statement
+
+    @staticmethod
+    def _on_error(exception_context):
+        # A failed statement never reaches after_cursor_execute; drop its start
+        # time so the pooled connection's next statement is timed from its own.
+        connection = exception_context.connection
+        started = connection.info.get("query_started") if connection else None
+        if started:
+            started.pop()
+
+    @staticmethod
+    def _start_request():
+        g.sql_metrics = {
+            "started": time.perf_counter(),
+            "queries": 0,
+            "sql_seconds": 0.0,
+            "slowest_seconds": 0.0,
+            "slowest": None,
+        }
+
+    def _finish_request(self, response):
+        metrics = g.pop("sql_metrics", None)
+        if metrics is None:
+            return response
+        elapsed = time.perf_counter() - metrics["started"]
+        endpoint = request.endpoint or "<unmatched>"
+        slow = elapsed * 1000 >= self.slow_request_ms
+
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, _EndpointStats())
+            stats.duration.observe(elapsed)
+            stats.queries.observe(metrics["queries"])
+            stats.sql_duration.observe(metrics["sql_seconds"])
+            stats.slow += slow
+
+        if slow:
+            slowest = " ".join((metrics["slowest"] or "").split())
+            current_app.logger.warning(
+                "Slow request %s %s: %.0f ms, %d SQL statements in %.0f ms, "
+                "slowest %.0f ms: %s",
+                request.method,
+                endpoint,
+                elapsed * 1000,
+                metrics["queries"],
+                metrics["sql_seconds"] * 1000,
+                metrics["slowest_seconds"] * 1000,
+                slowest[:MAX_LOGGED_STATEMENT],
+            )
+        return response
+
+    def render(self):
+        """Return the collected histograms in Prometheus text format."""
+        families = [
+            (
+                "budget_request_duration_seconds",
+                "Wall time of requests",
+                "duration",
+            ),
+            (
+                "budget_request_sql_statements",
+                "SQL statements issued per request",
+                "queries",
+            ),
+            (
+                "budget_request_sql_duration_seconds",
+                "Time spent in SQL statements per request",
+                "sql_duration",
+            ),
+        ]
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = []
+            for name, description, attribute in families:
+                lines.append(f"# HELP {name} {description}.")
+                lines.append(f"# TYPE {name} histogram")
+                for endpoint, stats in endpoints:
+                    histogram = getattr(stats, attribute)
+                    lines.extend(histogram.lines(name, f'endpoint="{endpoint}"'))
+            lines.append(
+                "# HELP budget_slow_requests_total Requests slower than "
+                f"{self.slow_request_ms} ms."
+            )
+            lines.append("# TYPE budget_slow_requests_total counter")
+            for endpoint, stats in endpoints:
+                lines.append(
+                    f'budget_slow_requests_total{{endpoint="{endpoint}"}} {stats.slow}'
+                )
+        return "\n".join(lines) + "\n"
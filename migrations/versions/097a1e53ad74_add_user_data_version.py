@@ -0,0 +1,29 @@
+"""add user data_version
+
+Revision ID: 097a1e53ad74
+Revises: 765c026ca33b
+Create Date: 2026-10-18 04:57:43.844598
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '097a1e53ad74'
+down_revision = '765c026ca33b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column('data_version', sa.Integer(), server_default='0',
+                      nullable=False)
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('data_version')
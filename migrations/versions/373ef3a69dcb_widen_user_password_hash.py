@@ -0,0 +1,33 @@
+"""widen user password_hash
+
+Revision ID: 373ef3a69dcb
+Revises: 2b2e65089abd
+Create Date: 2026-10-18 05:13:27.418996
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '373ef3a69dcb'
+down_revision = '2b2e65089abd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # scrypt hashes are longer than 128 characters.
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password_hash',
+               existing_type=sa.VARCHAR(length=128),
+               type_=sa.String(length=256),
+               existing_nullable=True)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password_hash',
+               existing_type=sa.String(length=256),
+               type_=sa.VARCHAR(length=128),
+               existing_nullable=True)
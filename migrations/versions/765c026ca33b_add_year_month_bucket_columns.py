@@ -0,0 +1,62 @@
+"""add year_month bucket columns
+
+Revision ID: 765c026ca33b
+Revises: ac6a0d864190
+Create Date: 2026-10-18 04:45:06.022847
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '765c026ca33b'
+down_revision = 'ac6a0d864190'
+branch_labels = None
+depends_on = None
+
+
+# (table, index name, indexed columns)
+BUCKETED_TABLES = [
+    ('expense', 'ix_expense_user_id_year_month_category_id',
+     ['user_id', 'year_month', 'category_id']),
+    ('income', 'ix_income_user_id_year_month', ['user_id', 'year_month']),
+]
+
+
+def month_of(date):
+    """Return the dialect's expression formatting a date as YYYY-MM."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        return sa.func.strftime('%Y-%m', date)
+    if dialect == 'postgresql':
+        return sa.func.to_char(date, 'YYYY-MM')
+    return sa.func.date_format(date, '%Y-%m')
+
+
+def upgrade():
+    for table, index, columns in BUCKETED_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(
+                sa.Column('year_month', sa.String(length=7), nullable=True)
+            )
+
+        op.execute(
+            sa.table(table, sa.column('date', sa.Date),
+                     sa.column('year_month', sa.String))
+            .update()
+            .values(year_month=month_of(sa.column('date')))
+        )
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column(
+                'year_month', existing_type=sa.String(length=7), nullable=False
+            )
+            batch_op.create_index(index, columns, unique=False)
+
+
+def downgrade():
+    for table, index, columns in reversed(BUCKETED_TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(index)
+            batch_op.drop_column('year_month')
@@ -0,0 +1,44 @@
+"""add recurring rules
+
+Revision ID: 92ca3f0a501e
+Revises: 373ef3a69dcb
+Create Date: 2026-10-18 05:18:13.372928
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '92ca3f0a501e'
+down_revision = '373ef3a69dcb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('recurring_rule',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('type', sa.String(length=7), nullable=False),
+    sa.Column('amount_cents', sa.BigInteger(), nullable=False),
+    sa.Column('description', sa.String(length=200), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=True),
+    sa.Column('rrule', sa.String(length=200), nullable=False),
+    sa.Column('dtstart', sa.Date(), nullable=False),
+    sa.Column('next_date', sa.Date(), nullable=True),
+    sa.ForeignKeyConstraint(['category_id'], ['category.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('recurring_rule', schema=None) as batch_op:
+        batch_op.create_index('ix_recurring_rule_next_date_id', ['next_date', 'id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_recurring_rule_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('recurring_rule', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_recurring_rule_user_id'))
+        batch_op.drop_index('ix_recurring_rule_next_date_id')
+
+    op.drop_table('recurring_rule')
@@ -0,0 +1,109 @@
+"""store money as integer cents
+
+Revision ID: ac6a0d864190
+Revises: 4b8a4e288c76
+Create Date: 2026-10-18 04:37:34.680928
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ac6a0d864190'
+down_revision = '4b8a4e288c76'
+branch_labels = None
+depends_on = None
+
+
+# (table, float column, integer cents column)
+MONEY_COLUMNS = [
+    ('budget_limit', 'amount', 'amount_cents'),
+    ('expense', 'amount', 'amount_cents'),
+    ('income', 'amount', 'amount_cents'),
+    ('monthly_category_spend', 'total', 'total_cents'),
+]
+
+
+def upgrade():
+    for table, old, new in MONEY_COLUMNS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column(new, sa.BigInteger(), nullable=True))
+
+        op.execute(
+            sa.table(table, sa.column(old, sa.Float), sa.column(new, sa.BigInteger))
+            .update()
+            .values(
+                {new: sa.cast(sa.func.round(sa.column(old) * 100), sa.BigInteger)}
+            )
+        )
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column(new, existing_type=sa.BigInteger(), nullable=False)
+            batch_op.drop_column(old)
+
+    # Rounding the float SUMs could leave the rollup a cent away from its
+    # expenses, so rebuild it from the converted amounts instead.
+    rebuild_monthly_category_spend()
+
+
+def rebuild_monthly_category_spend():
+    expense = sa.table(
+        'expense',
+        sa.column('user_id', sa.Integer),
+        sa.column('category_id', sa.Integer),
+        sa.column('date', sa.Date),
+        sa.column('amount_cents', sa.BigInteger),
+        sa.column('id', sa.Integer),
+    )
+    rollup = sa.table(
+        'monthly_category_spend',
+        sa.column('user_id', sa.Integer),
+        sa.column('category_id', sa.Integer),
+        sa.column('year_month', sa.String),
+        sa.column('total_cents', sa.BigInteger),
+        sa.column('count', sa.Integer),
+    )
+    year = sa.extract('year', expense.c.date).label('year')
+    month = sa.extract('month', expense.c.date).label('month')
+    totals = op.get_bind().execute(
+        sa.select(
+            expense.c.user_id,
+            expense.c.category_id,
+            year,
+            month,
+            sa.func.sum(expense.c.amount_cents),
+            sa.func.count(expense.c.id),
+        ).group_by(expense.c.user_id, expense.c.category_id, year, month)
+    ).all()
+    op.execute(rollup.delete())
+    if totals:
+        op.bulk_insert(
+            rollup,
+            [
+                {
+                    'user_id': user_id,
+                    'category_id': category_id,
+                    'year_month': f'{int(year):04d}-{int(month):02d}',
+                    'total_cents': int(total),
+                    'count': count,
+                }
+                for user_id, category_id, year, month, total, count in totals
+            ],
+        )
+
+
+def downgrade():
+    for table, old, new in reversed(MONEY_COLUMNS):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column(old, sa.Float(), nullable=True))
+
+        op.execute(
+            sa.table(table, sa.column(old, sa.Float), sa.column(new, sa.BigInteger))
+            .update()
+            .values({old: sa.column(new) / 100.0})
+        )
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column(old, existing_type=sa.Float(), nullable=False)
+            batch_op.drop_column(new)
@@ -1,3 +1,3 @@
 """Initialize the models package."""
 
-from .budget import db, User, Income, Expense, Category
+from .budget import db, User, Income, Expense, Category, MonthlyCategorySpend
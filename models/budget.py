@@ -1,10 +1,79 @@
 """Database models for the Budget Tracker application."""
 
 # pylint: disable=no-member
-from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from datetime import datetime, timedelta
 from flask_login import UserMixin
-from extensions import db
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import validates
+from extensions import db, password_hasher
+from money import from_cents, to_cents
+
+
+def month_key(day):
+    """Return the "YYYY-MM" key of the month containing the given date."""
+    return day.strftime("%Y-%m")
+
+
+def _upsert(model, added):
+    """
+    Build an INSERT of a model's row that adds to the row if it exists.
+
+    Adding in the same statement means two transactions writing the first
+    row for a key cannot both insert it and fail on the unique constraint.
+
+    :param model: A model with one unique constraint besides its primary key.
+    :param added: A function returning {column name: expression} of what to
+        add to the existing row, given the inserted values.
+    """
+    table = model.__table__
+    if db.engine.dialect.name in ("mysql", "mariadb"):
+        statement = mysql.insert(table)
+        values = added(statement.inserted)
+        return statement.on_duplicate_key_update(
+            {name: table.c[name] + value for name, value in values.items()}
+        )
+    dialect = postgresql if db.engine.dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(table)
+    (unique,) = [
+        constraint
+        for constraint in table.constraints
+        if isinstance(constraint, db.UniqueConstraint)
+    ]
+    values = added(statement.excluded)
+    return statement.on_conflict_do_update(
+        index_elements=list(unique.columns),
+        set_={name: table.c[name] + value for name, value in values.items()},
+    )
+
+
+def _year_month_default(context):
+    """Fill ``year_month`` from the inserted ``date``, including bulk inserts."""
+    day = context.get_current_parameters().get("date") or datetime.utcnow()
+    return month_key(day)
+
+
+class DatedMixin:
+    """Keep the persisted ``year_month`` bucket in step with ``date``."""
+
+    @validates("date")
+    def _validate_date(self, key, value):
+        self.year_month = month_key(value) if value is not None else None
+        return value
+
+
+class MoneyMixin:
+    """Expose the integer ``amount_cents`` column as a Decimal ``amount``."""
+
+    @property
+    def amount(self):
+        """The amount in major units, as an exact Decimal."""
+        if self.amount_cents is None:
+            return None
+        return from_cents(self.amount_cents)
+
+    @amount.setter
+    def amount(self, value):
+        self.amount_cents = to_cents(value)
 
 
 class User(UserMixin, db.Model):
@@ -13,26 +82,68 @@ class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), index=True, unique=True)
     email = db.Column(db.String(120), index=True, unique=True)
-    password_hash = db.Column(db.String(128))
+    password_hash = db.Column(db.String(256))
+    # Bumped whenever the user's incomes, expenses or limits change; an ETag.
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     incomes = db.relationship("Income", backref="user", lazy="dynamic")
     expenses = db.relationship("Expense", backref="user", lazy="dynamic")
 
     def set_password(self, password):
-        """Set password hash for the user."""
-        self.password_hash = generate_password_hash(password)
+        """Set password hash for the user, hashed in the password pool."""
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
         """Check if the provided password matches the hash."""
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    @classmethod
+    def bump_data_version(cls, user_id):
+        """Mark a user's data as changed, as part of the current transaction."""
+        db.session.execute(
+            db.update(cls)
+            .where(cls.id == user_id)
+            .values(data_version=cls.data_version + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    def lock(cls, user_ids):
+        """
+        Lock users' rows until the current transaction ends.
+
+        Writers of a user's incomes, expenses, rollups or running balances
+        take this lock before writing anything else, so they never compute a
+        balance from rows another transaction is changing, and two writers
+        always lock rows in the same order and cannot deadlock.
+        """
+        db.session.execute(
+            db.select(cls.id).where(cls.id.in_(user_ids)).with_for_update()
+        )
 
+    @classmethod
+    def bump_data_versions(cls, user_ids):
+        """Mark several users' data as changed in one statement."""
+        db.session.execute(
+            db.update(cls)
+            .where(cls.id.in_(user_ids))
+            .values(data_version=cls.data_version + 1)
+            .execution_options(synchronize_session=False)
+        )
 
-class Income(db.Model):
+
+class Income(DatedMixin, MoneyMixin, db.Model):
     """Income model for tracking user incomes."""
 
+    __table_args__ = (
+        db.Index("ix_income_user_id_date", "user_id", "date"),
+        db.Index("ix_income_user_id_year_month", "user_id", "year_month"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    amount = db.Column(db.Float, nullable=False)
+    amount_cents = db.Column(db.BigInteger, nullable=False)
     source = db.Column(db.String(100), nullable=False)
     date = db.Column(db.Date, nullable=False, default=datetime.utcnow)
+    year_month = db.Column(db.String(7), nullable=False, default=_year_month_default)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
 
 
@@ -44,27 +155,468 @@ class Category(db.Model):
     expenses = db.relationship("Expense", backref="category", lazy="dynamic")
 
 
-class Expense(db.Model):
+class Expense(DatedMixin, MoneyMixin, db.Model):
     """Expense model for tracking user expenses."""
 
+    __table_args__ = (
+        db.Index("ix_expense_user_id_date", "user_id", "date"),
+        db.Index(
+            "ix_expense_user_id_category_id_date", "user_id", "category_id", "date"
+        ),
+        db.Index(
+            "ix_expense_user_id_year_month_category_id",
+            "user_id",
+            "year_month",
+            "category_id",
+        ),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    amount = db.Column(db.Float, nullable=False)
+    amount_cents = db.Column(db.BigInteger, nullable=False)
     description = db.Column(db.String(200), nullable=False)
     date = db.Column(db.Date, nullable=False, default=datetime.utcnow)
+    year_month = db.Column(db.String(7), nullable=False, default=_year_month_default)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey("category.id"), nullable=False)
 
 
-class BudgetLimit(db.Model):
+class BudgetLimit(MoneyMixin, db.Model):
     """Represents a budget limit set by a user for a specific category."""
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey("category.id"), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    amount_cents = db.Column(db.BigInteger, nullable=False)
 
     user = db.relationship("User", backref="budget_limits")
     category = db.relationship("Category", backref="budget_limit")
 
     def __repr__(self):
         return f"<BudgetLimit {self.id}: {self.category.name} - ${self.amount}>"
+
+
+class RecurringRule(MoneyMixin, db.Model):
+    """An income or expense entered automatically on an RRULE-style schedule."""
+
+    __table_args__ = (db.Index("ix_recurring_rule_next_date_id", "next_date", "id"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("user.id"), nullable=False, index=True
+    )
+    # "Income" or "Expense"; expenses also have a category.
+    type = db.Column(db.String(7), nullable=False)
+    amount_cents = db.Column(db.BigInteger, nullable=False)
+    description = db.Column(db.String(200), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey("category.id"))
+    # An iCalendar RRULE such as "FREQ=MONTHLY;BYMONTHDAY=1"; see recurring.py.
+    rrule = db.Column(db.String(200), nullable=False)
+    dtstart = db.Column(db.Date, nullable=False)
+    # The first occurrence not entered yet; None once the schedule has ended.
+    next_date = db.Column(db.Date)
+
+    user = db.relationship("User", backref="recurring_rules")
+
+
+class MonthlyCategorySpend(db.Model):
+    """Running total of a user's expenses per category and calendar month."""
+
+    __table_args__ = (
+        db.UniqueConstraint(
+            "user_id", "category_id", "year_month", name="uq_monthly_category_spend"
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey("category.id"), nullable=False)
+    year_month = db.Column(db.String(7), nullable=False)
+    total_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def record(cls, user_id, category_id, day, amount_cents, count=1):
+        """
+        Add an expense to its month's rollup row in the current transaction.
+
+        Pass negative cents and count to remove a previously recorded expense.
+        """
+        db.session.execute(
+            cls._upsert(),
+            {
+                "user_id": user_id,
+                "category_id": category_id,
+                "year_month": month_key(day),
+                "total_cents": amount_cents,
+                "count": count,
+            },
+        )
+
+    @classmethod
+    def _upsert(cls):
+        return _upsert(
+            cls,
+            lambda new: {"total_cents": new.total_cents, "count": new.count},
+        )
+
+    @classmethod
+    def record_many(cls, totals):
+        """
+        Add many expenses to their rollup rows with one statement per kind.
+
+        :param totals: A {(user_id, category_id, year_month): (cents, count)}
+            mapping of the amounts to add.
+        """
+        if not totals:
+            return
+        rows = db.session.query(
+            cls.user_id, cls.category_id, cls.year_month, cls.id
+        ).filter(
+            cls.user_id.in_({user_id for user_id, _, _ in totals}),
+            cls.year_month.in_({year_month for _, _, year_month in totals}),
+        )
+        existing = {(user, category, month): id_ for user, category, month, id_ in rows}
+        updates = []
+        inserts = []
+        for key, (cents, count) in totals.items():
+            if key in existing:
+                updates.append(
+                    {"row_id": existing[key], "add_cents": cents, "add_count": count}
+                )
+            else:
+                user_id, category_id, year_month = key
+                inserts.append(
+                    {
+                        "user_id": user_id,
+                        "category_id": category_id,
+                        "year_month": year_month,
+                        "total_cents": cents,
+                        "count": count,
+                    }
+                )
+        table = cls.__table__
+        if updates:
+            db.session.execute(
+                table.update()
+                .where(table.c.id == db.bindparam("row_id"))
+                .values(
+                    total_cents=table.c.total_cents + db.bindparam("add_cents"),
+                    count=table.c.count + db.bindparam("add_count"),
+                ),
+                updates,
+            )
+        if inserts:
+            # Another transaction may have inserted one of the rows since.
+            db.session.execute(cls._upsert(), inserts)
+
+    @classmethod
+    def spent(cls, user_id, category_id, day):
+        """Return the cents spent by a user in a category during a month."""
+        total = (
+            db.session.query(cls.total_cents)
+            .filter_by(
+                user_id=user_id, category_id=category_id, year_month=month_key(day)
+            )
+            .scalar()
+        )
+        return total or 0
+
+    @classmethod
+    def rebuild(cls, user_id=None):
+        """Recompute the rollup from the expense table, for one or all users."""
+        rows = cls.query
+        totals = db.session.query(
+            Expense.user_id,
+            Expense.category_id,
+            Expense.year_month,
+            db.func.sum(Expense.amount_cents),
+            db.func.count(Expense.id),
+        )
+        if user_id is not None:
+            rows = rows.filter_by(user_id=user_id)
+            totals = totals.filter(Expense.user_id == user_id)
+        rows.delete(synchronize_session=False)
+        totals = totals.group_by(
+            Expense.user_id, Expense.category_id, Expense.year_month
+        ).all()
+        if totals:
+            db.session.execute(
+                db.insert(cls),
+                [
+                    {
+                        "user_id": user,
+                        "category_id": category,
+                        "year_month": year_month,
+                        "total_cents": int(total),
+                        "count": count,
+                    }
+                    for user, category, year_month, total, count in totals
+                ],
+            )
+        return len(totals)
+
+
+class DailyBalance(db.Model):
+    """A user's income and expenses per day and their running net balance."""
+
+    __table_args__ = (db.UniqueConstraint("user_id", "day", name="uq_daily_balance"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    income_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    expense_cents = db.Column(db.BigInteger, nullable=False, default=0)
+    # Net of every income and expense up to and including this day.
+    balance_cents = db.Column(db.BigInteger, nullable=False, default=0)
+
+    @classmethod
+    def record(cls, user_id, day, income_cents=0, expense_cents=0):
+        """
+        Add an income or expense to its day in the current transaction.
+
+        The balance of every later day moves by the same net amount, so a
+        backdated entry costs one UPDATE over the days that follow it. Pass
+        negative cents to remove a previously recorded entry. The user's row
+        stays locked until the transaction ends.
+        """
+        User.lock([user_id])
+        net = income_cents - expense_cents
+        if net:
+            cls.query.filter(cls.user_id == user_id, cls.day > day).update(
+                {cls.balance_cents: cls.balance_cents + net},
+                synchronize_session=False,
+            )
+        db.session.execute(
+            cls._upsert(),
+            {
+                "user_id": user_id,
+                "day": day,
+                "income_cents": income_cents,
+                "expense_cents": expense_cents,
+                "balance_cents": cls.balance_before(user_id, day, locked=True) + net,
+            },
+        )
+
+    @classmethod
+    def _upsert(cls):
+        return _upsert(
+            cls,
+            lambda new: {
+                "income_cents": new.income_cents,
+                "expense_cents": new.expense_cents,
+                "balance_cents": new.income_cents - new.expense_cents,
+            },
+        )
+
+    @classmethod
+    def record_many(cls, totals):
+        """
+        Add many days of incomes and expenses in the current transaction.
+
+        The affected users' days from the earliest given one onwards are read
+        once and shifted by executemany, instead of one range UPDATE per day.
+
+        :param totals: A {(user_id, day): (income, expense)} mapping of the
+            cents to add.
+        """
+        if not totals:
+            return
+        user_ids = {user_id for user_id, _ in totals}
+        User.lock(user_ids)
+        start = min(day for _, day in totals)
+        latest = (
+            db.select(cls.user_id, db.func.max(cls.day).label("day"))
+            .where(cls.user_id.in_(user_ids), cls.day < start)
+            .group_by(cls.user_id)
+            .subquery()
+        )
+        # Each user's balance at the end of the day before the start.
+        balances = dict(
+            db.session.query(cls.user_id, cls.balance_cents).join(
+                latest,
+                db.and_(cls.user_id == latest.c.user_id, cls.day == latest.c.day),
+            )
+        )
+        rows = db.session.query(cls.id, cls.user_id, cls.day, cls.balance_cents).filter(
+            cls.user_id.in_(user_ids), cls.day >= start
+        )
+        stored = {(row.user_id, row.day): row for row in rows}
+
+        updates = []
+        inserts = []
+        shifts = {}
+        for user_id, day in sorted(stored.keys() | totals.keys()):
+            income, expense = totals.get((user_id, day), (0, 0))
+            shift = shifts.get(user_id, 0) + income - expense
+            shifts[user_id] = shift
+            row = stored.get((user_id, day))
+            if row is None:
+                balances[user_id] = balances.get(user_id, 0) + income - expense
+                inserts.append(
+                    {
+                        "user_id": user_id,
+                        "day": day,
+                        "income_cents": income,
+                        "expense_cents": expense,
+                        "balance_cents": balances[user_id],
+                    }
+                )
+                continue
+            balances[user_id] = row.balance_cents + shift
+            if income or expense or shift:
+                updates.append(
+                    {
+                        "row_id": row.id,
+                        "add_income": income,
+                        "add_expense": expense,
+                        "shift": shift,
+                    }
+                )
+
+        table = cls.__table__
+        if updates:
+            db.session.execute(
+                table.update()
+                .where(table.c.id == db.bindparam("row_id"))
+                .values(
+                    income_cents=table.c.income_cents + db.bindparam("add_income"),
+                    expense_cents=table.c.expense_cents + db.bindparam("add_expense"),
+                    balance_cents=table.c.balance_cents + db.bindparam("shift"),
+                ),
+                updates,
+            )
+        if inserts:
+            db.session.execute(table.insert(), inserts)
+
+    @classmethod
+    def balance_before(cls, user_id, day, locked=False):
+        """
+        Return a user's balance in cents at the end of the day before.
+
+        :param locked: Read with a locking read, which sees the latest
+            committed rows rather than the transaction's snapshot.
+        """
+        query = (
+            db.session.query(cls.balance_cents)
+            .filter(cls.user_id == user_id, cls.day < day)
+            .order_by(cls.day.desc())
+            .limit(1)
+        )
+        if locked:
+            query = query.with_for_update()
+        return query.scalar() or 0
+
+    @classmethod
+    def series(cls, user_id, start_date, end_date):
+        """
+        Return a user's daily figures over a range as parallel lists of cents.
+
+        Days without entries are filled in, so the lists have one item per day
+        and moving averages are plain window sums over them.
+
+        :return: A dict of ``dates``, ``income``, ``expenses`` and ``balance``
+            lists.
+        """
+        rows = {
+            row.day: row
+            for row in db.session.query(
+                cls.day, cls.income_cents, cls.expense_cents, cls.balance_cents
+            ).filter(cls.user_id == user_id, cls.day.between(start_date, end_date))
+        }
+        balance = cls.balance_before(user_id, start_date)
+        series = {"dates": [], "income": [], "expenses": [], "balance": []}
+        day = start_date
+        while day <= end_date:
+            row = rows.get(day)
+            if row is not None:
+                balance = row.balance_cents
+            series["dates"].append(day)
+            series["income"].append(row.income_cents if row else 0)
+            series["expenses"].append(row.expense_cents if row else 0)
+            series["balance"].append(balance)
+            day += timedelta(days=1)
+        return series
+
+    @staticmethod
+    def day_totals(user_id=None):
+        """Return {(user_id, day): (income, expense)} cents from the entries."""
+        totals = {}
+        for position, model in enumerate((Income, Expense)):
+            rows = db.session.query(
+                model.user_id, model.date, db.func.sum(model.amount_cents)
+            )
+            if user_id is not None:
+                rows = rows.filter(model.user_id == user_id)
+            for user, day, cents in rows.group_by(model.user_id, model.date):
+                day_total = totals.setdefault((user, day), [0, 0])
+                day_total[position] = int(cents)
+        return {key: tuple(value) for key, value in totals.items()}
+
+    @staticmethod
+    def running(totals):
+        """
+        Yield (user_id, day, income, expense, balance) in user and day order.
+
+        :param totals: A {(user_id, day): (income, expense)} mapping of cents.
+        """
+        balances = {}
+        for (user, day), (income, expense) in sorted(totals.items()):
+            balances[user] = balances.get(user, 0) + income - expense
+            yield user, day, income, expense, balances[user]
+
+    @classmethod
+    def rebuild(cls, user_id=None):
+        """Recompute the series from the income and expense tables."""
+        rows = cls.query
+        if user_id is not None:
+            rows = rows.filter_by(user_id=user_id)
+        rows.delete(synchronize_session=False)
+        series = [
+            {
+                "user_id": user,
+                "day": day,
+                "income_cents": income,
+                "expense_cents": expense,
+                "balance_cents": balance,
+            }
+            for user, day, income, expense, balance in cls.running(
+                cls.day_totals(user_id)
+            )
+        ]
+        if series:
+            db.session.execute(db.insert(cls), series)
+        return len(series)
+
+    @classmethod
+    def check(cls, user_id=None):
+        """
+        Compare the stored series with one recomputed from the entries.
+
+        Days left with no entries after deletions may stay in the table, as
+        long as their figures are zero and their balance carries over.
+
+        :return: A list of (user_id, day, stored, expected) tuples, where the
+            last two are (income, expense, balance) cents and stored is None
+            for a missing day. Empty when the series is consistent.
+        """
+        rows = cls.query
+        if user_id is not None:
+            rows = rows.filter_by(user_id=user_id)
+        stored = {
+            (row.user_id, row.day): (
+                row.income_cents,
+                row.expense_cents,
+                row.balance_cents,
+            )
+            for row in rows
+        }
+        totals = cls.day_totals(user_id)
+        for key in stored.keys() - totals.keys():
+            totals[key] = (0, 0)
+
+        mismatches = []
+        for user, day, income, expense, balance in cls.running(totals):
+            expected = (income, expense, balance)
+            if stored.get((user, day)) != expected:
+                mismatches.append((user, day, stored.get((user, day)), expected))
+        return mismatches
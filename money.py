@@ -0,0 +1,41 @@
+"""Exact money handling: integer minor units in storage, Decimal in Python."""
+
+from decimal import ROUND_HALF_UP, Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+CENT = Decimal("0.01")
+
+
+def to_cents(amount):
+    """
+    Convert an amount in major units to integer cents, rounding half up.
+
+    Strings and floats are converted through their decimal representation,
+    so ``to_cents(0.1)`` is 10 rather than a binary approximation.
+    """
+    if not isinstance(amount, Decimal):
+        amount = Decimal(str(amount))
+    return int(amount.quantize(CENT, rounding=ROUND_HALF_UP).scaleb(2))
+
+
+def from_cents(cents):
+    """Convert integer cents (or a SQL SUM of them) to a Decimal amount."""
+    return Decimal(int(cents or 0)).scaleb(-2).quantize(CENT)
+
+
+class MoneyJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider that writes Decimal amounts as plain JSON numbers.
+
+    Every stored amount has two decimal places, and any decimal with at most
+    15 significant digits round-trips through a double unchanged. Writing
+    the number itself keeps the payloads usable by clients that call
+    ``toFixed`` on them.
+    """
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Decimal):
+            return float(o)
+        return DefaultJSONProvider.default(o)
@@ -0,0 +1,206 @@
+"""Password hashing off the request threads, and per-username login throttling."""
+
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as PoolTimeout
+
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS,
+    check_password_hash,
+    generate_password_hash,
+)
+
+DEFAULT_METHOD = f"pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}"
+# Hashing processes per application process. Every web worker starts its own
+# pool, so this is kept small rather than scaled to the CPU count.
+DEFAULT_WORKERS = 2
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hashes are waiting for the pool, or one took too long."""
+
+
+def canonical_method(method):
+    """
+    Return a hashing method with Werkzeug's defaults spelled out.
+
+    Stored hashes start with the fully specified method, e.g.
+    ``pbkdf2:sha256:600000``, so this is what they are compared against to
+    decide whether a hash was made with the current settings.
+    """
+    name, *args = method.split(":")
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = args[1] if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{int(iterations)}"
+    if name == "scrypt":
+        n, r, p = args or (2**15, 8, 1)
+        return f"scrypt:{int(n)}:{int(r)}:{int(p)}"
+    raise ValueError(f"unsupported password hashing method {method!r}")
+
+
+class PasswordHasher:
+    """
+    Flask extension hashing and checking passwords in a bounded process pool.
+
+    Key stretching is CPU-bound by design. Running it in
+    ``PASSWORD_HASH_WORKERS`` processes (default DEFAULT_WORKERS) keeps it
+    off this process's GIL, so the other request threads keep serving while
+    a hash runs, and caps the CPU a burst of logins can take. The signing-in
+    request itself still blocks until its hash is done. At most
+    ``PASSWORD_HASH_QUEUE`` hashes may be pending; beyond that
+    PasswordHasherBusy is raised instead of queueing unbounded work. It is
+    also raised when a hash takes longer than ``PASSWORD_HASH_TIMEOUT``
+    seconds; the hash keeps its place until the worker finishes it.
+    ``PASSWORD_HASH_WORKERS = 0`` hashes in the calling thread.
+
+    ``PASSWORD_HASH_METHOD`` is the Werkzeug method and cost used for new
+    hashes. Hashes made with another method report needs_rehash, so the login
+    route upgrades them transparently.
+    """
+
+    def __init__(self, app=None):
+        self.method = DEFAULT_METHOD
+        self.workers = 0
+        self.queue_size = 0
+        self.timeout = 30
+        self._pool = None
+        self._pool_pid = None
+        self._slots = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configure the hasher for an application."""
+        self.method = canonical_method(
+            app.config.get("PASSWORD_HASH_METHOD", DEFAULT_METHOD)
+        )
+        self.workers = app.config.get("PASSWORD_HASH_WORKERS", DEFAULT_WORKERS)
+        self.queue_size = app.config.get("PASSWORD_HASH_QUEUE", 64)
+        self.timeout = app.config.get("PASSWORD_HASH_TIMEOUT", 30)
+        self.shutdown()
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        app.extensions["password_hasher"] = self
+
+    def hash(self, password):
+        """Return a new hash of a password made with the configured method."""
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        """Whether a password matches a stored hash."""
+        if not password_hash:
+            return False
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Whether a stored hash was made with other settings than the current."""
+        return password_hash.split("$", 1)[0] != self.method
+
+    def shutdown(self):
+        """Stop the worker processes; the pool restarts on the next hash."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None and self._pool_pid == os.getpid():
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, function, *args):
+        if not self.workers:
+            return function(*args)
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            future = self._executor().submit(function, *args)
+        except BaseException:
+            slots.release()
+            raise
+        # Release the slot when the work is done, not when the caller stops
+        # waiting, so abandoned hashes still count against the queue.
+        future.add_done_callback(lambda _future: slots.release())
+        try:
+            return future.result(self.timeout)
+        except PoolTimeout:
+            raise PasswordHasherBusy() from None
+
+    def _executor(self):
+        # Created on first use and again in forked workers, which cannot use
+        # the pool of the process they were forked from. The hashing
+        # processes are not forked themselves: a fork of a threaded server
+        # may copy locks other threads held at the time.
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context(
+            "forkserver" if "forkserver" in methods else "spawn"
+        )
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=context
+                )
+                self._pool_pid = os.getpid()
+            return self._pool
+
+
+class LoginThrottle:
+    """
+    Per-username sliding-window limit on login attempts.
+
+    Each attempt is counted before the password is hashed. Once a username
+    reaches ``LOGIN_RATE_LIMIT`` attempts within ``LOGIN_RATE_WINDOW``
+    seconds, further attempts are rejected without touching the database or
+    the hasher. A successful login clears the count. State is per process
+    and keeps at most ``LOGIN_THROTTLE_MAX_USERNAMES`` usernames, dropping
+    the least recently tried. ``LOGIN_RATE_LIMIT = 0`` disables throttling.
+    """
+
+    def __init__(self, app=None):
+        self.limit = 10
+        self.window = 60
+        self.max_usernames = 10000
+        self._attempts = OrderedDict()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configure the throttle for an application and forget all attempts."""
+        self.limit = app.config.get("LOGIN_RATE_LIMIT", 10)
+        self.window = app.config.get("LOGIN_RATE_WINDOW", 60)
+        self.max_usernames = app.config.get("LOGIN_THROTTLE_MAX_USERNAMES", 10000)
+        with self._lock:
+            self._attempts.clear()
+        app.extensions["login_throttle"] = self
+
+    def hit(self, username):
+        """
+        Record a login attempt for a username.
+
+        :return: 0 if the attempt may proceed, otherwise the number of seconds
+            until the oldest attempt in the window expires.
+        """
+        if not self.limit:
+            return 0
+        key = username.strip().lower()
+        now = time.monotonic()
+        with self._lock:
+            attempts = self._attempts.get(key)
+            if attempts is None:
+                attempts = self._attempts[key] = deque()
+            self._attempts.move_to_end(key)
+            while attempts and attempts[0] <= now - self.window:
+                attempts.popleft()
+            if len(attempts) >= self.limit:
+                return max(1, int(attempts[0] + self.window - now + 1))
+            attempts.append(now)
+            while len(self._attempts) > self.max_usernames:
+                self._attempts.popitem(last=False)
+            return 0
+
+    def reset(self, username):
+        """Forget the attempts recorded for a username."""
+        with self._lock:
+            self._attempts.pop(username.strip().lower(), None)
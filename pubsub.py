@@ -0,0 +1,91 @@
+"""Publish/subscribe brokers used to push per-user events to open connections."""
+
+import queue
+import threading
+
+from werkzeug.utils import import_string
+
+
+class LocalBroker:
+    """
+    In-process broker delivering each user's messages to their subscriptions.
+
+    Every subscription holds only the latest undelivered message, so a slow
+    client skips stale states instead of queueing them. Messages reach only
+    subscribers in the same process; deployments with several workers can
+    plug in a broker backed by a shared service through ``ALERT_BROKER``.
+    """
+
+    def __init__(self):
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        """Register a new subscription for a user and return it."""
+        subscription = queue.Queue(maxsize=1)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, user_id, subscription):
+        """Remove a subscription returned by subscribe."""
+        with self._lock:
+            subscriptions = self._subscriptions.get(user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[user_id]
+
+    def has_subscribers(self, user_id):
+        """Whether any connection is listening for a user's messages."""
+        return user_id in self._subscriptions
+
+    def subscriber_count(self):
+        """Total number of open subscriptions in this process."""
+        with self._lock:
+            return sum(len(s) for s in self._subscriptions.values())
+
+    def publish(self, user_id, message):
+        """Deliver a message to every subscription of a user."""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                subscription.put_nowait(message)
+            except queue.Full:
+                pass
+
+    @staticmethod
+    def listen(subscription, timeout):
+        """Wait for the next message; return None if the timeout elapses."""
+        try:
+            return subscription.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class AlertBroker:
+    """
+    Flask extension exposing the broker named by the ``ALERT_BROKER`` setting.
+
+    ``ALERT_BROKER`` is an import path to a class with the LocalBroker
+    interface (default ``pubsub.LocalBroker``).
+    """
+
+    def __init__(self, app=None):
+        self.broker = LocalBroker()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Instantiate the configured broker for an application."""
+        broker_class = app.config.get("ALERT_BROKER", "pubsub.LocalBroker")
+        self.broker = import_string(broker_class)()
+        app.extensions["alert_broker"] = self
+
+    def __getattr__(self, name):
+        return getattr(self.broker, name)
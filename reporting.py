@@ -0,0 +1,118 @@
+"""Portable grouping of dated rows into day, week, month and quarter buckets."""
+
+from datetime import timedelta
+
+from sqlalchemy import Integer, String, cast, func
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from models.budget import month_key
+
+BUCKET_UNITS = ("day", "week", "month", "quarter")
+
+
+class _DateBucket(FunctionElement):
+    """
+    SQL expression returning the bucket key of a date column as a string.
+
+    Keys sort chronologically: "YYYY-MM-DD" for days, the date of the Monday
+    starting the week for weeks, "YYYY-MM" for months and "YYYY-Qn" for
+    quarters, matching bucket_key.
+    """
+
+    type = String()
+    inherit_cache = True
+    unit = None
+
+
+class _DayBucket(_DateBucket):
+    inherit_cache = True
+    unit = "day"
+
+
+class _WeekBucket(_DateBucket):
+    inherit_cache = True
+    unit = "week"
+
+
+class _MonthBucket(_DateBucket):
+    inherit_cache = True
+    unit = "month"
+
+
+class _QuarterBucket(_DateBucket):
+    inherit_cache = True
+    unit = "quarter"
+
+
+_BUCKET_CLASSES = {cls.unit: cls for cls in _DateBucket.__subclasses__()}
+
+
+def _sqlite_bucket(unit, day):
+    if unit == "day":
+        return func.strftime("%Y-%m-%d", day)
+    if unit == "week":
+        return func.date(day, "weekday 0", "-6 days")
+    if unit == "month":
+        return func.strftime("%Y-%m", day)
+    quarter = (cast(func.strftime("%m", day), Integer) + 2) // 3
+    return func.printf("%s-Q%d", func.strftime("%Y", day), quarter)
+
+
+def _postgresql_bucket(unit, day):
+    if unit == "week":
+        return func.to_char(func.date_trunc("week", day), "YYYY-MM-DD")
+    formats = {"day": "YYYY-MM-DD", "month": "YYYY-MM", "quarter": 'YYYY-"Q"Q'}
+    return func.to_char(day, formats[unit])
+
+
+def _mysql_bucket(unit, day):
+    if unit == "day":
+        return func.date_format(day, "%Y-%m-%d")
+    if unit == "week":
+        return func.date_format(func.subdate(day, func.weekday(day)), "%Y-%m-%d")
+    if unit == "month":
+        return func.date_format(day, "%Y-%m")
+    return func.concat(func.year(day), "-Q", func.quarter(day))
+
+
+_DIALECT_BUCKETS = {"sqlite": _sqlite_bucket, "postgresql": _postgresql_bucket}
+
+
+@compiles(_DateBucket)
+def _compile_date_bucket(element, compiler, **kw):
+    build = _DIALECT_BUCKETS.get(compiler.dialect.name, _mysql_bucket)
+    (day,) = element.clauses
+    return compiler.process(build(element.unit, day), **kw)
+
+
+def date_bucket(model, unit):
+    """
+    Return a SQL expression grouping a model's rows into date buckets.
+
+    Months use the model's persisted, indexed ``year_month`` column when it
+    has one; other units are computed from the ``date`` column with the
+    functions of the connected database.
+
+    :param model: A model with a ``date`` column, such as Income or Expense.
+    :param unit: One of BUCKET_UNITS.
+    :raises ValueError: If the unit is not supported.
+    """
+    if unit not in BUCKET_UNITS:
+        raise ValueError(f"unit must be one of {', '.join(BUCKET_UNITS)}")
+    if unit == "month" and hasattr(model, "year_month"):
+        return model.year_month
+    return _BUCKET_CLASSES[unit](model.date)
+
+
+def bucket_key(day, unit):
+    """Return the key of the bucket containing a date, as date_bucket does."""
+    if unit == "day":
+        return day.isoformat()
+    if unit == "week":
+        return (day - timedelta(days=day.weekday())).isoformat()
+    if unit == "month":
+        return month_key(day)
+    if unit == "quarter":
+        return f"{day.year:04d}-Q{(day.month + 2) // 3}"
+    raise ValueError(f"unit must be one of {', '.join(BUCKET_UNITS)}")
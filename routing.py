@@ -0,0 +1,115 @@
+"""Routing of report reads to a read replica, with read-your-writes pinning."""
+
+import time
+
+from flask import current_app, has_request_context, request
+from flask import session as cookie_session
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+REPLICA_BIND = "replica"
+# Flask session key holding the time until which the user reads the primary.
+PIN_KEY = "_replica_pin"
+
+
+class RoutingSession(FlaskSession):
+    """
+    db.session class that lets the ReplicaRouter pick the engine of reads.
+
+    Flushes and INSERT, UPDATE and DELETE statements always use the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        writes = self._flushing or getattr(clause, "is_dml", False)
+        if bind is None and not writes:
+            router = current_app.extensions.get("replica_router")
+            replica = router and router.replica_for(self, self._db.engines)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+    """
+    Flask extension sending the queries of report views to a read replica.
+
+    Views decorated with ``reads`` read from the ``replica`` bind, when one is
+    configured, unless what they read may include the user's own recent
+    writes:
+
+    - Once a session has written anything, every later query of that
+      session goes to the primary.
+    - Where a replica is configured, a commit that wrote records in the
+      user's Flask session a time ``REPLICA_PIN_SECONDS`` (default 5)
+      ahead. Until then all of the user's reads go to the primary, which
+      covers the replication lag. An added expense therefore shows up in
+      the next report.
+    - Views cached with ``cache.cached`` read the user's data version on
+      the same replica as their response. A response from a replica that
+      lags past the pin is stored under the version it reflects, which no
+      longer matches once the replica catches up.
+
+    Raw connections for streamed exports follow the same rules when taken
+    from ``db.session.get_bind()``.
+    """
+
+    def __init__(self, app=None):
+        self._views = set()
+        event.listen(Session, "after_flush", self._after_flush)
+        event.listen(Session, "do_orm_execute", self._on_execute)
+        event.listen(Session, "after_commit", self._after_commit)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configure the router for an application."""
+        app.config.setdefault("REPLICA_PIN_SECONDS", 5)
+        app.extensions["replica_router"] = self
+
+    def reads(self, view):
+        """Decorate a view so its queries may be served by the replica."""
+        self._views.add(f"{view.__module__}.{view.__name__}")
+        return view
+
+    def replica_for(self, session, engines):
+        """
+        Return the replica engine if the session's next read may use it.
+
+        :param session: The session about to execute a query.
+        :param engines: The application's engines by bind key.
+        :return: The replica engine, or None to read from the primary.
+        """
+        replica = engines.get(REPLICA_BIND)
+        if replica is None or session.info.get("wrote") or not has_request_context():
+            return None
+        view = current_app.view_functions.get(request.endpoint)
+        if view is None or f"{view.__module__}.{view.__name__}" not in self._views:
+            return None
+        if cookie_session.get(PIN_KEY, 0) > time.time():
+            return None
+        return replica
+
+    @staticmethod
+    def _after_flush(session, flush_context):
+        session.info["wrote"] = True
+
+    @staticmethod
+    def _on_execute(orm_execute_state):
+        if (
+            orm_execute_state.is_insert
+            or orm_execute_state.is_update
+            or orm_execute_state.is_delete
+        ):
+            orm_execute_state.session.info["wrote"] = True
+
+    def _after_commit(self, session):
+        if not (session.info.get("wrote") and has_request_context()):
+            return
+        # Users of an app without a replica read the primary anyway.
+        if current_app.extensions.get("replica_router") is not self:
+            return
+        engines = current_app.extensions["sqlalchemy"].engines
+        pin_seconds = current_app.config["REPLICA_PIN_SECONDS"]
+        if REPLICA_BIND in engines and pin_seconds:
+            cookie_session[PIN_KEY] = time.time() + pin_seconds
@@ -1,5 +1,8 @@
 // Global variables
 let expenseCategoryChart = null;
+// Date range and next page of the transactions listed on the reports page
+let reportQuery = null;
+let reportCursor = null;
 
 document.addEventListener("DOMContentLoaded", function () {
   // Function to get the current page name from the URL
@@ -14,11 +17,10 @@ document.addEventListener("DOMContentLoaded", function () {
   // Functions to run on the home page (index)
   if (currentPage === "" || currentPage === "index") {
     if (document.getElementById("summary")) {
-      fetchSummaryData();
-      fetchRecentTransactions();
+      fetchDashboard();
+      setupTransactionTables();
       createSpendingPatternChart();
-      checkBudgetAlerts();
-      setInterval(checkBudgetAlerts, 3600000); // Check every hour
+      subscribeToBudgetAlerts();
     }
   }
 
@@ -37,6 +39,9 @@ document.addEventListener("DOMContentLoaded", function () {
       document
         .getElementById("update-report")
         .addEventListener("click", updateReport);
+      document
+        .getElementById("load-more-report")
+        .addEventListener("click", loadMoreReportTransactions);
 
       // Initial report load
       updateReport();
@@ -54,44 +59,114 @@ function formatDate(date) {
   return `${yyyy}-${mm}-${dd}`;
 }
 
-function fetchSummaryData() {
-  fetch("/api/summary")
+// Summary, recent transactions and budget alerts arrive in one request; the
+// browser revalidates it with the ETag and reuses its copy on a 304.
+function fetchDashboard() {
+  fetch("/api/dashboard")
     .then((response) => response.json())
     .then((data) => {
-      document.getElementById(
-        "total-income"
-      ).textContent = `KSH ${data.total_income.toFixed(2)}`;
-      document.getElementById(
-        "total-expenses"
-      ).textContent = `KSH ${data.total_expenses.toFixed(2)}`;
-      document.getElementById("balance").textContent = `KSH ${(
-        data.total_income - data.total_expenses
-      ).toFixed(2)}`;
-
-      createExpenseChart(data.expense_categories);
+      renderSummary(data.summary);
+      renderRecentTransactions(data.recent_transactions.transactions);
+      renderBudgetAlerts(data.budget_alerts);
     })
-    .catch((error) => console.error("Error fetching summary data:", error));
+    .catch((error) => console.error("Error fetching dashboard data:", error));
 }
 
-function fetchRecentTransactions() {
-  fetch("/api/recent_transactions")
-    .then((response) => response.json())
-    .then((data) => {
-      const tbody = document.querySelector("#recent-transactions tbody");
-      tbody.innerHTML = "";
-      data.forEach((transaction) => {
-        const row = tbody.insertRow();
-        row.insertCell(0).textContent = new Date(
-          transaction.date
-        ).toLocaleDateString();
-        row.insertCell(1).textContent = transaction.type;
-        row.insertCell(2).textContent = `KSH ${transaction.amount.toFixed(2)}`;
-        row.insertCell(3).textContent = transaction.description;
-      });
-    })
-    .catch((error) =>
-      console.error("Error fetching recent transactions:", error)
-    );
+function renderSummary(data) {
+  document.getElementById(
+    "total-income"
+  ).textContent = `KSH ${data.total_income.toFixed(2)}`;
+  document.getElementById(
+    "total-expenses"
+  ).textContent = `KSH ${data.total_expenses.toFixed(2)}`;
+  document.getElementById("balance").textContent = `KSH ${(
+    data.total_income - data.total_expenses
+  ).toFixed(2)}`;
+
+  createExpenseChart(data.expense_categories);
+}
+
+function renderRecentTransactions(transactions) {
+  const tbody = document.querySelector("#recent-transactions tbody");
+  tbody.innerHTML = "";
+  transactions.forEach((transaction) => {
+    const row = tbody.insertRow();
+    row.insertCell(0).textContent = new Date(
+      transaction.date
+    ).toLocaleDateString();
+    row.insertCell(1).textContent = transaction.type;
+    row.insertCell(2).textContent = `KSH ${transaction.amount.toFixed(2)}`;
+    row.insertCell(3).textContent = transaction.description;
+  });
+}
+
+function setupTransactionTables() {
+  document.querySelectorAll(".load-more").forEach((button) => {
+    const table = document.getElementById(button.dataset.table);
+    let cursor = null;
+
+    const loadPage = () => {
+      const params = new URLSearchParams({ type: table.dataset.type });
+      if (cursor) {
+        params.set("cursor", cursor);
+      }
+      button.disabled = true;
+      fetch(`/api/transactions?${params}`)
+        .then((response) => {
+          if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+          }
+          return response.json();
+        })
+        .then((data) => {
+          data.transactions.forEach((transaction) =>
+            appendTransactionRow(table, transaction)
+          );
+          cursor = data.next_cursor;
+          button.hidden = !cursor;
+          feather.replace();
+        })
+        .catch((error) => console.error("Error fetching transactions:", error))
+        .finally(() => {
+          button.disabled = false;
+        });
+    };
+
+    button.addEventListener("click", loadPage);
+    loadPage();
+  });
+}
+
+function appendTransactionRow(table, transaction) {
+  const row = table.querySelector("tbody").insertRow();
+  row.insertCell().textContent = transaction.date;
+  row.insertCell().textContent = `KSH ${transaction.amount.toFixed(2)}`;
+  row.insertCell().textContent = transaction.description;
+  if (transaction.type === "Expense") {
+    row.insertCell().textContent = transaction.category;
+  }
+
+  const actions = row.insertCell();
+  const edit = document.createElement("a");
+  edit.href = transaction.edit_url;
+  edit.className = "btn btn-sm btn-primary";
+  edit.innerHTML = '<i data-feather="edit"></i> Edit';
+  actions.appendChild(edit);
+
+  const form = document.createElement("form");
+  form.action = transaction.delete_url;
+  form.method = "POST";
+  form.className = "d-inline";
+  form.innerHTML =
+    '<button type="submit" class="btn btn-sm btn-danger">' +
+    '<i data-feather="trash-2"></i> Delete</button>';
+  const kind = transaction.type.toLowerCase();
+  form.addEventListener("submit", (event) => {
+    if (!confirm(`Are you sure you want to delete this ${kind}?`)) {
+      event.preventDefault();
+    }
+  });
+  actions.appendChild(form);
 }
 
 function createExpenseChart(categories) {
@@ -125,10 +200,13 @@ function createExpenseChart(categories) {
 }
 
 function updateReport() {
-  const startDate = document.getElementById("start-date").value || "";
-  const endDate = document.getElementById("end-date").value || "";
+  reportQuery = new URLSearchParams({
+    start_date: document.getElementById("start-date").value || "",
+    end_date: document.getElementById("end-date").value || "",
+    transactions: "1",
+  });
 
-  fetch(`/api/report_data?start_date=${startDate}&end_date=${endDate}`)
+  fetch(`/api/report_data?${reportQuery}`)
     .then((response) => {
       if (!response.ok) {
         throw new Error(`HTTP error! status: ${response.status}`);
@@ -160,6 +238,7 @@ function updateReport() {
       // Update transactions table
       if (Array.isArray(data.transactions)) {
         populateTransactionsTable(data.transactions);
+        setReportCursor(data.next_cursor);
       } else {
         console.error("Transactions data is not an array:", data.transactions);
       }
@@ -254,9 +333,42 @@ function updateExpenseCategoryChart(categories) {
   });
 }
 
+// Later pages keep the date range of the report they continue, even if the
+// inputs were changed without updating the report.
+function loadMoreReportTransactions() {
+  const button = document.getElementById("load-more-report");
+  const params = new URLSearchParams(reportQuery);
+  params.set("cursor", reportCursor);
+  button.disabled = true;
+  fetch(`/api/report_data?${params}`)
+    .then((response) => {
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+      return response.json();
+    })
+    .then((data) => {
+      appendTransactionRows(data.transactions);
+      setReportCursor(data.next_cursor);
+    })
+    .catch((error) => console.error("Error fetching transactions:", error))
+    .finally(() => {
+      button.disabled = false;
+    });
+}
+
+function setReportCursor(cursor) {
+  reportCursor = cursor;
+  document.getElementById("load-more-report").hidden = !cursor;
+}
+
 function populateTransactionsTable(transactions) {
+  document.querySelector("#transactions tbody").innerHTML = "";
+  appendTransactionRows(transactions);
+}
+
+function appendTransactionRows(transactions) {
   const tbody = document.querySelector("#transactions tbody");
-  tbody.innerHTML = "";
   transactions.forEach((transaction) => {
     const row = tbody.insertRow();
     row.insertCell(0).textContent = new Date(
@@ -397,6 +509,40 @@ function createSpendingPatternChart() {
     });
 }
 
+function subscribeToBudgetAlerts() {
+  if (!window.EventSource) {
+    // Fall back to polling in browsers without Server-Sent Events; the
+    // dashboard request already rendered the current alerts
+    setInterval(checkBudgetAlerts, 3600000); // Check every hour
+    return;
+  }
+  // The browser reconnects automatically if the stream drops
+  const source = new EventSource("/api/budget_alerts/stream");
+  source.addEventListener("alerts", (event) => {
+    renderBudgetAlerts(JSON.parse(event.data));
+  });
+}
+
+function renderBudgetAlerts(alerts) {
+  const alertContainer = document.getElementById("budget-alerts");
+  if (!alertContainer) {
+    console.error("Budget alerts container not found");
+    return;
+  }
+  alertContainer.innerHTML = "";
+  alerts.forEach((alert) => {
+    const alertElement = document.createElement("div");
+    alertElement.className = "alert alert-warning";
+    alertElement.textContent =
+      `Warning: You've exceeded your budget for ${alert.category}. ` +
+      `Limit: KSH ${alert.limit.toFixed(
+        2
+      )}, Spent: KSH ${alert.spent.toFixed(2)} ` +
+      `(${alert.percentage.toFixed(1)}%)`;
+    alertContainer.appendChild(alertElement);
+  });
+}
+
 function checkBudgetAlerts() {
   fetch("/api/check_budget_alerts")
     .then((response) => {
@@ -405,25 +551,7 @@ function checkBudgetAlerts() {
       }
       return response.json();
     })
-    .then((alerts) => {
-      const alertContainer = document.getElementById("budget-alerts");
-      if (!alertContainer) {
-        console.error("Budget alerts container not found");
-        return;
-      }
-      alertContainer.innerHTML = "";
-      alerts.forEach((alert) => {
-        const alertElement = document.createElement("div");
-        alertElement.className = "alert alert-warning";
-        alertElement.textContent =
-          `Warning: You've exceeded your budget for ${alert.category}. ` +
-          `Limit: KSH ${alert.limit.toFixed(
-            2
-          )}, Spent: KSH ${alert.spent.toFixed(2)} ` +
-          `(${alert.percentage.toFixed(1)}%)`;
-        alertContainer.appendChild(alertElement);
-      });
-    })
+    .then(renderBudgetAlerts)
     .catch((error) => {
       console.error("Error checking budget alerts:", error);
       const alertContainer = document.getElementById("budget-alerts");
@@ -0,0 +1,217 @@
+"""Synthetic, seasonal income and expense history for load tests and benchmarks."""
+
+import random
+from datetime import date, timedelta
+
+from sqlalchemy import func, insert
+from werkzeug.security import generate_password_hash
+
+from extensions import db
+from models.budget import (
+    Category,
+    DailyBalance,
+    Expense,
+    Income,
+    MonthlyCategorySpend,
+    User,
+    month_key,
+)
+
+SYNTHETIC_PASSWORD = "password123"
+
+# Everyday spending: share of a user's rows, KSH range and seasonal factors
+# by month number, which scale both how often and how much is spent.
+DISCRETIONARY = {
+    "Food": (0.45, 150, 3000, {12: 1.3}),
+    "Transportation": (0.2, 50, 1500, {}),
+    "Entertainment": (0.15, 500, 6000, {6: 1.3, 7: 1.4, 8: 1.3, 12: 1.5}),
+    "Shopping": (0.15, 1000, 15000, {11: 1.8, 12: 2.0}),
+    "Health": (0.05, 500, 10000, {1: 1.3, 7: 1.2}),
+}
+
+# Monthly bills: day of the month, KSH range and seasonal factors.
+RECURRING = {
+    "Rent": (1, 15000, 60000, {}),
+    "Utilities": (5, 2000, 8000, {1: 1.4, 2: 1.3, 12: 1.3}),
+}
+
+
+def _cents(rng, low, high, factor=1.0):
+    return int(rng.randint(low * 100, high * 100) * factor)
+
+
+def _months(start, end):
+    """Yield the first day of every month from start's month to end's."""
+    day = start.replace(day=1)
+    while day <= end:
+        yield day
+        day = (day + timedelta(days=32)).replace(day=1)
+
+
+def ensure_categories():
+    """Create any missing synthetic categories and return {name: id}."""
+    names = [*DISCRETIONARY, *RECURRING]
+    existing = {c.name for c in Category.query.filter(Category.name.in_(names))}
+    for name in names:
+        if name not in existing:
+            db.session.add(Category(name=name))
+    db.session.commit()
+    return dict(
+        db.session.query(Category.name, Category.id).filter(Category.name.in_(names))
+    )
+
+
+def _user_history(rng, user_id, category_ids, rows, start, end):
+    """Return the (incomes, expenses) rows of one user's history."""
+    incomes, expenses = [], []
+    salary = _cents(rng, 60000, 300000)
+    bills = {
+        name: _cents(rng, low, high) for name, (_, low, high, _) in RECURRING.items()
+    }
+    for month in _months(start, end):
+        payday = month.replace(day=25)
+        if start <= payday <= end:
+            incomes.append(
+                {"amount_cents": salary, "source": "Salary", "date": payday}
+            )
+        if rng.random() < 0.2:
+            incomes.append(
+                {
+                    "amount_cents": _cents(rng, 5000, 40000),
+                    "source": "Freelance",
+                    "date": month.replace(day=rng.randint(1, 28)),
+                }
+            )
+        for name, (day, _, _, season) in RECURRING.items():
+            due = month.replace(day=day)
+            if not start <= due <= end:
+                continue
+            expenses.append(
+                {
+                    "amount_cents": int(bills[name] * season.get(month.month, 1.0)),
+                    "description": f"{name} {month_key(due)}",
+                    "date": due,
+                    "category_id": category_ids[name],
+                }
+            )
+
+    names = list(DISCRETIONARY)
+    weights = [DISCRETIONARY[name][0] for name in names]
+    span = (end - start).days
+    while len(expenses) < rows:
+        name = rng.choices(names, weights)[0]
+        _, low, high, season = DISCRETIONARY[name]
+        day = start + timedelta(days=rng.randint(0, span))
+        factor = season.get(day.month, 1.0)
+        # Rejection sampling makes busy months proportionally more frequent.
+        if rng.random() * 2.0 > factor:
+            continue
+        expenses.append(
+            {
+                "amount_cents": _cents(rng, low, high, factor),
+                "description": f"{name} purchase",
+                "date": day,
+                "category_id": category_ids[name],
+            }
+        )
+
+    for row in incomes + expenses:
+        row["user_id"] = user_id
+    return incomes, expenses[:rows]
+
+
+def seed_synthetic(users, rows_per_user, months=12, seed=42, batch_size=5000):
+    """
+    Create users with a realistic, seasonal history of incomes and expenses.
+
+    Every user gets a monthly salary, occasional freelance income, rent and
+    utility bills, and everyday spending that peaks in holiday months. Rows
+    are bulk inserted in batches together with their monthly category
+    rollups and daily balances, and the run is reproducible for a given seed.
+
+    :param users: Number of users to create, named synthetic0, synthetic1...
+    :param rows_per_user: Number of expenses per user, bills included.
+    :param months: Length of the history, ending today.
+    :param seed: Seed of the random generator.
+    :param batch_size: Number of rows sent to the database per INSERT.
+    :return: A dict with the number of users, incomes and expenses created.
+    """
+    rng = random.Random(seed)
+    category_ids = ensure_categories()
+    end = date.today()
+    start = end - timedelta(days=months * 365 // 12)
+
+    first_id = db.session.query(func.max(User.id)).scalar() or 0
+    offset = User.query.filter(User.username.like("synthetic%")).count()
+    password_hash = generate_password_hash(SYNTHETIC_PASSWORD)
+    db.session.execute(
+        insert(User),
+        [
+            {
+                "username": f"synthetic{n}",
+                "email": f"synthetic{n}@example.com",
+                "password_hash": password_hash,
+            }
+            for n in range(offset, offset + users)
+        ],
+    )
+    db.session.commit()
+    user_ids = [
+        user_id
+        for (user_id,) in db.session.query(User.id)
+        .filter(User.id > first_id, User.username.like("synthetic%"))
+        .order_by(User.id)
+    ]
+
+    counts = {"users": len(user_ids), "incomes": 0, "expenses": 0}
+    batches = {Income: [], Expense: [], MonthlyCategorySpend: [], DailyBalance: []}
+
+    def flush():
+        for model, rows in batches.items():
+            if rows:
+                db.session.execute(insert(model), rows)
+                rows.clear()
+        db.session.commit()
+
+    for user_id in user_ids:
+        incomes, expenses = _user_history(
+            rng, user_id, category_ids, rows_per_user, start, end
+        )
+        rollup = {}
+        for row in expenses:
+            key = (row["category_id"], month_key(row["date"]))
+            total, count = rollup.get(key, (0, 0))
+            rollup[key] = (total + row["amount_cents"], count + 1)
+        days = {}
+        for position, rows in enumerate((incomes, expenses)):
+            for row in rows:
+                day = days.setdefault((user_id, row["date"]), [0, 0])
+                day[position] += row["amount_cents"]
+        batches[Income].extend(incomes)
+        batches[Expense].extend(expenses)
+        batches[MonthlyCategorySpend].extend(
+            {
+                "user_id": user_id,
+                "category_id": category_id,
+                "year_month": year_month,
+                "total_cents": total,
+                "count": count,
+            }
+            for (category_id, year_month), (total, count) in rollup.items()
+        )
+        batches[DailyBalance].extend(
+            {
+                "user_id": user,
+                "day": day,
+                "income_cents": income,
+                "expense_cents": expense,
+                "balance_cents": balance,
+            }
+            for user, day, income, expense, balance in DailyBalance.running(days)
+        )
+        counts["incomes"] += len(incomes)
+        counts["expenses"] += len(expenses)
+        if len(batches[Expense]) >= batch_size:
+            flush()
+    flush()
+    return counts
@@ -0,0 +1,84 @@
+"""Tests for the alert broker and the Server-Sent Events alert stream."""
+
+import json
+from itertools import islice
+
+from extensions import alert_broker, db
+from models.budget import BudgetLimit, Category, User
+from pubsub import LocalBroker
+from test_budget_alerts import add_expense
+
+
+def test_local_broker_keeps_the_latest_message_per_subscription():
+    broker = LocalBroker()
+    first, second = broker.subscribe(1), broker.subscribe(1)
+    other = broker.subscribe(2)
+
+    broker.publish(1, "stale")
+    broker.publish(1, "latest")
+
+    assert broker.subscriber_count() == 3
+    assert broker.listen(first, 0) == "latest"
+    assert broker.listen(second, 0) == "latest"
+    assert broker.listen(first, 0) is None
+    assert broker.listen(other, 0) is None
+
+    broker.unsubscribe(1, first)
+    broker.unsubscribe(1, second)
+    assert not broker.has_subscribers(1)
+    assert broker.has_subscribers(2)
+
+
+def read_event(chunks):
+    """Return the data of the next alerts event, skipping a few other lines."""
+    for chunk in islice(chunks, 20):
+        text = chunk.decode()
+        if text.startswith("event: alerts"):
+            return json.loads(text.split("data: ", 1)[1])
+    raise AssertionError("no alerts event in the stream")
+
+
+def test_stream_sends_current_alerts_then_published_ones(client, user):
+    food = Category.query.filter_by(name="Food").one()
+    db.session.add(BudgetLimit(user_id=user.id, category_id=food.id, amount=100))
+    add_expense(user, food, 150)
+    db.session.commit()
+
+    response = client.get("/api/budget_alerts/stream", buffered=False)
+    chunks = iter(response.response)
+
+    assert response.mimetype == "text/event-stream"
+    assert next(chunks).decode() == "retry: 15000\n\n"
+    assert read_event(chunks) == [
+        {"category": "Food", "limit": 100, "spent": 150, "percentage": 150}
+    ]
+    assert alert_broker.has_subscribers(user.id)
+
+    alert_broker.publish(user.id, [])
+    assert read_event(chunks) == []
+
+    response.close()
+    assert not alert_broker.has_subscribers(user.id)
+
+
+def test_stream_picks_up_changes_made_by_other_processes(app, client, user):
+    app.config.update(ALERT_STREAM_HEARTBEAT=0.05)
+    food = Category.query.filter_by(name="Food").one()
+    db.session.add(BudgetLimit(user_id=user.id, category_id=food.id, amount=100))
+    db.session.commit()
+    try:
+        response = client.get("/api/budget_alerts/stream", buffered=False)
+        chunks = iter(response.response)
+        assert read_event(chunks) == []
+
+        # Another worker commits without publishing to this process. The
+        # stream released the session, so the objects are loaded again.
+        user = db.session.get(User, user.id)
+        add_expense(user, Category.query.filter_by(name="Food").one(), 150)
+        User.bump_data_version(user.id)
+        db.session.commit()
+
+        assert read_event(chunks)[0]["spent"] == 150
+        response.close()
+    finally:
+        app.config.update(ALERT_STREAM_HEARTBEAT=15)
@@ -0,0 +1,127 @@
+"""Tests for the NumPy spending analytics."""
+
+from datetime import date, timedelta
+
+from analytics import MIN_ANOMALY_SAMPLES, ExpenseHistory, analyse
+from extensions import db
+from models.budget import Category, Expense
+
+
+def test_analyse_projects_limits_and_flags_anomalies():
+    today = date(2024, 6, 15)
+    rows = []
+    for month in (3, 4, 5):
+        # Rent early in the month, a bill after the 15th.
+        rows.append((len(rows) + 1, date(2024, month, 1), 1, 50000))
+        rows.append((len(rows) + 1, date(2024, month, 20), 1, 10000))
+    rows.append((len(rows) + 1, date(2024, 6, 1), 1, 50000))
+    for day in range(1, 11):
+        rows.append((len(rows) + 1, date(2024, 6, day), 2, 1000 + day))
+    rows.append((len(rows) + 1, date(2024, 6, 12), 2, 90000))
+
+    result = analyse(ExpenseHistory.from_rows(rows), [(1, 55000), (3, 100)], today)
+
+    assert result["months"][0] == "2022-07" and result["months"][-1] == "2024-06"
+    rent = result["categories"][1]
+    assert rent["monthly"][-4:] == [60000, 60000, 60000, 50000]
+    assert rent["rolling_mean"][-2:] == [60000, 56667]
+    # Only March to May are complete months, all with the same spend.
+    assert [rent["seasonality"][month - 1] for month in (2, 3, 4, 5, 6)] == [
+        None,
+        1.0,
+        1.0,
+        1.0,
+        None,
+    ]
+    # The bill after the 15th is projected rather than the rent's daily pace.
+    assert result["projections"] == [(1, 55000, 50000, 60000), (3, 100, 0, 0)]
+    assert [anomaly[0] for anomaly in result["anomalies"]] == [len(rows)]
+    assert result["anomalies"][0][1] == date(2024, 6, 12)
+
+
+def test_outliers_are_scored_against_the_other_expenses():
+    today = date(2024, 6, 15)
+    amounts = [1000, 1010, 990, 1005, 995, 1000, 1000, 5000]
+    assert len(amounts) == MIN_ANOMALY_SAMPLES
+    rows = [
+        (expense_id, date(2024, 6, expense_id), 1, cents)
+        for expense_id, cents in enumerate(amounts, start=1)
+    ]
+    # Identical amounts have no spread; any other amount stands out.
+    rows += [(20 + day, date(2024, 5, day), 2, 700) for day in range(1, 8)]
+    rows.append((30, date(2024, 6, 10), 2, 705))
+
+    result = analyse(ExpenseHistory.from_rows(rows), [], today)
+
+    assert [anomaly[0] for anomaly in result["anomalies"]] == [8, 30]
+
+
+def test_spending_analytics_follows_new_expenses(client, user):
+    food = Category.query.filter_by(name="Food").one()
+    today = date.today().isoformat()
+    client.post("/set_budget_limit", data={"category": food.id, "amount": "100"})
+    client.post(
+        "/add_expense",
+        data={
+            "amount": "20",
+            "description": "Lunch",
+            "category": food.id,
+            "date": today,
+        },
+    )
+    first = client.get("/api/spending_analytics").get_json()
+    assert first["projections"][0]["spent"] == 20
+
+    client.post(
+        "/add_expense",
+        data={
+            "amount": "5",
+            "description": "Coffee",
+            "category": food.id,
+            "date": today,
+        },
+    )
+    second = client.get("/api/spending_analytics").get_json()
+    assert second["projections"][0]["spent"] == 25
+    assert second["categories"]["Food"]["monthly"][-1] == 25
+
+
+def test_spending_analytics_ignores_future_expenses(client, user):
+    food = Category.query.filter_by(name="Food").one()
+    today = date.today()
+    for day, amount in ((today, 20), (today + timedelta(days=400), 999)):
+        db.session.add(
+            Expense(
+                amount=amount,
+                description="Lunch",
+                date=day,
+                category_id=food.id,
+                user_id=user.id,
+            )
+        )
+    db.session.commit()
+
+    response = client.get("/api/spending_analytics")
+
+    assert response.status_code == 200
+    assert sum(response.get_json()["categories"]["Food"]["monthly"]) == 20
+
+
+def test_spending_analytics_follow_category_renames(client, user):
+    food = Category.query.filter_by(name="Food").one()
+    client.post(
+        "/add_expense",
+        data={
+            "amount": "20",
+            "description": "Lunch",
+            "category": food.id,
+            "date": date.today().isoformat(),
+        },
+    )
+    assert "Food" in client.get("/api/spending_analytics").get_json()["categories"]
+
+    food.name = "Groceries"
+    db.session.commit()
+
+    renamed = client.get("/api/spending_analytics").get_json()["categories"]
+    assert list(renamed) == ["Groceries"]
@@ -0,0 +1,108 @@
+"""Tests for the ASGI read-only API on the async engine."""
+
+import asyncio
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from async_api import AsyncAPI, async_database_url
+from extensions import categories, db
+from models.budget import Category, Expense, Income, User
+
+
+async def get(api, path, cookie=None, query=""):
+    """Send one GET request to an ASGI app; return (status, headers, body)."""
+    headers = [(b"cookie", f"session={cookie}".encode())] if cookie else []
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": query.encode(),
+        "headers": headers,
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    await api(scope, receive, send)
+    start, body = messages
+    return start["status"], dict(start["headers"]), body["body"]
+
+
+def test_async_database_url_swaps_in_async_drivers():
+    assert (
+        str(async_database_url("mysql://budget@db/budget"))
+        == "mysql+aiomysql://budget@db/budget"
+    )
+    assert str(async_database_url("sqlite:////tmp/budget.db")) == (
+        "sqlite+aiosqlite:////tmp/budget.db"
+    )
+
+
+def test_async_api_serves_read_views_to_the_flask_session(app, tmp_path):
+    # An in-memory database is private to one connection, so both engines
+    # share a file instead.
+    path = tmp_path / "budget.db"
+    engine = create_engine(f"sqlite:///{path}")
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        user = User(username="tester", email="tester@example.com")
+        food = Category(name="Food")
+        session.add_all([user, food])
+        session.flush()
+        session.add_all(
+            [
+                Income(
+                    amount=1000,
+                    source="Salary",
+                    date=date.today() - timedelta(days=1),
+                    user_id=user.id,
+                ),
+                Expense(
+                    amount="12.50",
+                    description="Lunch",
+                    date=date.today(),
+                    user_id=user.id,
+                    category_id=food.id,
+                ),
+            ]
+        )
+        session.commit()
+        user_id = user.id
+    engine.dispose()
+    categories.invalidate()
+    cookie = app.session_interface.get_signing_serializer(app).dumps(
+        {"_user_id": str(user_id), "_fresh": True}
+    )
+    api = AsyncAPI(app, f"sqlite+aiosqlite:///{path}")
+
+    async def requests():
+        try:
+            return await asyncio.gather(
+                get(api, "/api/summary", cookie),
+                get(api, "/api/recent_transactions", cookie, "limit=1"),
+                get(api, "/api/summary"),
+                get(api, "/logout", cookie),
+            )
+        finally:
+            await api.engine.dispose()
+
+    summary, recent, anonymous, write = asyncio.run(requests())
+
+    assert summary[0] == 200
+    assert summary[1][b"content-type"] == b"application/json"
+    assert app.json.loads(summary[2]) == {
+        "total_income": 1000.0,
+        "total_expenses": 12.5,
+        "expense_categories": {"Food": 12.5},
+    }
+    transactions = app.json.loads(recent[2])["transactions"]
+    assert [row["description"] for row in transactions] == ["Lunch"]
+    assert transactions[0]["category"] == "Food"
+    assert anonymous[0] == 302
+    assert write[0] == 404
@@ -0,0 +1,112 @@
+"""Tests for the budget alert API."""
+
+from datetime import date
+
+from click.testing import CliRunner
+from sqlalchemy import event
+
+from extensions import db, user_cache
+from manage import rebuild_rollups
+from models.budget import BudgetLimit, Category, Expense, MonthlyCategorySpend
+
+
+def add_expense(user, category, amount):
+    """Record an expense for this month, keeping the rollup in step."""
+    db.session.add(
+        Expense(
+            amount=amount,
+            description="Test expense",
+            date=date.today(),
+            user_id=user.id,
+            category_id=category.id,
+        )
+    )
+    MonthlyCategorySpend.record(user.id, category.id, date.today(), amount * 100)
+
+
+def count_queries(client, url, **kwargs):
+    """Return the response and the number of SQL statements a request issued."""
+    statements = []
+
+    def before_cursor_execute(*args):
+        statements.append(args[2])
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(url, **kwargs)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+    return response, len(statements)
+
+
+def test_alerts_report_only_exceeded_limits(client, user):
+    food, transport = Category.query.order_by(Category.name).limit(2).all()
+    db.session.add(BudgetLimit(user_id=user.id, category_id=food.id, amount=100))
+    db.session.add(BudgetLimit(user_id=user.id, category_id=transport.id, amount=100))
+    add_expense(user, food, 150)
+    add_expense(user, transport, 50)
+    db.session.commit()
+
+    alerts = client.get("/api/check_budget_alerts").get_json()
+
+    assert alerts == [
+        {"category": food.name, "limit": 100, "spent": 150, "percentage": 150}
+    ]
+
+
+def test_alert_query_count_is_independent_of_limit_count(client, user, monkeypatch):
+    # Load the session user on every request, as an expired cache entry would.
+    monkeypatch.setattr(user_cache, "ttl", 0)
+    user_cache.invalidate(user.id)
+    categories = Category.query.all()
+    db.session.add(
+        BudgetLimit(user_id=user.id, category_id=categories[0].id, amount=1)
+    )
+    add_expense(user, categories[0], 10)
+    db.session.commit()
+    _, single_limit_queries = count_queries(client, "/api/check_budget_alerts")
+
+    for category in categories[1:]:
+        db.session.add(
+            BudgetLimit(user_id=user.id, category_id=category.id, amount=1)
+        )
+        add_expense(user, category, 10)
+    db.session.commit()
+    response, many_limit_queries = count_queries(client, "/api/check_budget_alerts")
+
+    assert len(response.get_json()) == len(categories)
+    assert many_limit_queries == single_limit_queries
+    # One statement loads the session user, one evaluates every limit.
+    assert many_limit_queries == 2
+
+
+def test_rollup_adds_to_the_month_row_in_one_statement(app, user):
+    food = Category.query.filter_by(name="Food").one()
+    for cents in (1200, 800, -500):
+        MonthlyCategorySpend.record(user.id, food.id, date(2024, 3, 9), cents)
+    MonthlyCategorySpend.record_many({(user.id, food.id, "2024-03"): (300, 1)})
+    db.session.commit()
+
+    (row,) = MonthlyCategorySpend.query.all()
+    assert (row.year_month, row.total_cents, row.count) == ("2024-03", 1800, 4)
+
+
+def test_rebuilt_rollups_reach_the_dashboard(client, user):
+    food = Category.query.filter_by(name="Food").one()
+    db.session.add(BudgetLimit(user_id=user.id, category_id=food.id, amount=100))
+    add_expense(user, food, 50)
+    db.session.commit()
+    # The rollup drifts from the expenses behind the application's back.
+    db.session.execute(db.update(MonthlyCategorySpend).values(total_cents=20000))
+    db.session.commit()
+    drifted = client.get("/api/dashboard")
+    assert drifted.get_json()["budget_alerts"][0]["spent"] == 200
+
+    result = CliRunner().invoke(rebuild_rollups, ["--username", user.username])
+
+    assert result.exit_code == 0, result.output
+    response = client.get(
+        "/api/dashboard", headers={"If-None-Match": drifted.headers["ETag"]}
+    )
+    assert response.status_code == 200
+    assert response.get_json()["budget_alerts"] == []
@@ -0,0 +1,51 @@
+"""Tests for the in-memory category registry."""
+
+import time
+
+from sqlalchemy import event
+
+import categories as registry_module
+from extensions import categories, db
+from models.budget import Category
+
+
+def test_committed_category_changes_reload_the_registry(app, user):
+    version = categories.version
+    assert "Travel" not in categories.ids_by_name()
+
+    db.session.add(Category(name="Travel"))
+    db.session.flush()
+    db.session.rollback()
+    assert categories.version == version
+
+    db.session.add(Category(name="Travel"))
+    db.session.commit()
+    assert categories.version > version
+    assert "Travel" in categories.ids_by_name()
+
+
+def test_changes_from_other_processes_show_after_the_ttl(app, user, monkeypatch):
+    assert "Travel" not in categories.ids_by_name()
+    # A core insert bypasses the ORM events, as another process's would.
+    db.session.execute(db.insert(Category).values(name="Travel"))
+    db.session.commit()
+    assert "Travel" not in categories.ids_by_name()
+
+    expired = time.monotonic() + categories.ttl + 1
+    monkeypatch.setattr(registry_module.time, "monotonic", lambda: expired)
+    assert "Travel" in categories.ids_by_name()
+
+
+def test_unknown_ids_reload_the_categories_once(app, user):
+    categories.names()
+    statements = []
+
+    def before_cursor_execute(*args):
+        statements.append(args[2])
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        assert [categories.name(999) for _ in range(5)] == [None] * 5
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+    assert len(statements) == 1
@@ -0,0 +1,80 @@
+"""Tests for the columnar Arrow and Parquet export."""
+
+from datetime import date
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from columnar import export_dataset
+from extensions import db
+from models.budget import Category, Expense, Income
+
+
+def add_entries(user):
+    food = Category.query.filter_by(name="Food").one()
+    for day in (date(2024, 1, 5), date(2024, 1, 20), date(2024, 2, 3)):
+        db.session.add(
+            Expense(
+                amount=12,
+                description="Lunch",
+                date=day,
+                user_id=user.id,
+                category_id=food.id,
+            )
+        )
+    db.session.add(
+        Income(amount=1000, source="Salary", date=date(2024, 1, 31), user_id=user.id)
+    )
+    db.session.commit()
+
+
+def test_export_columnar_streams_arrow_batches(client, user):
+    add_entries(user)
+
+    response = client.get("/export_columnar")
+
+    assert response.mimetype == "application/vnd.apache.arrow.stream"
+    table = pa.ipc.open_stream(response.data).read_all()
+    assert table.num_rows == 4
+    assert table.column("type").to_pylist() == ["Income"] + ["Expense"] * 3
+    assert table.column("category").to_pylist() == [None, "Food", "Food", "Food"]
+    assert table.column("amount_cents").to_pylist() == [100000, 1200, 1200, 1200]
+
+
+def test_export_dataset_partitions_by_user_and_month(app, user, tmp_path):
+    add_entries(user)
+
+    report = export_dataset(str(tmp_path), batch_size=2)
+
+    assert (report.rows, report.files) == (4, 3)
+    assert (tmp_path / f"user_id={user.id}" / "year_month=2024-01").is_dir()
+    table = (
+        ds.dataset(tmp_path, format="parquet", partitioning="hive")
+        .to_table()
+        .sort_by("id")
+    )
+    expenses = table.filter(ds.field("type") == "Expense")
+    assert expenses.column("year_month").to_pylist() == [
+        "2024-01",
+        "2024-01",
+        "2024-02",
+    ]
+    assert expenses.column("date").to_pylist()[-1] == date(2024, 2, 3)
+
+
+def test_export_dataset_replaces_an_earlier_export(app, user, tmp_path):
+    add_entries(user)
+    export_dataset(str(tmp_path))
+    (tmp_path / "README").write_text("kept")
+    Expense.query.filter_by(date=date(2024, 2, 3)).delete()
+    db.session.commit()
+
+    report = export_dataset(str(tmp_path))
+
+    assert (report.rows, report.files) == (3, 2)
+    assert not (tmp_path / f"user_id={user.id}" / "year_month=2024-02").exists()
+    assert (tmp_path / "README").read_text() == "kept"
+    dataset = ds.dataset(
+        tmp_path / f"user_id={user.id}", format="parquet", partitioning="hive"
+    )
+    assert dataset.count_rows() == 3
@@ -0,0 +1,97 @@
+"""Tests for the daily balance series."""
+
+from datetime import date
+
+from extensions import db
+from models.budget import Category, DailyBalance, Expense, Income
+
+
+def post_expense(client, amount, day):
+    food = Category.query.filter_by(name="Food").one()
+    return client.post(
+        "/add_expense",
+        data={
+            "amount": amount,
+            "description": "Groceries",
+            "category": food.id,
+            "date": day.isoformat(),
+        },
+    )
+
+
+def test_routes_keep_series_consistent_with_backdated_edits(client, user):
+    client.post(
+        "/add_income", data={"amount": "100", "source": "Pay", "date": "2024-03-05"}
+    )
+    post_expense(client, "30", date(2024, 3, 7))
+    # Backdated entries shift the balance of every later day.
+    post_expense(client, "10", date(2024, 3, 1))
+    income = Income.query.one()
+    client.post(
+        f"/edit_income/{income.id}",
+        data={"amount": "80", "source": "Pay", "date": "2024-03-06"},
+    )
+    expense = Expense.query.filter_by(date=date(2024, 3, 7)).one()
+    client.post(f"/delete_expense/{expense.id}")
+
+    assert DailyBalance.check(user.id) == []
+    series = DailyBalance.series(user.id, date(2024, 3, 1), date(2024, 3, 7))
+    assert series["income"] == [0, 0, 0, 0, 0, 8000, 0]
+    assert series["expenses"] == [1000, 0, 0, 0, 0, 0, 0]
+    assert series["balance"] == [-1000] * 5 + [7000] * 2
+
+
+def test_check_reports_drift_and_rebuild_repairs_it(app, user):
+    food = Category.query.filter_by(name="Food").one()
+    db.session.add(
+        Expense(
+            amount=12,
+            description="Unrecorded",
+            date=date(2024, 1, 2),
+            category_id=food.id,
+            user_id=user.id,
+        )
+    )
+    db.session.commit()
+
+    assert DailyBalance.check(user.id) == [
+        (user.id, date(2024, 1, 2), None, (0, 1200, -1200))
+    ]
+    assert DailyBalance.rebuild(user.id) == 1
+    assert DailyBalance.check(user.id) == []
+
+
+def test_daily_balance_api_returns_dense_arrays(client, user):
+    post_expense(client, "12.50", date(2024, 2, 2))
+
+    data = client.get(
+        "/api/daily_balance?start_date=2024-02-01&end_date=2024-02-03"
+    ).get_json()
+
+    assert data == {
+        "dates": ["2024-02-01", "2024-02-02", "2024-02-03"],
+        "income": [0, 0, 0],
+        "expenses": [0, 12.5, 0],
+        "balance": [0, -12.5, -12.5],
+    }
+    bad_range = "/api/daily_balance?start_date=2024-02-03&end_date=2024-02-01"
+    assert client.get(bad_range).status_code == 400
+
+
+def test_record_upserts_days_and_shifts_later_balances(app, user):
+    for day, income, expense in (
+        (date(2024, 1, 5), 0, 300),
+        (date(2024, 1, 5), 1000, 0),
+        (date(2024, 1, 3), 0, 200),
+    ):
+        DailyBalance.record(user.id, day, income_cents=income, expense_cents=expense)
+    db.session.commit()
+
+    rows = DailyBalance.query.order_by(DailyBalance.day).all()
+    assert [
+        (row.day, row.income_cents, row.expense_cents, row.balance_cents)
+        for row in rows
+    ] == [
+        (date(2024, 1, 3), 0, 200, -200),
+        (date(2024, 1, 5), 1000, 300, 500),
+    ]
@@ -0,0 +1,178 @@
+"""Tests for the dashboard and recent transactions APIs."""
+
+from datetime import date
+
+from extensions import db
+from models.budget import Category, Expense, Income, User
+from test_budget_alerts import count_queries
+
+
+def test_dashboard_combines_summary_transactions_and_alerts(client, user):
+    db.session.add(
+        Income(amount=500, source="Salary", date=date.today(), user_id=user.id)
+    )
+    db.session.commit()
+
+    response = client.get("/api/dashboard")
+    data = response.get_json()
+
+    assert response.status_code == 200
+    assert response.headers["ETag"]
+    assert data["summary"] == client.get("/api/summary").get_json()
+    assert data["recent_transactions"] == (
+        client.get("/api/recent_transactions").get_json()
+    )
+    assert data["budget_alerts"] == []
+
+
+def test_cached_responses_follow_changes_made_by_other_processes(client, user):
+    assert client.get("/api/summary").get_json()["total_income"] == 0
+    # Another worker or the CLI commits without reaching this process's cache.
+    db.session.add(
+        Income(amount=500, source="Salary", date=date.today(), user_id=user.id)
+    )
+    User.bump_data_version(user.id)
+    db.session.commit()
+
+    assert client.get("/api/summary").get_json()["total_income"] == 500
+
+
+def test_dashboard_returns_304_until_data_changes(client, user):
+    etag = client.get("/api/dashboard").headers["ETag"]
+
+    response, queries = count_queries(
+        client, "/api/dashboard", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.get_data() == b""
+    # Only the data version is read.
+    assert queries == 1
+
+    food = Category.query.filter_by(name="Food").one()
+    client.post(
+        "/add_expense",
+        data={
+            "amount": "12.50",
+            "description": "Lunch",
+            "category": food.id,
+            "date": date.today().isoformat(),
+        },
+    )
+
+    response = client.get("/api/dashboard", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert Expense.query.count() == 1
+
+
+def test_recent_transactions_merge_newest_first_and_resume_from_cursor(client, user):
+    food = Category.query.filter_by(name="Food").one()
+    for day, amount in [(1, 10), (3, 30)]:
+        db.session.add(
+            Income(amount=amount, source="Pay", date=date(2024, 5, day), user=user)
+        )
+    db.session.add(
+        Expense(
+            amount=20,
+            description="Lunch",
+            date=date(2024, 5, 2),
+            category_id=food.id,
+            user_id=user.id,
+        )
+    )
+    db.session.commit()
+
+    data = client.get("/api/recent_transactions?limit=2").get_json()
+    assert [(t["date"], t["type"]) for t in data["transactions"]] == [
+        ("2024-05-03", "Income"),
+        ("2024-05-02", "Expense"),
+    ]
+
+    db.session.add(
+        Expense(
+            amount=5,
+            description="Coffee",
+            date=date(2024, 5, 4),
+            category_id=food.id,
+            user_id=user.id,
+        )
+    )
+    db.session.commit()
+
+    since = data["latest_cursor"]
+    newer = client.get(f"/api/recent_transactions?since={since}").get_json()
+    assert [t["description"] for t in newer["transactions"]] == ["Coffee"]
+    assert newer["latest_cursor"] != since
+
+    unchanged = client.get(
+        f"/api/recent_transactions?since={newer['latest_cursor']}"
+    ).get_json()
+    assert unchanged == {
+        "transactions": [],
+        "latest_cursor": newer["latest_cursor"],
+        "has_more": False,
+    }
+    assert client.get("/api/recent_transactions?since=x").status_code == 400
+
+
+def test_recent_transactions_since_pages_through_more_rows_than_the_limit(
+    client, user
+):
+    db.session.add(Income(amount=1, source="Old", date=date(2024, 5, 1), user=user))
+    db.session.commit()
+    since = client.get("/api/recent_transactions").get_json()["latest_cursor"]
+    for day in range(2, 7):
+        db.session.add(
+            Income(amount=day, source=f"Day {day}", date=date(2024, 5, day), user=user)
+        )
+    db.session.commit()
+
+    pages = []
+    has_more = True
+    while has_more:
+        data = client.get(f"/api/recent_transactions?since={since}&limit=2").get_json()
+        pages.append([t["description"] for t in data["transactions"]])
+        since, has_more = data["latest_cursor"], data["has_more"]
+
+    # Each page is newest first and the client prepends it to what it shows.
+    assert pages == [["Day 3", "Day 2"], ["Day 5", "Day 4"], ["Day 6"]]
+
+
+def test_transaction_pages_of_one_cover_same_day_incomes_and_expenses(client, user):
+    food = Category.query.filter_by(name="Food").one()
+    day = date(2024, 5, 1)
+    # Incomes and expenses share ids 1 to 3, all on one day.
+    for _ in range(3):
+        db.session.add(Income(amount=10, source="Pay", date=day, user=user))
+        db.session.add(
+            Expense(
+                amount=5,
+                description="Lunch",
+                date=day,
+                category_id=food.id,
+                user_id=user.id,
+            )
+        )
+    db.session.add(
+        Income(amount=1, source="Earlier", date=date(2024, 4, 30), user=user)
+    )
+    db.session.commit()
+
+    seen = []
+    url = "/api/transactions?limit=1"
+    while url:
+        data = client.get(url).get_json()
+        assert len(data["transactions"]) <= 1
+        seen += [(t["date"], t["id"], t["type"]) for t in data["transactions"]]
+        cursor = data["next_cursor"]
+        url = f"/api/transactions?limit=1&cursor={cursor}" if cursor else None
+
+    assert seen == [
+        ("2024-05-01", 3, "Income"),
+        ("2024-05-01", 3, "Expense"),
+        ("2024-05-01", 2, "Income"),
+        ("2024-05-01", 2, "Expense"),
+        ("2024-05-01", 1, "Income"),
+        ("2024-05-01", 1, "Expense"),
+        ("2024-04-30", 4, "Income"),
+    ]
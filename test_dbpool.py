@@ -0,0 +1,60 @@
+"""Tests for the timed connection pool, its metrics and the engine options."""
+
+import pytest
+from flask import Flask
+from sqlalchemy import exc
+
+from config import engine_options
+from dbpool import PoolMetrics, TimedQueuePool
+from extensions import db
+
+
+def test_pool_metrics_count_checkouts_waits_and_timeouts(tmp_path):
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'pool.db'}",
+        SQLALCHEMY_ENGINE_OPTIONS={
+            "poolclass": TimedQueuePool,
+            "pool_size": 1,
+            "max_overflow": 0,
+            # Flask-SQLAlchemy builds engines through engine_from_config, which
+            # coerces pool_timeout to an int, so the shortest wait is a second.
+            "pool_timeout": 1,
+        },
+    )
+    db.init_app(app)
+    metrics = PoolMetrics(app)
+    with app.app_context():
+        engine = db.engine
+
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        busy = metrics.stats()["default"]
+    idle = metrics.stats()["default"]
+
+    assert busy["pool"] == "TimedQueuePool"
+    assert (busy["connects"], busy["checkouts"], busy["checkins"]) == (1, 1, 0)
+    assert (busy["size"], busy["checked_out"]) == (1, 1)
+    assert (busy["waits"], busy["timeouts"]) == (2, 1)
+    assert 1 <= busy["max_wait_seconds"] <= busy["wait_seconds"] < 2
+    assert (idle["checkins"], idle["checked_in"], idle["checked_out"]) == (1, 1, 0)
+
+
+def test_engine_options_size_server_pools_from_the_environment(monkeypatch):
+    assert engine_options("sqlite:////tmp/budget.db") == {}
+    assert engine_options(None) == {}
+
+    monkeypatch.setenv("DB_POOL_SIZE", "3")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "no")
+    options = engine_options("mysql://budget@db/budget")
+
+    assert options == {
+        "poolclass": TimedQueuePool,
+        "pool_size": 3,
+        "max_overflow": 20,
+        "pool_timeout": 30,
+        "pool_recycle": 1800,
+        "pool_pre_ping": False,
+        "connect_args": {"connect_timeout": 10},
+    }
@@ -0,0 +1,92 @@
+"""Tests for the streamed CSV and NDJSON export."""
+
+from datetime import date
+
+from extensions import db
+from models.budget import Category, Expense, Income
+
+
+def add_rows(user):
+    food = Category.query.filter_by(name="Food").one()
+    rent = Category.query.filter_by(name="Rent").one()
+    db.session.add_all(
+        [
+            Income(amount="1000.10", source="Salary", date=date(2024, 5, 2), user=user),
+            Income(amount=50, source="Refund", date=date(2024, 5, 1), user=user),
+            Expense(
+                amount="12.05",
+                description='Lunch, "big"',
+                date=date(2024, 5, 2),
+                category_id=food.id,
+                user_id=user.id,
+            ),
+            Expense(
+                amount=800,
+                description="Rent",
+                date=date(2024, 4, 30),
+                category_id=rent.id,
+                user_id=user.id,
+            ),
+        ]
+    )
+    db.session.commit()
+
+
+def test_csv_export_merges_incomes_and_expenses_by_date(client, user):
+    add_rows(user)
+
+    response = client.get("/export_data")
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    assert response.get_data(as_text=True).splitlines() == [
+        "Date,Type,Amount,Description,Category",
+        "2024-04-30,Expense,800.00,Rent,Rent",
+        "2024-05-01,Income,50.00,Refund,",
+        "2024-05-02,Income,1000.10,Salary,",
+        '2024-05-02,Expense,12.05,"Lunch, ""big""",Food',
+    ]
+
+
+def test_ndjson_export_writes_amounts_as_numbers(client, user):
+    add_rows(user)
+
+    response = client.get("/export_data?format=ndjson")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = response.get_data(as_text=True).splitlines()
+    assert lines[2] == (
+        '{"amount": 1000.1, "category": "", "date": "2024-05-02", '
+        '"description": "Salary", "type": "Income"}'
+    )
+    assert [client.application.json.loads(line) for line in lines] == [
+        {
+            "date": "2024-04-30",
+            "type": "Expense",
+            "amount": 800,
+            "description": "Rent",
+            "category": "Rent",
+        },
+        {
+            "date": "2024-05-01",
+            "type": "Income",
+            "amount": 50,
+            "description": "Refund",
+            "category": "",
+        },
+        {
+            "date": "2024-05-02",
+            "type": "Income",
+            "amount": 1000.1,
+            "description": "Salary",
+            "category": "",
+        },
+        {
+            "date": "2024-05-02",
+            "type": "Expense",
+            "amount": 12.05,
+            "description": 'Lunch, "big"',
+            "category": "Food",
+        },
+    ]
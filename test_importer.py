@@ -0,0 +1,57 @@
+"""Tests for the bulk CSV importer."""
+
+import io
+from datetime import date
+
+from extensions import db
+from importer import import_csv
+from models.budget import (
+    Category,
+    DailyBalance,
+    Expense,
+    Income,
+    MonthlyCategorySpend,
+    User,
+)
+
+HEADER = "Date,Type,Amount,Description,Category\n"
+ROWS = (
+    "2024-03-01,Income,1000.00,Salary,\n"
+    "2024-03-02,Expense,12.50,Lunch,Food\n"
+    "2024-03-20,Expense,7.50,Dinner,Food\n"
+    "2024-04-01,Expense,800.00,Rent,Rent\n"
+)
+
+
+def test_import_updates_rollups_and_daily_balances(app, user):
+    report = import_csv(io.StringIO(HEADER + ROWS), user.id, batch_size=2)
+
+    assert report.imported
+    assert (report.incomes, report.expenses) == (1, 3)
+    assert Income.query.count() == 1 and Expense.query.count() == 3
+    food = Category.query.filter_by(name="Food").one()
+    assert MonthlyCategorySpend.spent(user.id, food.id, date(2024, 3, 1)) == 2000
+    assert DailyBalance.check(user.id) == []
+    assert DailyBalance.balance_before(user.id, date(2024, 4, 2)) == 100000 - 82000
+    assert db.session.get(User, user.id).data_version == 1
+
+
+def test_import_with_an_invalid_row_writes_nothing(app, user):
+    bad = "2024-03-03,Expense,5.00,Snack,Unknown\n"
+    report = import_csv(io.StringIO(HEADER + ROWS + bad), user.id, batch_size=2)
+
+    assert not report.imported
+    assert report.errors == ["Line 6: unknown category 'Unknown'"]
+    assert Income.query.count() == 0 and Expense.query.count() == 0
+    assert MonthlyCategorySpend.query.count() == 0
+    assert DailyBalance.query.count() == 0
+
+
+def test_dry_run_validates_without_writing(app, user):
+    report = import_csv(io.StringIO(HEADER + ROWS), user.id, dry_run=True)
+
+    assert not report.imported and not report.error_count
+    assert report.rows == 4
+    assert report.summary().startswith("Validated 4 rows")
+    assert Income.query.count() == 0 and Expense.query.count() == 0
+    assert db.session.get(User, user.id).data_version == 0
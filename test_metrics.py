@@ -0,0 +1,31 @@
+"""Tests for the request metrics and operational endpoints."""
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from extensions import request_metrics
+from metrics import RequestMetrics
+
+
+def test_operational_endpoints_are_off_by_default(app, client, monkeypatch):
+    for path in ("/metrics", "/api/cache_stats", "/api/pool_stats"):
+        assert client.get(path).status_code == 404
+
+    monkeypatch.setitem(app.config, "STATS_ENDPOINTS_ENABLED", True)
+    assert client.get("/api/cache_stats").get_json()["backend"] == "LRUBackend"
+    assert client.get("/api/pool_stats").status_code == 200
+    assert client.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(request_metrics, "enabled", True)
+    assert client.get("/metrics").status_code == 200
+
+
+def test_failed_statements_leave_no_start_time_behind():
+    engine = create_engine("sqlite://")
+    RequestMetrics().listen(engine)
+    with engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.execute(text("SELECT * FROM missing"))
+        connection.execute(text("SELECT 1"))
+        assert connection.info["query_started"] == []
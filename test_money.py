@@ -0,0 +1,73 @@
+"""Property tests for exact money storage, aggregation and serialisation."""
+
+import json
+import os
+import random
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from extensions import db
+from models.budget import Category, Expense
+from money import from_cents, to_cents
+
+# Raise to millions to soak-test aggregation, e.g. MONEY_TEST_ROWS=2000000.
+AGGREGATE_ROWS = int(os.environ.get("MONEY_TEST_ROWS", 50000))
+MAX_CENTS = 10**13
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_cents_round_trip(seed):
+    rng = random.Random(seed)
+    for _ in range(10000):
+        cents = rng.randrange(-MAX_CENTS, MAX_CENTS)
+        assert to_cents(from_cents(cents)) == cents
+        assert to_cents(str(from_cents(cents))) == cents
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_json_amounts_are_exact(app, seed):
+    rng = random.Random(seed)
+    for _ in range(10000):
+        amount = from_cents(rng.randrange(MAX_CENTS))
+        encoded = app.json.dumps({"amount": amount})
+        assert Decimal(json.loads(encoded, parse_float=str)["amount"]) == amount
+
+
+def test_to_cents_uses_decimal_representation():
+    assert to_cents(0.1) == 10
+    assert to_cents(1.005) == 101
+    assert to_cents("19.99") == 1999
+    assert to_cents(Decimal("0.125")) == 13
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_aggregates_are_exact(client, user, seed):
+    rng = random.Random(seed)
+    category = Category.query.first()
+    amounts = [from_cents(rng.randrange(1, 10**9)) for _ in range(AGGREGATE_ROWS)]
+    for start in range(0, len(amounts), 10000):
+        db.session.execute(
+            db.insert(Expense),
+            [
+                {
+                    "amount_cents": to_cents(amount),
+                    "description": "Property test",
+                    "date": date.today(),
+                    "user_id": user.id,
+                    "category_id": category.id,
+                }
+                for amount in amounts[start : start + 10000]
+            ],
+        )
+    db.session.commit()
+    expected = sum(amounts, Decimal(0))
+
+    total_cents = db.session.query(db.func.sum(Expense.amount_cents)).scalar()
+    assert from_cents(total_cents) == expected
+
+    response = client.get("/api/summary")
+    summary = json.loads(response.get_data(as_text=True), parse_float=str)
+    assert Decimal(summary["total_expenses"]) == expected
+    assert Decimal(summary["expense_categories"][category.name]) == expected
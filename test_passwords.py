@@ -0,0 +1,78 @@
+"""Tests for pooled password hashing and login throttling."""
+
+import pytest
+
+from extensions import db, login_throttle, password_hasher
+from models.budget import User
+from passwords import PasswordHasherBusy
+
+
+def login(client, password):
+    return client.post("/login", data={"username": "tester", "password": password})
+
+
+def test_login_rehashes_passwords_made_with_old_settings(app, user):
+    app.config.update(PASSWORD_HASH_METHOD="pbkdf2:sha256:2000")
+    password_hasher.init_app(app)
+    assert password_hasher.needs_rehash(user.password_hash)
+
+    response = login(app.test_client(), "password123")
+
+    assert response.status_code == 302
+    stored = db.session.get(User, user.id).password_hash
+    assert stored.startswith("pbkdf2:sha256:2000$")
+    assert login(app.test_client(), "password123").status_code == 302
+
+
+def test_login_throttle_rejects_floods_before_hashing(app, user, monkeypatch):
+    app.config.update(LOGIN_RATE_LIMIT=3)
+    login_throttle.init_app(app)
+    client = app.test_client()
+    for _ in range(3):
+        assert login(client, "wrong").status_code == 302
+
+    def fail(*args):
+        raise AssertionError("password hashed while throttled")
+
+    monkeypatch.setattr(password_hasher, "verify", fail)
+    response = login(client, "password123")
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+
+def test_hashes_run_in_the_pool_and_reject_when_saturated(app, user):
+    app.config.update(PASSWORD_HASH_WORKERS=1)
+    password_hasher.init_app(app)
+    try:
+        password_hash = password_hasher.hash("secret")
+        assert password_hasher.verify(password_hash, "secret")
+        assert not password_hasher.verify(password_hash, "guess")
+
+        app.config.update(PASSWORD_HASH_QUEUE=0)
+        password_hasher.init_app(app)
+        response = login(app.test_client(), "password123")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+    finally:
+        password_hasher.shutdown()
+
+
+def test_timed_out_hashes_keep_their_slot_until_done(app):
+    app.config.update(
+        PASSWORD_HASH_WORKERS=1,
+        PASSWORD_HASH_QUEUE=1,
+        PASSWORD_HASH_METHOD="pbkdf2:sha256:5000000",
+        PASSWORD_HASH_TIMEOUT=0.01,
+    )
+    password_hasher.init_app(app)
+    try:
+        with pytest.raises(PasswordHasherBusy):
+            password_hasher.hash("secret")
+        # The abandoned hash is still running, so there is no room for another.
+        password_hasher.timeout = 30
+        with pytest.raises(PasswordHasherBusy):
+            password_hasher.hash("secret")
+    finally:
+        password_hasher.shutdown()
+        app.config.pop("PASSWORD_HASH_TIMEOUT")
@@ -0,0 +1,160 @@
+"""Tests for recurring rules and the batch materialiser."""
+
+from datetime import date
+
+from extensions import db
+from models.budget import (
+    Category,
+    DailyBalance,
+    Expense,
+    Income,
+    MonthlyCategorySpend,
+    RecurringRule,
+    User,
+)
+from recurring import Schedule, materialize_recurring
+
+
+def test_schedule_clamps_month_days_and_resumes_mid_schedule():
+    monthly = Schedule.parse("FREQ=MONTHLY;BYMONTHDAY=31;UNTIL=20240430")
+    assert list(monthly.occurrences(date(2024, 1, 31), date(2024, 2, 1), date.max)) == [
+        date(2024, 2, 29),
+        date(2024, 3, 31),
+        date(2024, 4, 30),
+    ]
+    assert monthly.next_occurrence(date(2024, 1, 31), date(2024, 4, 30)) is None
+    fortnightly = Schedule.parse("FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,FR")
+    assert list(
+        fortnightly.occurrences(date(2024, 1, 3), date(2024, 1, 10), date(2024, 1, 31))
+    ) == [date(2024, 1, 15), date(2024, 1, 19), date(2024, 1, 29)]
+
+
+def rules_for(user, rent):
+    return [
+        RecurringRule(
+            user_id=user.id,
+            type="Income",
+            amount=2000,
+            description="Salary",
+            rrule="FREQ=MONTHLY;BYMONTHDAY=-1",
+            dtstart=date(2024, 1, 31),
+            next_date=date(2024, 1, 31),
+        ),
+        RecurringRule(
+            user_id=user.id,
+            type="Expense",
+            amount=800,
+            description="Rent",
+            category_id=rent.id,
+            rrule="FREQ=MONTHLY;BYMONTHDAY=1",
+            dtstart=date(2024, 1, 1),
+            next_date=date(2024, 1, 1),
+        ),
+    ]
+
+
+def test_materialiser_is_idempotent_and_keeps_rollups_consistent(app, user):
+    other = User(username="other", email="other@example.com")
+    db.session.add(other)
+    db.session.commit()
+    rent = Category.query.filter_by(name="Rent").one()
+    # An entry after the materialised range must have its balance shifted.
+    db.session.add(
+        Expense(
+            amount=5,
+            description="Coffee",
+            date=date(2024, 4, 2),
+            user_id=user.id,
+            category_id=rent.id,
+        )
+    )
+    DailyBalance.record(user.id, date(2024, 4, 2), expense_cents=500)
+    MonthlyCategorySpend.record(user.id, rent.id, date(2024, 4, 2), 500)
+    db.session.add_all(rules_for(user, rent) + rules_for(other, rent))
+    db.session.commit()
+
+    report = materialize_recurring(date(2024, 3, 31), batch_size=3)
+
+    assert (report.rules, report.incomes, report.expenses) == (4, 6, 6)
+    assert report.user_ids == {user.id, other.id}
+    assert Income.query.filter_by(user_id=user.id).count() == 3
+    assert [rule.next_date for rule in RecurringRule.query.order_by("id")] == [
+        date(2024, 4, 30),
+        date(2024, 4, 1),
+    ] * 2
+    assert DailyBalance.check() == []
+    assert DailyBalance.balance_before(user.id, date(2024, 4, 3)) == 360000 - 500
+    assert MonthlyCategorySpend.spent(user.id, rent.id, date(2024, 4, 1)) == 500
+    assert MonthlyCategorySpend.spent(user.id, rent.id, date(2024, 3, 1)) == 80000
+    assert db.session.get(User, user.id).data_version == 1
+
+    again = materialize_recurring(date(2024, 3, 31))
+    assert (again.rules, again.incomes, again.expenses) == (0, 0, 0)
+    assert Expense.query.count() == 7
+
+
+def test_api_creates_rule_and_enters_due_occurrences(client, user):
+    rent = Category.query.filter_by(name="Rent").one()
+    today = date.today()
+    response = client.post(
+        "/api/recurring_rules",
+        json={
+            "type": "Expense",
+            "amount": "750.00",
+            "description": "Rent",
+            "category_id": rent.id,
+            "rrule": "FREQ=MONTHLY;BYMONTHDAY=1",
+            "start": today.replace(day=1).isoformat(),
+        },
+    )
+
+    assert response.status_code == 201
+    assert response.get_json()["next_date"] > today.isoformat()
+    assert Expense.query.filter_by(user_id=user.id, description="Rent").count() == 1
+    assert DailyBalance.check(user.id) == []
+    assert client.get("/api/recurring_rules").get_json()[0]["category"] == "Rent"
+
+    bad = client.post(
+        "/api/recurring_rules",
+        json={"type": "Income", "amount": "10", "description": "Pay", "rrule": "X"},
+    )
+    assert bad.status_code == 400
+    # A daily rule started years ago would enter thousands of rows inline.
+    old = client.post(
+        "/api/recurring_rules",
+        json={
+            "type": "Income",
+            "amount": "10",
+            "description": "Pay",
+            "rrule": "FREQ=DAILY",
+            "start": date(2000, 1, 1).isoformat(),
+        },
+    )
+    assert old.status_code == 400
+    assert RecurringRule.query.count() == 1
+
+
+def test_api_rejects_rules_of_the_wrong_types(client, user):
+    rent = Category.query.filter_by(name="Rent").one()
+    rule = {
+        "type": "Expense",
+        "amount": "750.00",
+        "description": "Rent",
+        "category_id": rent.id,
+        "rrule": "FREQ=MONTHLY",
+    }
+    for body in (
+        ["not", "a", "rule"],
+        "FREQ=MONTHLY",
+        {**rule, "type": ["Expense"]},
+        {**rule, "amount": {"value": 750}},
+        {**rule, "description": 42},
+        {**rule, "category_id": [rent.id]},
+        {**rule, "category_id": str(rent.id)},
+        {**rule, "rrule": {"FREQ": "MONTHLY"}},
+        {**rule, "start": 20240101},
+    ):
+        response = client.post("/api/recurring_rules", json=body)
+        assert response.status_code == 400, body
+        assert "error" in response.get_json()
+    assert RecurringRule.query.count() == 0
@@ -0,0 +1,55 @@
+"""Tests for grouping dated rows into report buckets."""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from extensions import db
+from models.budget import Category, Expense
+from reporting import BUCKET_UNITS, bucket_key, date_bucket
+
+# Week, month, quarter and year boundaries, and a leap day.
+DAYS = [
+    date(2023, 12, 31),
+    date(2024, 1, 1),
+    date(2024, 2, 29),
+    date(2024, 3, 31),
+    date(2024, 4, 1),
+    date(2024, 9, 29),
+    date(2024, 9, 30),
+]
+EXPECTED = {
+    "day": "2024-02-29",
+    "week": "2024-02-26",
+    "month": "2024-02",
+    "quarter": "2024-Q1",
+}
+
+
+@pytest.mark.parametrize("unit", BUCKET_UNITS)
+def test_sql_buckets_match_bucket_key(app, user, unit):
+    food = Category.query.filter_by(name="Food").one()
+    for day in DAYS:
+        db.session.add(
+            Expense(
+                amount=1,
+                description="Lunch",
+                date=day,
+                category_id=food.id,
+                user_id=user.id,
+            )
+        )
+    db.session.commit()
+    expected = [bucket_key(day, unit) for day in DAYS]
+
+    # Expense months are read from year_month; rows without that column have
+    # theirs computed from the date.
+    dates = select(Expense.date).subquery()
+    for bucket, day in (
+        (date_bucket(Expense, unit), Expense.date),
+        (date_bucket(dates.c, unit), dates.c.date),
+    ):
+        keys = db.session.scalars(select(bucket).order_by(day)).all()
+        assert keys == expected
+    assert bucket_key(date(2024, 2, 29), unit) == EXPECTED[unit]
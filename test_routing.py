@@ -0,0 +1,109 @@
+"""Tests for routing report reads to a read replica."""
+
+import pytest
+from flask import Flask, jsonify
+from flask_login import LoginManager
+
+from extensions import cache, db, replica_router
+from models.budget import Category, User
+from routing import PIN_KEY, REPLICA_BIND
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    """Provide an app on two SQLite files; only the primary has categories."""
+    app = Flask(__name__)
+    app.config.update(
+        SECRET_KEY="test",
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'primary.db'}",
+        SQLALCHEMY_BINDS={REPLICA_BIND: f"sqlite:///{tmp_path / 'replica.db'}"},
+        REPLICA_PIN_SECONDS=60,
+    )
+    db.init_app(app)
+    replica_router.init_app(app)
+
+    @app.route("/report")
+    @replica_router.reads
+    def report():
+        return jsonify(Category.query.count())
+
+    @app.route("/report_after_write", methods=["POST"])
+    @replica_router.reads
+    def report_after_write():
+        before = Category.query.count()
+        db.session.add(Category(name="Travel"))
+        db.session.flush()
+        return jsonify([before, Category.query.count()])
+
+    @app.route("/cached_report")
+    @cache.cached("report")
+    @replica_router.reads
+    def cached_report():
+        return jsonify(Category.query.count())
+
+    @app.route("/categories", methods=["POST"])
+    def add_category():
+        db.session.add(Category(name="Gifts"))
+        db.session.commit()
+        return jsonify(Category.query.count())
+
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines[REPLICA_BIND])
+        db.session.add_all([Category(name="Food"), Category(name="Rent")])
+        db.session.commit()
+    yield app
+    # The replica bind's metadata would otherwise outlive this app on db.
+    db.metadatas.pop(REPLICA_BIND)
+
+
+def test_report_views_read_the_replica_until_the_session_writes(replica_app):
+    client = replica_app.test_client()
+
+    assert client.get("/report").get_json() == 0
+    # After writing, the same session reads its own rows from the primary.
+    assert client.post("/report_after_write").get_json() == [0, 3]
+
+
+def test_users_read_the_primary_for_a_while_after_they_write(replica_app):
+    writer, other = replica_app.test_client(), replica_app.test_client()
+
+    assert writer.post("/categories").get_json() == 3
+    assert writer.get("/report").get_json() == 3
+    assert other.get("/report").get_json() == 0
+
+    with writer.session_transaction() as session:
+        session[PIN_KEY] -= 60
+    assert writer.get("/report").get_json() == 0
+
+
+def test_cached_replica_reads_expire_when_the_replica_catches_up(replica_app):
+    app = replica_app
+    cache.init_app(app)
+    login_manager = LoginManager(app)
+    login_manager.request_loader(lambda request: db.session.get(User, 1))
+    with app.app_context():
+        replica = db.engines[REPLICA_BIND]
+        with replica.begin() as connection:
+            connection.execute(
+                db.insert(User), {"id": 1, "username": "u", "email": "u@x"}
+            )
+    client = app.test_client()
+
+    # The replica lags behind the primary's categories.
+    assert client.get("/cached_report").get_json() == 0
+    assert client.get("/cached_report").get_json() == 0
+
+    with replica.begin() as connection:
+        connection.execute(db.insert(Category), [{"name": "Food"}, {"name": "Rent"}])
+        connection.execute(db.update(User).values(data_version=1))
+    assert client.get("/cached_report").get_json() == 2
+
+
+def test_writes_pin_nobody_without_a_replica(client):
+    response = client.post(
+        "/add_income", data={"amount": "10", "source": "Pay", "date": "2024-01-05"}
+    )
+    assert response.status_code == 302
+    with client.session_transaction() as session:
+        assert PIN_KEY not in session
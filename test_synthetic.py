@@ -0,0 +1,57 @@
+"""Tests for the synthetic history generator."""
+
+from click.testing import CliRunner
+from sqlalchemy import func
+
+from extensions import db
+from manage import seed_synthetic_command
+from models.budget import DailyBalance, Expense, Income, MonthlyCategorySpend, User
+from synthetic import seed_synthetic
+
+
+def test_seeded_rows_match_their_rollups_and_balances(app):
+    # A batch smaller than one user's rows flushes several times.
+    counts = seed_synthetic(3, 40, months=3, seed=7, batch_size=50)
+
+    assert counts["users"] == User.query.count() == 3
+    assert counts["expenses"] == Expense.query.count() == 120
+    assert counts["incomes"] == Income.query.count() >= 3 * 2
+    rollup = db.session.query(
+        MonthlyCategorySpend.user_id,
+        MonthlyCategorySpend.category_id,
+        MonthlyCategorySpend.year_month,
+        MonthlyCategorySpend.total_cents,
+        MonthlyCategorySpend.count,
+    )
+    expenses = db.session.query(
+        Expense.user_id,
+        Expense.category_id,
+        Expense.year_month,
+        func.sum(Expense.amount_cents),
+        func.count(),
+    ).group_by(Expense.user_id, Expense.category_id, Expense.year_month)
+    assert sorted(map(tuple, rollup)) == sorted(map(tuple, expenses))
+    assert DailyBalance.check() == []
+
+
+def test_seeding_is_reproducible_and_adds_users(app):
+    seed_synthetic(1, 20, months=2, seed=3)
+    result = CliRunner().invoke(
+        seed_synthetic_command,
+        ["--users", "1", "--rows-per-user", "20", "--months", "2", "--seed", "3"],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "Created 1 users" in result.output
+    first, second = User.query.order_by(User.id).all()
+    assert (first.username, second.username) == ("synthetic0", "synthetic1")
+    amounts = [
+        db.session.scalars(
+            db.select(Expense.amount_cents)
+            .filter_by(user_id=user.id)
+            .order_by(Expense.id)
+        ).all()
+        for user in (first, second)
+    ]
+    assert amounts[0] == amounts[1]
+    assert DailyBalance.check() == []
@@ -0,0 +1,55 @@
+"""Tests for the per-process cache of logged-in users."""
+
+from sqlalchemy import event
+
+from extensions import db, user_cache
+from models.budget import User
+
+
+def load_user(user_id):
+    """Load a user through the cache in a fresh session; return it and the SQL."""
+    db.session.remove()
+    statements = []
+
+    def before_cursor_execute(*args):
+        statements.append(args[2])
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        loaded = user_cache.load(db.session, User, user_id)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+    return loaded, statements
+
+
+def test_flushed_user_changes_drop_the_cached_copy(app, user):
+    user_cache.store(user)
+    cached, statements = load_user(user.id)
+    assert (cached.email, statements) == ("tester@example.com", [])
+
+    cached.email = "new@example.com"
+    cached.set_password("new password")
+    db.session.commit()
+
+    reloaded, statements = load_user(user.id)
+    assert len(statements) == 1
+    assert reloaded.email == "new@example.com"
+    assert reloaded.check_password("new password")
+    # The reload is cached again.
+    assert load_user(user.id)[1] == []
+
+
+def test_deleted_users_are_not_served_from_the_cache(app, user):
+    user_cache.store(user)
+    db.session.delete(db.session.get(User, user.id))
+    db.session.commit()
+
+    assert load_user(user.id)[0] is None
+
+
+def test_a_zero_ttl_disables_the_cache(app, user, monkeypatch):
+    monkeypatch.setattr(user_cache, "ttl", 0)
+    user_cache.store(user)
+
+    assert len(load_user(user.id)[1]) == 1
+    assert len(load_user(user.id)[1]) == 1
@@ -0,0 +1,154 @@
+"""Merged, keyset-paginated access to a user's incomes and expenses."""
+
+from datetime import date
+
+from sqlalchemy import and_, asc, desc, literal, or_, select, union_all
+
+from extensions import db
+from models.budget import Expense, Income
+
+TRANSACTION_TYPES = ("Income", "Expense")
+
+
+def encode_cursor(row):
+    """Return the opaque cursor that resumes a listing after the given row."""
+    return f"{row.date.isoformat()}.{row.type}.{row.id}"
+
+
+def decode_cursor(cursor):
+    """
+    Parse a cursor produced by encode_cursor into a (date, type, id) key.
+
+    :raises ValueError: If the cursor is malformed.
+    """
+    try:
+        day, kind, row_id = cursor.split(".")
+        key = (date.fromisoformat(day), kind, int(row_id))
+    except (AttributeError, ValueError):
+        raise ValueError(f"invalid cursor {cursor!r}") from None
+    if kind not in TRANSACTION_TYPES:
+        raise ValueError(f"invalid cursor {cursor!r}")
+    return key
+
+
+def _before(model, kind, cursor):
+    """
+    Return the condition selecting rows that sort after the cursor.
+
+    Rows are ordered by (date, id, type) descending. The type is constant
+    within each branch of the union, so it only decides whether the cursor's
+    own id is included, which keeps the condition usable by the
+    (user_id, date) index.
+    """
+    day, cursor_kind, row_id = cursor
+    same_day = model.id <= row_id if kind < cursor_kind else model.id < row_id
+    return or_(model.date < day, and_(model.date == day, same_day))
+
+
+def _after(model, kind, cursor):
+    """Return the condition selecting rows that sort before the cursor."""
+    day, cursor_kind, row_id = cursor
+    same_day = model.id >= row_id if kind > cursor_kind else model.id > row_id
+    return or_(model.date > day, and_(model.date == day, same_day))
+
+
+def transactions_query(
+    user_id,
+    kind=None,
+    category_id=None,
+    start_date=None,
+    end_date=None,
+    before=None,
+    after=None,
+    limit=None,
+    oldest_first=False,
+):
+    """
+    Build a statement listing a user's incomes and expenses newest first.
+
+    Each row has ``date``, ``id``, ``type``, ``amount_cents``, ``description``
+    and ``category_id`` columns; category names come from the category
+    registry. Filtering on a category only returns expenses. With a limit,
+    each branch of the union is limited too, so the database reads at most
+    that many rows per table from the (user_id, date) index instead of
+    sorting every matching row.
+
+    :param user_id: The ID of the user whose transactions are listed.
+    :param kind: "Income" or "Expense" to list one type only.
+    :param category_id: Only list expenses in this category.
+    :param start_date: Earliest date to include.
+    :param end_date: Latest date to include.
+    :param before: A decoded cursor; only rows older than it are listed.
+    :param after: A decoded cursor; only rows newer than it are listed.
+    :param limit: Maximum number of rows to list.
+    :param oldest_first: List oldest first instead, so that with ``after``
+        and a limit the rows nearest the cursor are listed.
+    """
+    branches = []
+    if kind in (None, "Income") and category_id is None:
+        incomes = select(
+            Income.date,
+            Income.id,
+            literal("Income").label("type"),
+            Income.amount_cents,
+            Income.source.label("description"),
+            literal(None, db.Integer).label("category_id"),
+        ).where(Income.user_id == user_id)
+        branches.append(("Income", Income, incomes))
+    if kind in (None, "Expense"):
+        expenses = (
+            select(
+                Expense.date,
+                Expense.id,
+                literal("Expense").label("type"),
+                Expense.amount_cents,
+                Expense.description,
+                Expense.category_id,
+            )
+            .where(Expense.user_id == user_id)
+        )
+        if category_id is not None:
+            expenses = expenses.where(Expense.category_id == category_id)
+        branches.append(("Expense", Expense, expenses))
+
+    statements = []
+    for branch_kind, model, statement in branches:
+        if start_date is not None:
+            statement = statement.where(model.date >= start_date)
+        if end_date is not None:
+            statement = statement.where(model.date <= end_date)
+        if before is not None:
+            statement = statement.where(_before(model, branch_kind, before))
+        if after is not None:
+            statement = statement.where(_after(model, branch_kind, after))
+        order = asc if oldest_first else desc
+        statement = statement.order_by(order(model.date), order(model.id))
+        if limit is not None:
+            statement = statement.limit(limit)
+        statements.append(statement)
+
+    if len(statements) == 1:
+        return statements[0]
+    # The union is ordered and limited directly rather than wrapped in another
+    # SELECT, which costs more to build than the query takes to run. Members
+    # are wrapped as some databases reject ORDER BY and LIMIT inside a UNION.
+    query = union_all(*(select(statement.subquery()) for statement in statements))
+    query = query.order_by(order("date"), order("id"), order("type"))
+    return query if limit is None else query.limit(limit)
+
+
+def transaction_page(user_id, limit, **filters):
+    """
+    Return one page of transactions and the cursor for the next page.
+
+    :param user_id: The ID of the user whose transactions are listed.
+    :param limit: Maximum number of rows on the page.
+    :param filters: Keyword filters accepted by transactions_query.
+    :return: A (rows, next_cursor) tuple; next_cursor is None on the last page.
+    """
+    rows = db.session.execute(
+        transactions_query(user_id, limit=limit + 1, **filters)
+    ).all()
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1])
+    return rows, None